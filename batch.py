@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+Headless Batch Converter
+
+Converts many files at once without the GUI. Inputs may be files, folders or
+glob patterns; each file's output is chosen from CONVERSION_MAP and the
+conversions run in a pool of worker processes.
+
+Example:
+    python batch.py scans/ "reports/*.xlsx" -t pdf -o converted/ -j 8
+"""
+
+# --- Imports ---
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import multiprocessing
+from collections import Counter
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from convertor import CONVERSION_MAP, IMAGE_FORMATS, convert_file
+from resultcache import ResultCache, default_cache_dir
+from instrument import JsonlSink, aggregate, format_report, load_events, recording
+
+# --- Result Record ---
+
+@dataclass
+class ConversionResult:
+    """
+    Outcome of converting one input file.
+
+    status is 'ok', 'error' or 'skipped'; outputs lists every file written
+    (several for PDF to image conversions) and seconds is the wall time.
+    cached is True when the outputs were restored from the result cache,
+    in which case bytes_saved is the size of the restored files.
+    """
+    input_path: str
+    output_path: str
+    output_format: str
+    status: str = 'ok'
+    outputs: list = field(default_factory=list)
+    seconds: float = 0.0
+    error: str = ''
+    cached: bool = False
+    bytes_saved: int = 0
+
+    def as_dict(self):
+        """
+        Return the result as a plain dict (for JSON reports).
+        """
+        return asdict(self)
+
+# --- Job Resolution ---
+
+def expand_inputs(inputs, recursive=False):
+    """
+    Expand a list of files, folders and glob patterns into file paths.
+    Duplicates are removed and the original order is kept.
+    """
+    seen = set()
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**', '*') if recursive else os.path.join(item, '*')
+            matches = sorted(glob.glob(pattern, recursive=recursive))
+        elif glob.has_magic(item):
+            matches = sorted(glob.glob(item, recursive=recursive))
+        else:
+            matches = [item]
+        for path in matches:
+            path = os.path.normpath(path)
+            if os.path.isfile(path) and path not in seen:
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+def output_path_for(input_path, output_format, output_dir=None, keep_extension=False):
+    """
+    Build the output path for one input file.
+
+    Outputs go next to the input unless output_dir is given. Document to image
+    conversions (PDF, DOCX, PPTX) get their own folder (named after the input)
+    so that the page_N files of different documents do not overwrite each other.
+    keep_extension=True keeps the input's extension in the name (a.png.pdf
+    instead of a.pdf), see output_paths_for.
+    """
+    base, ext = os.path.splitext(os.path.basename(input_path))
+    if keep_extension:
+        base = os.path.basename(input_path)
+    folder = output_dir or os.path.dirname(input_path)
+    if ext[1:].lower() not in IMAGE_FORMATS and output_format in IMAGE_FORMATS:
+        folder = os.path.join(folder, base)
+    return os.path.join(folder, f"{base}.{output_format}")
+
+def output_paths_for(requests):
+    """
+    Build the output paths for many inputs at once without name collisions.
+
+    requests is a list of (input_path, output_format, output_dir) tuples.
+    Inputs that would write the same output (a.png and a.jpg both to a.pdf)
+    keep their extension in the output name instead (a.png.pdf, a.jpg.pdf),
+    whatever order they come in. Returns {input_path: output_path}; an input
+    whose output still collides with another one maps to None.
+    """
+    def key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    paths = {path: output_path_for(path, fmt, out_dir) for path, fmt, out_dir in requests}
+    counts = Counter(key(out_path) for out_path in paths.values())
+    for path, fmt, out_dir in requests:
+        if counts[key(paths[path])] > 1:
+            paths[path] = output_path_for(path, fmt, out_dir, keep_extension=True)
+    counts = Counter(key(out_path) for out_path in paths.values())
+    return {path: out_path if counts[key(out_path)] == 1 else None for path, out_path in paths.items()}
+
+def resolve_jobs(inputs, output_format, output_dir=None, recursive=False):
+    """
+    Pair every input file with its output path using CONVERSION_MAP.
+
+    Returns (jobs, skipped): jobs is a list of (input_path, output_path)
+    tuples and skipped holds ConversionResult records for files whose type
+    cannot be converted to output_format, or whose output name collides with
+    another input's even after disambiguation (see output_paths_for).
+    """
+    output_format = output_format.lower()
+    jobs, skipped = [], []
+    convertible = []
+    for path in expand_inputs(inputs, recursive):
+        input_format = os.path.splitext(path)[1][1:].lower()
+        if output_format in CONVERSION_MAP.get(input_format, []):
+            convertible.append(path)
+        else:
+            skipped.append(ConversionResult(
+                path, output_path_for(path, output_format, output_dir), output_format, status='skipped',
+                error=f"No conversion from '.{input_format}' to '{output_format}'."
+            ))
+    out_paths = output_paths_for([(path, output_format, output_dir) for path in convertible])
+    for path in convertible:
+        if out_paths[path] is None:
+            skipped.append(ConversionResult(
+                path, output_path_for(path, output_format, output_dir, keep_extension=True), output_format,
+                status='skipped', error="Output name collides with another input's output."
+            ))
+        else:
+            jobs.append((path, out_paths[path]))
+    return jobs, skipped
+
+# --- Conversion Engine ---
+
+# One ResultCache per (worker) process, created on first use
+_CACHES = {}
+
+def _get_cache(cache_dir, cache_max_bytes):
+    key = (cache_dir, cache_max_bytes)
+    if key not in _CACHES:
+        _CACHES[key] = ResultCache(cache_dir, cache_max_bytes)
+    return _CACHES[key]
+
+def convert_one(input_path, output_path, output_format, cache_dir=None, cache_max_bytes=None, options=None,
+                profile_log=None, profile_mode=None):
+    """
+    Convert a single file and capture the outcome as a ConversionResult.
+    Never raises; errors are reported in the result.
+    With cache_dir, results are looked up in / stored to a ResultCache there.
+    With profile_log, the conversion's stage events are appended to that
+    JSON-lines file (see instrument); profile_mode is 'tracemalloc' or 'cprofile'.
+    """
+    if profile_log:
+        with recording(input_path, JsonlSink(profile_log), profile_mode):
+            return convert_one(input_path, output_path, output_format, cache_dir, cache_max_bytes, options)
+    result = ConversionResult(input_path, output_path, output_format)
+    cache = _get_cache(cache_dir, cache_max_bytes) if cache_dir else None
+    before = cache.stats() if cache else None
+    start = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        result.outputs = convert_file(input_path, output_path, output_format, cache=cache, **(options or {}))
+    except Exception as e:
+        result.status = 'error'
+        result.error = str(e)
+    result.seconds = time.perf_counter() - start
+    if cache:
+        after = cache.stats()
+        result.cached = after['hits'] > before['hits']
+        result.bytes_saved = after['bytes_saved'] - before['bytes_saved']
+    return result
+
+def run_batch(jobs, output_format, workers=None, progress_callback=None, cache_dir=None,
+              cache_max_bytes=2 * 1024 ** 3, options=None, profile_log=None, profile_mode=None):
+    """
+    Run a list of (input_path, output_path) jobs in a pool of worker processes.
+
+    Returns ConversionResult records in the same order as jobs.
+    If given, progress_callback(result, done, total) is called as each
+    file finishes. cache_dir enables the on-disk result cache; options are
+    passed to every converter. profile_log/profile_mode record per-stage
+    events of every conversion (see convert_one).
+    """
+    settings = {'cache_dir': cache_dir, 'cache_max_bytes': cache_max_bytes, 'options': options,
+                'profile_log': profile_log, 'profile_mode': profile_mode}
+    total = len(jobs)
+    results = [None] * total
+    if not jobs:
+        return results
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for index, (input_path, output_path) in enumerate(jobs):
+            results[index] = convert_one(input_path, output_path, output_format, **settings)
+            if progress_callback:
+                progress_callback(results[index], index + 1, total)
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(workers, total)) as pool:
+        futures = {
+            pool.submit(convert_one, input_path, output_path, output_format, **settings): index
+            for index, (input_path, output_path) in enumerate(jobs)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            results[index] = future.result()
+            if progress_callback:
+                progress_callback(results[index], done, total)
+    return results
+
+def batch_convert(inputs, output_format, output_dir=None, workers=None, recursive=False, progress_callback=None, **settings):
+    """
+    Resolve inputs and convert them all to output_format.
+    Extra settings (cache_dir, cache_max_bytes, options, profile_log, profile_mode)
+    are passed to run_batch.
+    Returns a list of ConversionResult (skipped files included).
+    """
+    jobs, skipped = resolve_jobs(inputs, output_format, output_dir, recursive)
+    return run_batch(jobs, output_format, workers, progress_callback, **settings) + skipped
+
+# --- Command-Line Entry Point ---
+
+def main(argv=None):
+    """
+    Parse command-line arguments, run the batch and print a summary.
+    Exit status is 1 if any conversion failed.
+    """
+    parser = argparse.ArgumentParser(description="Convert many files without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="Files, folders or glob patterns")
+    parser.add_argument("-t", "--to", required=True, dest="output_format", help="Output format, e.g. pdf, png, csv")
+    parser.add_argument("-o", "--output-dir", help="Folder for converted files (default: next to each input)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Descend into sub-folders")
+    parser.add_argument("--report", help="Write a JSON report with per-file results to this path")
+    parser.add_argument("--cache", nargs="?", const=default_cache_dir(), metavar="DIR",
+                        help="Reuse results of earlier conversions (default folder: %(const)s)")
+    parser.add_argument("--cache-max-mb", type=int, default=2048, help="Size limit of the result cache")
+    parser.add_argument("--profile-log", metavar="PATH",
+                        help="Record per-stage timings to this JSON-lines file and print a stage report")
+    parser.add_argument("--profile-mode", choices=["tracemalloc", "cprofile"],
+                        help="Also trace allocations per stage, or profile each conversion")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the summary")
+    args = parser.parse_args(argv)
+    if args.profile_log:
+        os.makedirs(os.path.dirname(os.path.abspath(args.profile_log)), exist_ok=True)
+        open(args.profile_log, 'w').close()  # Start a fresh log for this run
+
+    def show_progress(result, done, total):
+        if not args.quiet:
+            detail = result.error if result.status == 'error' else f"{result.seconds:.2f}s"
+            if result.cached:
+                detail += ", cached"
+            print(f"[{done}/{total}] {result.status.upper():5} {result.input_path} ({detail})")
+
+    start = time.perf_counter()
+    results = batch_convert(args.inputs, args.output_format, args.output_dir,
+                            args.workers, args.recursive, show_progress,
+                            cache_dir=args.cache, cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+                            profile_log=args.profile_log, profile_mode=args.profile_mode)
+    elapsed = time.perf_counter() - start
+
+    counts = {status: sum(r.status == status for r in results) for status in ('ok', 'error', 'skipped')}
+    print(f"{counts['ok']} converted, {counts['error']} failed, {counts['skipped']} skipped in {elapsed:.2f}s")
+    if args.cache:
+        hits = sum(r.cached for r in results)
+        saved_mb = sum(r.bytes_saved for r in results) / 1024 / 1024
+        print(f"cache: {hits} hits, {counts['ok'] - hits} misses, {saved_mb:.1f} MB restored")
+    if args.profile_log:
+        print(format_report(aggregate(load_events(args.profile_log))))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump([r.as_dict() for r in results], f, indent=2)
+    return 1 if counts['error'] else 0
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,495 @@
+# -*- coding: utf-8 -*-
+"""
+Performance benchmarks for File Tools.
+
+Run from the repository root, for example:
+
+    python benchmark.py pdf-workers manual.pdf --max-workers 8 --dpi 150
+    python benchmark.py startup --budget-ms 150
+    python benchmark.py slice scan.pdf 1 2000
+    python benchmark.py xlsx big.xlsx
+    python benchmark.py suite --out results.json
+    python benchmark.py suite --compare results.json --threshold 0.15
+"""
+
+# --- Imports ---
+import os
+import sys
+import time
+import shutil
+import json
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+
+# --- Helpers ---
+
+def _timed(func, *args, **kwargs):
+    """
+    Call func and return (result, elapsed seconds).
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def _fresh_dir(parent, name):
+    """
+    Create (or empty) a scratch directory below parent and return its path.
+    """
+    path = os.path.join(parent, name)
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    return path
+
+# --- Benchmarks ---
+
+def bench_pdf_workers(args):
+    """
+    Compare pages/sec of pdf_to_images for 1..N worker processes.
+    The 'serial' row is the single-process streaming path.
+    """
+    import convertor
+
+    pages = convertor.get_pdf_page_count(args.pdf)
+    print(f"{os.path.basename(args.pdf)}: {pages} pages, dpi={args.dpi}, format={args.format}")
+    print(f"{'mode':>10} {'seconds':>10} {'pages/sec':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = None
+        for workers in range(1, args.max_workers + 1):
+            out_dir = _fresh_dir(tmp, f"w{workers}")
+            _, elapsed = _timed(convertor.pdf_to_images, args.pdf, out_dir, args.format,
+                                dpi=args.dpi, workers=workers)
+            baseline = baseline or elapsed
+            label = "serial" if workers == 1 else f"{workers} procs"
+            print(f"{label:>10} {elapsed:>10.2f} {pages / elapsed:>10.2f} {baseline / elapsed:>7.2f}x")
+
+def run_isolated(code):
+    """
+    Run a snippet of Python in a fresh interpreter (from the repository root).
+
+    Returns (seconds, peak_rss_mb) measured inside the child, so each
+    measurement starts from a clean process. peak_rss_mb is None where the
+    resource module is unavailable (Windows).
+    """
+    wrapper = (
+        "import time, json\n"
+        "_start = time.perf_counter()\n"
+        f"{code}\n"
+        "_elapsed = time.perf_counter() - _start\n"
+        "try:\n"
+        "    # VmHWM is this process's own peak; ru_maxrss on Linux also counts the parent's before exec\n"
+        "    with open('/proc/self/status') as _f:\n"
+        "        _rss = next(int(l.split()[1]) for l in _f if l.startswith('VmHWM')) / 1024\n"
+        "except (OSError, StopIteration):\n"
+        "    try:\n"
+        "        import resource, sys\n"
+        "        _rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+        "        _rss = _rss / 1024 / 1024 if sys.platform == 'darwin' else _rss / 1024\n"
+        "    except ImportError:\n"
+        "        _rss = None\n"
+        "print(json.dumps([_elapsed, _rss]))\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", wrapper], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+    seconds, rss = json.loads(proc.stdout.strip().splitlines()[-1])
+    return seconds, rss
+
+def _format_rss(rss):
+    return "n/a" if rss is None else f"{rss:.0f} MB"
+
+def bench_slice(args):
+    """
+    Compare wall time and peak memory of slice_pdf's in-memory PdfWriter
+    path against the constant-memory streaming path.
+    """
+    size_mb = os.path.getsize(args.pdf) / 1024 / 1024
+    print(f"{os.path.basename(args.pdf)}: {size_mb:.0f} MB, pages {args.start}-{args.end}")
+    print(f"{'mode':>10} {'seconds':>10} {'peak RSS':>10} {'output':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, streaming in (("pypdf2", False), ("streaming", True)):
+            out_path = os.path.join(tmp, f"{mode}.pdf")
+            code = (
+                "from pdfslice import slice_pdf\n"
+                f"ok, msg = slice_pdf({args.pdf!r}, {args.start}, {args.end}, {out_path!r}, streaming={streaming})\n"
+                "assert ok, msg"
+            )
+            seconds, rss = run_isolated(code)
+            out_mb = os.path.getsize(out_path) / 1024 / 1024
+            print(f"{mode:>10} {seconds:>10.2f} {_format_rss(rss):>10} {out_mb:>7.0f} MB")
+
+def bench_xlsx(args):
+    """
+    Compare wall time and peak memory of excel_to_csv's pandas engine
+    against the streaming (read-only openpyxl) engine.
+    """
+    size_mb = os.path.getsize(args.xlsx) / 1024 / 1024
+    print(f"{os.path.basename(args.xlsx)}: {size_mb:.1f} MB")
+    print(f"{'engine':>10} {'seconds':>10} {'peak RSS':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for engine in ("pandas", "streaming"):
+            out_path = os.path.join(tmp, f"{engine}.csv")
+            code = (
+                "from convertor import excel_to_csv\n"
+                f"excel_to_csv({args.xlsx!r}, {out_path!r}, engine={engine!r}, batch_size={args.batch_size})"
+            )
+            seconds, rss = run_isolated(code)
+            print(f"{engine:>10} {seconds:>10.2f} {_format_rss(rss):>10}")
+
+# Backends that must never be imported just by loading the tools
+HEAVY_BACKENDS = ['PIL', 'img2pdf', 'pdf2image', 'pdf2docx', 'docx2pdf', 'pandas', 'PyPDF2', 'ttkbootstrap', 'fitz']
+
+def measure_import_time(module):
+    """
+    Import module in a fresh interpreter with -X importtime.
+
+    Returns (total_ms, rows) where rows is a list of
+    (cumulative_ms, self_ms, name) for every module imported.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us) / 1000, int(self_us) / 1000, name.rstrip()))
+    total = next((cum for cum, _, name in rows if name.strip() == module), 0.0)
+    return total, rows
+
+def bench_startup(args):
+    """
+    Report import time of each tool and fail (exit 1) if a heavy backend is
+    imported eagerly or the median import time exceeds --budget-ms.
+    """
+    status = 0
+    for module in args.modules:
+        samples = []
+        for _ in range(args.repeat):
+            total, rows = measure_import_time(module)
+            samples.append(total)
+        median = sorted(samples)[len(samples) // 2]
+        imported = {name.strip().split(".")[0] for _, _, name in rows}
+        eager = sorted(imported.intersection(HEAVY_BACKENDS))
+        print(f"{module}: {median:.1f} ms (median of {args.repeat})")
+        for cumulative, self_ms, name in sorted(rows, reverse=True)[1:args.top + 1]:
+            print(f"    {cumulative:8.1f} ms  {name.strip()}")
+        if eager:
+            print(f"  FAIL: heavy backends imported at start-up: {', '.join(eager)}")
+            status = 1
+        if args.budget_ms and median > args.budget_ms:
+            print(f"  FAIL: {median:.1f} ms exceeds budget of {args.budget_ms} ms")
+            status = 1
+    return status
+
+# --- Synthetic Corpus ---
+
+def make_pdf(path, pages, lines_per_page=45):
+    """
+    Write a text-only PDF with the given number of pages (no third-party packages).
+    """
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(pages))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Count {pages} /Kids [ {kids} ] >>".encode('ascii'),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i in range(pages):
+        lines = " ".join(f"(Page {i + 1}, line {n + 1}: the quick brown fox jumps over the lazy dog.) Tj T*"
+                         for n in range(lines_per_page))
+        content = f"BT /F1 11 Tf 14 TL 56 790 Td {lines} ET".encode('ascii')
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode('ascii'))
+        objects.append(f"<< /Length {len(content)} >>\nstream\n".encode('ascii') + content + b"\nendstream")
+    with open(path, 'wb') as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(f"{number} 0 obj\n".encode('ascii') + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('ascii'))
+        f.write("".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode('ascii'))
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('ascii'))
+
+def make_image(path, megapixels):
+    """
+    Write a 4:3 photo-like test image (gradients plus noise) of about the given size.
+    """
+    from PIL import Image
+
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    red = Image.linear_gradient('L').resize((width, height))
+    green = Image.radial_gradient('L').resize((width, height))
+    blue = Image.effect_noise((width, height), 48)
+    Image.merge('RGB', (red, green, blue)).save(path)
+
+def make_workbook(path, rows, cols):
+    """
+    Write a workbook with one sheet of rows x cols mixed numbers, text and dates.
+    """
+    import datetime
+    import openpyxl
+
+    rng = random.Random(0)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("data")
+    sheet.append([f"col_{c}" for c in range(cols)])
+    day = datetime.date(2020, 1, 1)
+    for r in range(rows):
+        sheet.append([r if c == 0 else
+                      rng.random() * 1000 if c % 3 == 1 else
+                      f"item-{rng.randrange(10 ** 6)}" if c % 3 == 2 else
+                      day + datetime.timedelta(days=r % 3650)
+                      for c in range(cols)])
+    workbook.save(path)
+
+def make_docx(path, paragraphs):
+    """
+    Write a DOCX with the given number of paragraphs (needs python-docx).
+    """
+    import docx
+
+    document = docx.Document()
+    for n in range(paragraphs):
+        document.add_paragraph(f"Paragraph {n + 1}: the quick brown fox jumps over the lazy dog. " * 4)
+    document.save(path)
+
+def make_pptx(path, slides):
+    """
+    Write a PPTX with the given number of title slides (needs python-pptx).
+    """
+    import pptx
+
+    presentation = pptx.Presentation()
+    for n in range(slides):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[0])
+        slide.shapes.title.text = f"Slide {n + 1}"
+    presentation.save(path)
+
+def build_corpus(folder, args):
+    """
+    Create (or reuse) the synthetic fixtures for the suite in folder.
+
+    Returns {input_format: (path, items, unit)}; items counts what the
+    throughput is measured in. Fixtures whose generator is missing
+    (e.g. python-pptx) are left out and reported.
+    """
+    os.makedirs(folder, exist_ok=True)
+    tag = f"{args.pages}p_{args.image_mp:g}mp_{args.rows}x{args.cols}"
+    specs = {
+        'pdf':  (f"doc_{tag}.pdf", lambda p: make_pdf(p, args.pages), args.pages, 'pages'),
+        'png':  (f"img_{tag}.png", lambda p: make_image(p, args.image_mp), 1, 'images'),
+        'jpg':  (f"img_{tag}.jpg", lambda p: make_image(p, args.image_mp), 1, 'images'),
+        'jpeg': (f"img_{tag}.jpeg", lambda p: make_image(p, args.image_mp), 1, 'images'),
+        'xlsx': (f"book_{tag}.xlsx", lambda p: make_workbook(p, args.rows, args.cols), args.rows, 'rows'),
+        'docx': (f"doc_{tag}.docx", lambda p: make_docx(p, args.pages * 8), 1, 'documents'),
+        'pptx': (f"deck_{tag}.pptx", lambda p: make_pptx(p, args.pages), args.pages, 'slides'),
+    }
+    corpus = {}
+    for fmt, (name, make, items, unit) in specs.items():
+        path = os.path.join(folder, name)
+        if not os.path.exists(path):
+            try:
+                make(path)
+            except ImportError as e:
+                print(f"  no {fmt} fixture: {e}")
+                continue
+        corpus[fmt] = (path, items, unit)
+    return corpus
+
+# --- Suite ---
+
+def _suite_cases(corpus, args):
+    """
+    Yield (name, input_format, items, unit, code builder) for every conversion
+    pair in CONVERSION_MAP plus slicing and image merging. The builder takes a
+    scratch folder and returns the snippet to time.
+    """
+    from convertor import CONVERSION_MAP, IMAGE_FORMATS
+
+    for source, targets in CONVERSION_MAP.items():
+        if source not in corpus:
+            continue
+        path, items, unit = corpus[source]
+        for target in targets:
+            options = {'dpi': args.dpi} if source not in IMAGE_FORMATS and target in IMAGE_FORMATS else {}
+
+            def code(tmp, path=path, target=target, options=options):
+                out_path = os.path.join(tmp, f"out.{target}")
+                return ("from convertor import convert_file\n"
+                        f"convert_file({path!r}, {out_path!r}, {target!r}, **{options!r})")
+            yield f"{source}->{target}", source, items, unit, code
+
+    if 'pdf' in corpus:
+        path, pages, _ = corpus['pdf']
+        for mode, streaming in (("pypdf2", False), ("streaming", True)):
+            def code(tmp, streaming=streaming):
+                return ("from pdfslice import slice_pdf\n"
+                        f"ok, msg = slice_pdf({path!r}, 1, {pages}, {os.path.join(tmp, 'slice.pdf')!r}, "
+                        f"streaming={streaming})\n"
+                        "assert ok, msg")
+            yield f"slice:{mode}", 'pdf', pages, 'pages', code
+
+    if 'jpg' in corpus and 'png' in corpus:
+        images = [corpus['jpg'][0], corpus['png'][0]] * 4
+        def code(tmp):
+            return ("from convertor import images_to_pdf\n"
+                    f"images_to_pdf({images!r}, {os.path.join(tmp, 'merged.pdf')!r})")
+        yield "merge:images->pdf", 'jpg', len(images), 'images', code
+
+def run_suite(args):
+    """
+    Run every case of the suite in fresh interpreters and collect
+    {case: {status, seconds, peak_rss_mb, input_mb, items, unit, items_per_sec, mb_per_sec}}.
+    seconds is the median and peak_rss_mb the maximum over --repeat runs.
+    """
+    corpus = build_corpus(args.corpus, args)
+    only = [token for token in (args.only or "").split(",") if token]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, source, items, unit, code in _suite_cases(corpus, args):
+            if only and not any(token in name for token in only):
+                continue
+            input_mb = os.path.getsize(corpus[source][0]) / 1024 / 1024
+            record = {'status': 'ok', 'input_mb': round(input_mb, 3), 'items': items, 'unit': unit}
+            samples, peak = [], None
+            try:
+                for _ in range(args.repeat):
+                    seconds, rss = run_isolated(code(_fresh_dir(tmp, "case")))
+                    samples.append(seconds)
+                    peak = rss if peak is None else max(peak, rss or 0)
+            except RuntimeError as e:
+                record.update(status='error', error=(str(e).strip().splitlines() or ['?'])[-1])
+                print(f"{name:>22} {'ERROR':>10}  {record['error'][:70]}")
+                results[name] = record
+                continue
+            seconds = sorted(samples)[len(samples) // 2]
+            record.update(seconds=round(seconds, 4), peak_rss_mb=peak and round(peak, 1),
+                          items_per_sec=round(items / seconds, 2), mb_per_sec=round(input_mb / seconds, 2))
+            results[name] = record
+            print(f"{name:>22} {seconds:>10.3f} {_format_rss(peak):>10} {items / seconds:>10.1f} {unit}/s")
+    return results
+
+def compare_results(results, baseline, threshold):
+    """
+    Compare a suite run with a saved one. A case regresses when its time or
+    peak memory grows by more than threshold (0.15 = 15%).
+    Returns the list of (case, metric, old, new) regressions.
+    """
+    regressions = []
+    print(f"{'case':>22} {'old s':>9} {'new s':>9} {'change':>8}")
+    for name, new in results.items():
+        old = baseline.get(name)
+        if not old or old.get('status') != 'ok' or new.get('status') != 'ok':
+            continue
+        change = new['seconds'] / old['seconds'] - 1 if old['seconds'] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append((name, 'seconds', old['seconds'], new['seconds']))
+            flag = "  REGRESSION"
+        if old.get('peak_rss_mb') and new.get('peak_rss_mb') and \
+                new['peak_rss_mb'] > old['peak_rss_mb'] * (1 + threshold):
+            regressions.append((name, 'peak_rss_mb', old['peak_rss_mb'], new['peak_rss_mb']))
+            flag += f"  MEMORY {old['peak_rss_mb']:.0f} -> {new['peak_rss_mb']:.0f} MB"
+        print(f"{name:>22} {old['seconds']:>9.3f} {new['seconds']:>9.3f} {change:>+7.0%}{flag}")
+    return regressions
+
+def bench_suite(args):
+    """
+    Run the suite over a synthetic corpus, optionally save the results as
+    JSON and compare them with a baseline (exit 1 on regressions).
+    """
+    baseline = None
+    if args.compare:
+        # Read before anything is written: --out may name the same file
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print(f"{'case':>22} {'seconds':>10} {'peak RSS':>10} {'throughput':>10}")
+    results = run_suite(args)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'corpus': {'pages': args.pages, 'image_mp': args.image_mp, 'rows': args.rows,
+                       'cols': args.cols, 'dpi': args.dpi, 'repeat': args.repeat},
+        },
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if baseline is not None:
+        if baseline.get('meta', {}).get('corpus') != report['meta']['corpus']:
+            print("warning: baseline was recorded with a different corpus or settings")
+        regressions = compare_results(results, baseline.get('results', {}), args.threshold)
+        if regressions:
+            print(f"FAIL: {len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 1 if any(r['status'] != 'ok' for r in results.values()) and args.strict else 0
+
+# --- Command-Line Entry Point ---
+
+def main(argv=None):
+    """
+    Parse command-line arguments and run the selected benchmark.
+    """
+    parser = argparse.ArgumentParser(description="File Tools performance benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("pdf-workers", help="pdf_to_images throughput for 1..N worker processes")
+    p.add_argument("pdf", help="PDF file to rasterize")
+    p.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--dpi", type=int, default=200)
+    p.add_argument("--format", default="png", choices=["png", "jpg", "jpeg"])
+    p.set_defaults(func=bench_pdf_workers)
+
+    p = sub.add_parser("startup", help="import time of the tools (-X importtime)")
+    p.add_argument("modules", nargs="*", default=["convertor", "pdfslice", "batch"])
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--top", type=int, default=5, help="show the N slowest imports")
+    p.add_argument("--budget-ms", type=float, default=None, help="fail if the median import time is higher")
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("slice", help="slice_pdf memory and time: PdfWriter vs streaming")
+    p.add_argument("pdf", help="PDF file to slice (ideally 1 GB or more)")
+    p.add_argument("start", type=int)
+    p.add_argument("end", type=int)
+    p.set_defaults(func=bench_slice)
+
+    p = sub.add_parser("xlsx", help="excel_to_csv memory and time: pandas vs streaming")
+    p.add_argument("xlsx", help="Workbook to convert")
+    p.add_argument("--batch-size", type=int, default=5000)
+    p.set_defaults(func=bench_xlsx)
+
+    p = sub.add_parser("suite", help="every conversion pair plus slicing on a synthetic corpus")
+    p.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "file-tools-corpus"),
+                   help="folder for the generated fixtures (reused between runs)")
+    p.add_argument("--pages", type=int, default=50, help="pages of the test PDF (and slides of the PPTX)")
+    p.add_argument("--image-mp", type=float, default=12, help="megapixels of the test images")
+    p.add_argument("--rows", type=int, default=50000, help="rows of the test workbook")
+    p.add_argument("--cols", type=int, default=12, help="columns of the test workbook")
+    p.add_argument("--dpi", type=int, default=100, help="render resolution for document to image pairs")
+    p.add_argument("--repeat", type=int, default=3, help="runs per case (median time is reported)")
+    p.add_argument("--only", help="comma-separated substrings of the cases to run, e.g. --only=pdf->,slice")
+    p.add_argument("--out", help="write the results to this JSON file")
+    p.add_argument("--compare", metavar="BASELINE", help="compare with a JSON file from an earlier --out")
+    p.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before a case counts as a regression")
+    p.add_argument("--strict", action="store_true", help="also fail when a case errors (e.g. missing Word)")
+    p.set_defaults(func=bench_suite)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
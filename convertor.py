@@ -6,97 +6,937 @@ Created on Thu May 29 12:14:46 2025
 """
 
 # --- Imports ---
+import io
 import os
-from PIL import Image  # For image processing
-Image.MAX_IMAGE_PIXELS = None  # Disable DecompressionBombWarning for large images
+import re
+import csv
+import time
+import shutil
+import tempfile
+import itertools
+import contextlib
+import contextvars
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from lazyimport import lazy_module  # Heavy backends are imported on first use
+from pdfindex import PAGE_INDEX  # Page counts without a full parse
+from resultcache import ResultCache, default_cache_dir  # On-disk cache of finished conversions
+from registry import ConverterRegistry  # Converter steps and routing between formats
+from instrument import stage, file_size  # Per-stage timing (no-op unless a recording is active)
+import office  # LibreOffice backend for DOCX/PPTX to PDF
 
-import img2pdf  # For converting images to PDF
-from pdf2image import convert_from_path  # For converting PDF to images
-from docx2pdf import convert as docx2pdf_convert  # For DOCX to PDF conversion
-import pandas as pd  # For Excel to CSV conversion
-import ttkbootstrap as tb  # For modern Tkinter GUI
-from ttkbootstrap.constants import *  # Bootstrap constants for styling
+def _configure_pil(module):
+    module.MAX_IMAGE_PIXELS = None  # Disable DecompressionBombWarning for large images
 
-from tkinter import filedialog, messagebox  # For file dialogs and popups
-from pdf2docx import Converter as PDF2DocxConverter  # For PDF to DOCX conversion
+Image = lazy_module('PIL.Image', on_load=_configure_pil)  # For image processing
+img2pdf = lazy_module('img2pdf')  # For converting images to PDF
+pdf2image = lazy_module('pdf2image')  # For converting PDF to images
+PyPDF2 = lazy_module('PyPDF2')  # For streaming merged images into one PDF
+docx2pdf = lazy_module('docx2pdf')  # For DOCX to PDF conversion
+pd = lazy_module('pandas')  # For Excel to CSV conversion (pandas engine)
+openpyxl = lazy_module('openpyxl')  # For streaming Excel to CSV conversion
+pdf2docx = lazy_module('pdf2docx')  # For PDF to DOCX conversion
+tb = lazy_module('ttkbootstrap')  # For modern Tkinter GUI
+filedialog = lazy_module('tkinter.filedialog')  # For file dialogs
+messagebox = lazy_module('tkinter.messagebox')  # For popups
 
 # --- Conversion Functions ---
 
-def convert_image(input_path, output_path, output_format):
+def _prepare_mode(img, pil_format):
+    """
+    Convert an image to a mode the target format can store.
+    JPEG has no alpha or palette, so transparency is flattened onto white.
+    """
+    if pil_format == 'JPEG':
+        if _has_alpha(img):
+            return _flatten_alpha(img)
+        if img.mode not in ('RGB', 'L', 'CMYK'):
+            return img.convert('RGB')
+    elif pil_format == 'PNG' and img.mode == 'CMYK':
+        return img.convert('RGB')
+    return img
+
+def _encoder_options(pil_format, quality=None, optimize=False, progressive=False, dpi=None):
+    """
+    Build the keyword arguments for Image.save() from the encoder settings.
+    Settings that do not apply to the target format are ignored.
+    """
+    options = {}
+    if dpi:
+        options['dpi'] = (dpi, dpi)
+    if optimize:
+        options['optimize'] = True
+    if pil_format == 'JPEG':
+        if quality is not None:
+            options['quality'] = int(quality)
+        if progressive:
+            options['progressive'] = True
+    return options
+
+def _box(max_size):
+    """
+    Normalize a size limit given as an int (longest side) or (width, height) to a box.
+    """
+    if isinstance(max_size, int):
+        return (max_size, max_size)
+    return tuple(max_size)
+
+def _largest(sizes):
+    """
+    Return the largest size limit in a {suffix: max_size} mapping.
+    """
+    return max(sizes.values(), key=lambda size: max(_box(size)))
+
+def _save_variants(img, base_path, output_format, sizes, options):
+    """
+    Save one decoded image at several sizes ({suffix: max_size}) as
+    <base_path>_<suffix>.<ext>. Variants are produced largest first, each
+    shrunk from the previous one, so the source is decoded only once.
+    Returns the paths written, largest first.
+    """
+    pil_format = _pil_format(output_format)
+    img = _prepare_mode(img, pil_format)
+    paths = []
+    for suffix, max_size in sorted(sizes.items(), key=lambda item: -max(_box(item[1]))):
+        img = img.copy()
+        img.thumbnail(_box(max_size))
+        path = f"{base_path}_{suffix}.{output_format}"
+        img.save(path, pil_format, **options)
+        paths.append(path)
+    return paths
+
+def _source_size(source):
+    """
+    Bytes left to read in source (a path or a seekable binary file object).
+    """
+    if isinstance(source, str):
+        return file_size(source)
+    position = source.tell()
+    size = source.seek(0, io.SEEK_END) - position
+    source.seek(position)
+    return size
+
+def _copy_source(source, output):
+    """
+    Copy source to output (each a path or a binary file object) unchanged.
+    """
+    if isinstance(source, str) and isinstance(output, str):
+        if os.path.abspath(source) != os.path.abspath(output):
+            shutil.copyfile(source, output)
+        return
+    with contextlib.ExitStack() as stack:
+        if isinstance(source, str):
+            source = stack.enter_context(open(source, 'rb'))
+        if isinstance(output, str):
+            output = stack.enter_context(open(output, 'wb'))
+        shutil.copyfileobj(source, output)
+
+def transcode_image(source, output, output_format, quality=None, optimize=False, progressive=False,
+                    max_size=None, dpi=None, max_bytes=None):
+    """
+    Stream-based core of convert_image: re-encode one image as output_format.
+
+    source is a path or a seekable binary file object and output a path or a
+    writable binary stream; the other options are those of convert_image.
+    The input format is detected from the data itself, so a JPEG written as
+    JPEG with no changes (or already within max_bytes) is copied as-is
+    whatever its name or declared type.
+    """
+    pil_format = _pil_format(output_format)
+    options = _encoder_options(pil_format, quality, optimize, progressive, dpi)
+    size = _source_size(source)
+    position = None if isinstance(source, str) else source.tell()
+    with Image.open(source) as img:
+        unchanged = not (options or max_size) and (not max_bytes or size <= max_bytes)
+        if unchanged and img.format == 'JPEG' and pil_format == 'JPEG':
+            with stage('copy', bytes_read=size) as counts:
+                if position is not None:
+                    source.seek(position)
+                _copy_source(source, output)
+                counts['written'] = size
+                counts['method'] = 'passthrough'
+            return
+        with stage('decode', bytes_read=size):
+            if max_size:
+                img.draft('RGB', _box(max_size))
+            img.load()
+        if max_size:
+            with stage('resize'):
+                img.thumbnail(_box(max_size))
+        with stage('encode') as counts:
+            if max_bytes:
+                data, used_quality, scale = _encode_capped(img, pil_format, options, max_bytes)
+                counts['scale'] = round(scale, 3)
+                if used_quality:
+                    counts['quality'] = used_quality
+                if isinstance(output, str):
+                    with open(output, 'wb') as f:
+                        f.write(data)
+                else:
+                    output.write(data)
+            else:
+                _prepare_mode(img, pil_format).save(output, pil_format, **options)
+            if isinstance(output, str):
+                counts['written'] = file_size(output)
+
+def convert_image(input_path, output_path, output_format, quality=None, optimize=False, progressive=False,
+                  max_size=None, sizes=None, dpi=None, max_bytes=None):
     """
     Convert an image from one format to another (JPG, PNG, JPEG).
+    Returns the list of files written.
+
+    quality, optimize and progressive are passed to the encoder (quality and
+    progressive apply to JPEG only); dpi is stored in the output's metadata.
+    max_size (longest side, or (width, height)) shrinks the image to fit.
+    sizes={'thumb': 128, 'preview': 1024} writes several sizes from one
+    decode, as <name>_thumb.<ext>, <name>_preview.<ext>, instead of output_path.
+    When shrinking, JPEGs are decoded at a reduced scale with Image.draft,
+    which is much faster than decoding at full size and resizing.
+    max_bytes caps the size of the output file: the JPEG quality is stepped
+    down (see _encode_capped), then the image is shrunk, until it fits.
+    A JPEG written as JPEG with no changes (or already within max_bytes) is
+    copied as-is instead of being decoded and re-encoded, which would lose quality.
+    The image mode is converted when the target format needs it (e.g. RGBA to JPEG).
+    Single outputs are written by transcode_image.
+    """
+    if not sizes:
+        transcode_image(input_path, output_path, output_format, quality, optimize, progressive,
+                        max_size, dpi, max_bytes)
+        return [output_path]
+    options = _encoder_options(_pil_format(output_format), quality, optimize, progressive, dpi)
+    with Image.open(input_path) as img:
+        with stage('decode', bytes_read=file_size(input_path)):
+            img.draft('RGB', _box(_largest(sizes)))
+            img.load()
+        with stage('encode') as counts:
+            paths = _save_variants(img, os.path.splitext(output_path)[0], output_format, sizes, options)
+            counts['written'] = sum(file_size(path) for path in paths)
+    return paths
+
+def _convert_image_task(task):
+    """
+    Worker task for convert_images: convert one image, never raise.
+    Returns (input_path, output paths, error message or None).
+    """
+    input_path, output_path, output_format, settings = task
+    try:
+        return input_path, convert_image(input_path, output_path, output_format, **settings), None
+    except Exception as e:
+        return input_path, [], str(e)
+
+def convert_images(input_paths, output_folder, output_format, workers=None, quality=None, optimize=False,
+                   progressive=False, max_size=None, sizes=None, dpi=None, max_bytes=None, progress_callback=None):
+    """
+    Batch-convert many images with convert_image, spread over a process pool.
+
+    Outputs are written to output_folder as <name>.<output_format>. Encoder
+    settings are the same as for convert_image. If given,
+    progress_callback(done, total) is called as images finish.
+
+    Returns a dict with 'outputs', 'errors' (list of (path, message)),
+    'seconds', 'images_per_sec', 'input_bytes', 'output_bytes' and
+    'compression_ratio' (input bytes per output byte of the converted images),
+    so encoder settings can be compared on size and throughput together.
+    """
+    start = time.perf_counter()
+    os.makedirs(output_folder, exist_ok=True)
+    settings = {'quality': quality, 'optimize': optimize, 'progressive': progressive,
+                'max_size': max_size, 'sizes': sizes, 'dpi': dpi, 'max_bytes': max_bytes}
+    tasks = [
+        (path, os.path.join(output_folder, f"{os.path.splitext(os.path.basename(path))[0]}.{output_format}"),
+         output_format, settings)
+        for path in input_paths
+    ]
+    total = len(tasks)
+    workers = workers or os.cpu_count() or 1
+    outputs, errors = [], []
+    input_bytes = 0
+
+    def collect(results):
+        nonlocal input_bytes
+        for done, (input_path, paths, error) in enumerate(results, 1):
+            if error:
+                errors.append((input_path, error))
+            else:
+                outputs.extend(paths)
+                input_bytes += file_size(input_path)
+            if progress_callback:
+                progress_callback(done, total)
+
+    if workers == 1 or total <= 1:
+        collect(map(_convert_image_task, tasks))
+    else:
+        # Batch tasks per round trip: per-image IPC would dominate for small photos
+        chunksize = max(1, min(64, total // (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            collect(pool.map(_convert_image_task, tasks, chunksize=chunksize))
+
+    seconds = time.perf_counter() - start
+    report = _compression_report(input_bytes, sum(file_size(path) for path in outputs), seconds)
+    report.update({
+        'outputs': outputs,
+        'errors': errors,
+        'images_per_sec': (total - len(errors)) / seconds if seconds > 0 else 0.0,
+    })
+    return report
+
+def _has_alpha(img):
+    """
+    True if a PIL image carries transparency (which img2pdf refuses to embed).
+    """
+    return img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+
+def _flatten_alpha(img, background=(255, 255, 255)):
+    """
+    Composite an image with transparency onto a solid background and return an RGB image.
+    """
+    rgba = img.convert('RGBA')
+    flat = Image.new('RGB', rgba.size, background)
+    flat.paste(rgba, mask=rgba.getchannel('A'))
+    return flat
+
+# --- Compression Policy ---
+
+PNG_MODES = ('keep', 'recompress', 'jpeg')  # How image_to_pdf embeds non-JPEG images
+DEFAULT_JPEG_QUALITY = 85
+MIN_JPEG_QUALITY = 30  # _encode_capped shrinks the image rather than going below this
+MIN_SCALE = 0.25
+
+def _encode_capped(img, pil_format, options, max_bytes):
+    """
+    Encode img so the result fits in max_bytes: for JPEG the quality is
+    stepped down by 10 to MIN_JPEG_QUALITY, then (for any format) the image
+    is shrunk by 20% per step down to MIN_SCALE. If even that is too large,
+    the smallest attempt is returned.
+    Returns (encoded bytes, JPEG quality or None, scale).
+    """
+    img = _prepare_mode(img, pil_format)
+    options = dict(options)
+    quality = options.get('quality', DEFAULT_JPEG_QUALITY) if pil_format == 'JPEG' else None
+    scale = 1.0
+    while True:
+        current = img
+        if scale < 1.0:
+            current = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.LANCZOS)
+        if quality:
+            options['quality'] = quality
+        buffer = io.BytesIO()
+        current.save(buffer, pil_format, **options)
+        data = buffer.getvalue()
+        if len(data) <= max_bytes:
+            return data, quality, scale
+        if quality and quality > MIN_JPEG_QUALITY:
+            quality = max(MIN_JPEG_QUALITY, quality - 10)
+        elif scale * 0.8 >= MIN_SCALE:
+            scale *= 0.8
+        else:
+            return data, quality, scale
+
+def _encode(img, pil_format, **options):
+    buffer = io.BytesIO()
+    _prepare_mode(img, pil_format).save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+def _page_image_data(img, source, png_mode='keep', quality=None, max_page_bytes=None):
     """
-    img = Image.open(input_path)
-    if output_format.lower() == 'jpg':
-        output_format = 'JPEG'
-    img.save(output_path, output_format.upper())
+    Choose the image data for one PDF page under the compression policy.
 
-def image_to_pdf(input_path, output_path):
+    img is the opened image and source what it was opened from (a path or
+    bytes), which img2pdf embeds as-is when possible:
+      - JPEG data is always passed through without re-encoding.
+      - Other images (PNG) follow png_mode: 'keep' embeds them losslessly
+        as they are, 'recompress' re-encodes them losslessly with maximum
+        compression (kept only if smaller), 'jpeg' converts them to JPEG at
+        quality (default DEFAULT_JPEG_QUALITY).
+      - Images with transparency, which img2pdf rejects, are flattened onto white.
+      - With max_page_bytes, image data still larger than that is re-encoded
+        as JPEG with _encode_capped (the page adds about 1 KB of PDF structure).
+    Returns (data for img2pdf, method, JPEG quality or None).
+    """
+    if png_mode not in PNG_MODES:
+        raise ValueError(f"Unknown PNG mode '{png_mode}'; expected one of {', '.join(PNG_MODES)}.")
+    data, method, used_quality = source, 'passthrough', None
+    size = file_size(source) if isinstance(source, str) else len(source)
+    if img.format != 'JPEG':
+        if png_mode == 'jpeg':
+            used_quality = quality or DEFAULT_JPEG_QUALITY
+            data, method = _encode(img, 'JPEG', quality=used_quality), 'jpeg'
+        elif png_mode == 'recompress':
+            flat = _flatten_alpha(img) if _has_alpha(img) else img
+            encoded = _encode(flat, 'PNG', optimize=True)
+            if _has_alpha(img) or len(encoded) < size:
+                data, method = encoded, 'recompress'
+        elif _has_alpha(img):
+            data, method = _encode(_flatten_alpha(img), 'PNG'), 'flatten'
+        size = len(data) if method != 'passthrough' else size
+    if max_page_bytes and size > max_page_bytes:
+        options = {'quality': quality or DEFAULT_JPEG_QUALITY}
+        data, used_quality, _ = _encode_capped(img, 'JPEG', options, max_page_bytes)
+        method = 'capped'
+    return data, method, used_quality
+
+def _compression_report(input_bytes, output_bytes, seconds, methods=None):
+    """
+    Size/time summary shared by the image converters.
+    compression_ratio is input bytes per output byte (2.0 = half the size).
+    """
+    report = {
+        'input_bytes': input_bytes,
+        'output_bytes': output_bytes,
+        'compression_ratio': input_bytes / output_bytes if output_bytes else 0.0,
+        'seconds': seconds,
+    }
+    if methods is not None:
+        report['methods'] = methods
+    return report
+
+def image_pdf_page(source, png_mode='keep', quality=None, max_page_bytes=None):
+    """
+    Return (one-page PDF as bytes, embedding method) for one image, given as
+    a path or as bytes, applying the compression policy of _page_image_data.
+    By default img2pdf embeds JPEG and most PNG data losslessly without re-encoding.
+    """
+    in_memory = not isinstance(source, str)
+    with stage('embed', bytes_read=len(source) if in_memory else file_size(source)) as counts:
+        with Image.open(io.BytesIO(source) if in_memory else source) as img:
+            data, method, used_quality = _page_image_data(img, source, png_mode, quality, max_page_bytes)
+        pdf_bytes = img2pdf.convert(data)
+        counts['method'] = method
+        if used_quality:
+            counts['quality'] = used_quality
+    return pdf_bytes, method
+
+def image_to_pdf(input_path, output_path, png_mode='keep', quality=None, max_page_bytes=None):
     """
     Convert a single image to a PDF file.
+
+    JPEGs are embedded without re-encoding; png_mode, quality and
+    max_page_bytes set the compression policy for other images and for
+    oversized pages (see _page_image_data).
+    Returns a dict with input_bytes, output_bytes, compression_ratio, seconds
+    and methods ({method: pages}).
     """
-    with open(output_path, "wb") as f:
-        f.write(img2pdf.convert(input_path))
+    start = time.perf_counter()
+    pdf_bytes, method = image_pdf_page(input_path, png_mode, quality, max_page_bytes)
+    with stage('write', bytes_written=len(pdf_bytes)):
+        with open(output_path, "wb") as f:
+            f.write(pdf_bytes)
+    return _compression_report(file_size(input_path), len(pdf_bytes), time.perf_counter() - start, {method: 1})
 
-def images_to_pdf(input_paths, output_path):
+def images_to_pdf(input_paths, output_path, workers=4, progress_callback=None, png_mode='keep', quality=None,
+                  max_page_bytes=None):
     """
     Convert multiple images to a single PDF file.
+
+    Pages are streamed to output_path one image at a time (see pdfstream),
+    so only a small window of images is ever held in memory. Decoding and
+    normalization (flattening PNG alpha) run ahead in `workers` threads while
+    the finished pages are appended in their original order.
+    png_mode, quality and max_page_bytes apply to every page as in image_to_pdf.
+    If given, progress_callback(done, total) is called after each page.
+    Returns the same size/time report as image_to_pdf, for the whole document.
     """
-    with open(output_path, "wb") as f:
-        f.write(img2pdf.convert(input_paths))
+    from pdfstream import StreamingPdfWriter
+
+    start = time.perf_counter()
+    total = len(input_paths)
+    remaining = iter(input_paths)
+    methods = {}
+    with open(output_path, "wb") as f, ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        def submit(path):
+            # Run in a copy of the caller's context, so an active recording sees the task's stages
+            return pool.submit(contextvars.copy_context().run, image_pdf_page, path, png_mode, quality,
+                               max_page_bytes)
 
-def pdf_to_images(input_path, output_folder, output_format):
+        pending = deque(submit(path) for path in itertools.islice(remaining, max(1, workers) * 2))
+        try:
+            with StreamingPdfWriter(f) as writer:
+                done = 0
+                while pending:
+                    pdf_bytes, method = pending.popleft().result()
+                    methods[method] = methods.get(method, 0) + 1
+                    next_path = next(remaining, None)
+                    if next_path is not None:
+                        pending.append(submit(next_path))
+                    with stage('write', bytes_written=len(pdf_bytes)):
+                        reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+                        writer.add_pages(reader, reader.pages)
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, total)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+    input_bytes = sum(file_size(path) for path in input_paths)
+    return _compression_report(input_bytes, file_size(output_path), time.perf_counter() - start, methods)
+
+def _pil_format(output_format):
+    """
+    Map a file extension (jpg, jpeg, png) to the format name Pillow expects.
+    """
+    output_format = output_format.lower()
+    if output_format in ('jpg', 'jpeg'):
+        return 'JPEG'
+    return output_format.upper()
+
+def get_pdf_page_count(input_path):
+    """
+    Return the number of pages in a PDF without rendering or parsing it.
+    The count comes from the shared page index (see pdfindex), which reads
+    only the xref data and page tree and is cached per file.
+    """
+    return PAGE_INDEX.page_count(input_path)
+
+def render_size(max_size):
+    """
+    Translate a size limit into pdf2image's `size` argument so poppler renders
+    pages at the target resolution directly: an int (or a square box) scales the
+    longest side, (width, None) / (None, height) fix one side and keep the aspect.
+    Other boxes render with their longest side and are shrunk to fit afterwards.
+    """
+    if max_size is None or isinstance(max_size, int):
+        return max_size
+    width, height = max_size
+    if width is None or height is None:
+        return (width, height)
+    return max(width, height)
+
+def iter_pdf_pages(source, first_page=1, last_page=None, chunk_size=10, dpi=200, size=None):
+    """
+    Render the pages of a PDF (a path, or the document as bytes) lazily,
+    yielding (page_number, image) pairs.
+
+    Pages are rasterized in windows of `chunk_size` pages using poppler's
+    first_page/last_page options, and each image is handed over (and dropped
+    from the window) before the next one is yielded. Peak memory therefore
+    depends on `chunk_size`, not on the length of the document.
+    Use chunk_size=1 to render exactly one page per step.
+    size is passed to pdf2image to render at a given pixel size instead of dpi.
+    """
+    in_memory = not isinstance(source, str)
+    if last_page is None:
+        last_page = len(PyPDF2.PdfReader(io.BytesIO(source)).pages) if in_memory else get_pdf_page_count(source)
+    render = pdf2image.convert_from_bytes if in_memory else pdf2image.convert_from_path
+    chunk_size = max(1, int(chunk_size))
+    for start in range(first_page, last_page + 1, chunk_size):
+        end = min(start + chunk_size - 1, last_page)
+        with stage('render'):
+            images = render(source, dpi=dpi, first_page=start, last_page=end, size=size)
+        images.reverse()  # pop() from the end so each page is released as soon as it is consumed
+        page_number = start
+        while images:
+            yield page_number, images.pop()
+            page_number += 1
+
+def write_page_image(img, output, output_format, max_size=None):
+    """
+    Encode one rendered page (from iter_pdf_pages with render_size(max_size))
+    to output, a path or a writable binary stream.
+    """
+    if max_size and not isinstance(max_size, int) and None not in max_size:
+        img.thumbnail(_box(max_size))  # Non-square box: finish what poppler's scale-to started
+    pil_format = _pil_format(output_format)
+    _prepare_mode(img, pil_format).save(output, pil_format)
+
+def _save_page(img, output_folder, page_number, output_format, max_size=None, sizes=None):
+    """
+    Save one rendered page as page_N.<ext> (or one file per entry of sizes,
+    as page_N_<suffix>.<ext>) and release it. Returns the paths written.
+    """
+    base_path = os.path.join(output_folder, f"page_{page_number}")
+    try:
+        with stage('encode') as counts:
+            if sizes:
+                paths = _save_variants(img, base_path, output_format, sizes, {})
+            else:
+                paths = [f"{base_path}.{output_format}"]
+                write_page_image(img, paths[0], output_format, max_size)
+            counts['written'] = sum(file_size(path) for path in paths)
+        return paths
+    finally:
+        img.close()
+
+def _render_page_range(input_path, first_page, last_page, output_folder, output_format, dpi, max_size=None, sizes=None):
+    """
+    Worker task for parallel rasterization: render and save one page range.
+    Runs in a separate process; returns a list of (page_number, output_paths).
+    """
+    size = render_size(max_size or (_largest(sizes) if sizes else None))
+    # One pdftoppm call per page is slow to start; up to 10 pages per call keeps memory bounded too
+    chunk_size = min(10, last_page - first_page + 1)
+    saved = []
+    for page_number, img in iter_pdf_pages(input_path, first_page, last_page, chunk_size=chunk_size, dpi=dpi, size=size):
+        saved.append((page_number, _save_page(img, output_folder, page_number, output_format, max_size, sizes)))
+    return saved
+
+def pdf_to_images(input_path, output_folder, output_format, chunk_size=10, dpi=200, workers=1,
+                  max_size=None, sizes=None, progress_callback=None):
     """
     Convert each page of a PDF to separate image files.
-    Returns a list of output image paths.
+    Returns a list of output image paths, ordered by page number.
+
+    Pages are rendered and saved in a streaming fashion (see iter_pdf_pages),
+    so memory stays flat no matter how many pages the PDF has.
+    With workers > 1 the page range is split into chunks of `chunk_size` pages
+    that are rendered by a pool of worker processes; each worker writes its
+    pages as soon as they are rendered. Output names (page_N.ext) are the same
+    for every worker count.
+
+    dpi sets the render resolution. max_size (longest side, or (width, height))
+    makes poppler render each page at that pixel size directly instead of
+    rendering at full dpi and downscaling. sizes={'thumb': 200, 'preview': 1200}
+    renders each page once, at the largest size, and writes every size from
+    that one image as page_N_<suffix>.<ext>.
+    If given, progress_callback(done, total) is called as pages are saved.
     """
-    images = convert_from_path(input_path)
+    total = get_pdf_page_count(input_path)
+    if workers and workers > 1 and total > 1:
+        return _pdf_to_images_parallel(input_path, output_folder, output_format, total,
+                                       chunk_size, dpi, workers, max_size, sizes, progress_callback)
+
+    size = render_size(max_size or (_largest(sizes) if sizes else None))
     paths = []
-    for i, img in enumerate(images):
-        out_path = os.path.join(output_folder, f"page_{i+1}.{output_format}")
-        img.save(out_path, output_format.upper())
-        paths.append(out_path)
+    for page_number, img in iter_pdf_pages(input_path, 1, total, chunk_size=chunk_size, dpi=dpi, size=size):
+        paths.extend(_save_page(img, output_folder, page_number, output_format, max_size, sizes))
+        if progress_callback:
+            progress_callback(page_number, total)
     return paths
 
-def docx_to_pdf(input_path, output_path):
+def _pdf_to_images_parallel(input_path, output_folder, output_format, total, chunk_size, dpi, workers,
+                            max_size, sizes, progress_callback):
+    """
+    Process-pool implementation of pdf_to_images for workers > 1.
+    """
+    # Small chunks keep all workers busy until the end; never exceed what a fair split needs
+    chunk_size = max(1, min(int(chunk_size), -(-total // workers)))
+    ranges = [(start, min(start + chunk_size - 1, total)) for start in range(1, total + 1, chunk_size)]
+    results = {}
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = [
+            pool.submit(_render_page_range, input_path, first, last, output_folder, output_format, dpi, max_size, sizes)
+            for first, last in ranges
+        ]
+        try:
+            for future in as_completed(futures):
+                for page_number, out_paths in future.result():
+                    results[page_number] = out_paths
+                if progress_callback:
+                    progress_callback(len(results), total)
+        except BaseException:
+            # Cancelled (or failed): drop the chunks that have not started yet
+            for future in futures:
+                future.cancel()
+            raise
+    return [path for n in sorted(results) for path in results[n]]
+
+def _office_to_pdf(input_path, output_path, backend, msoffice_convert):
+    """
+    Convert an office document to PDF with Microsoft Office (msoffice_convert)
+    or with the LibreOffice pool (see office.py).
+
+    backend is 'msoffice' or 'libreoffice'; by default $FILE_TOOLS_OFFICE_BACKEND,
+    else Microsoft Office on Windows and LibreOffice elsewhere. When Microsoft
+    Office was not asked for explicitly and fails, LibreOffice is tried if installed.
     """
-    Convert a DOCX file to PDF.
-    Shows a clear error if Microsoft Word is not installed.
+    chosen = backend or os.environ.get('FILE_TOOLS_OFFICE_BACKEND') or ('msoffice' if os.name == 'nt' else 'libreoffice')
+    if chosen not in ('msoffice', 'libreoffice'):
+        raise ValueError(f"Unknown office backend: {chosen}")
+    with stage('office', bytes_read=file_size(input_path)):
+        if chosen == 'msoffice':
+            try:
+                msoffice_convert(input_path, output_path)
+                return
+            except Exception:
+                if backend or not office.is_available():
+                    raise
+        office.office_to_pdf(input_path, output_path)
+
+def _word_to_pdf(input_path, output_path):
+    """
+    Convert a DOCX file to PDF with Word through docx2pdf (Windows and macOS).
+    """
+    if os.name != 'nt':
+        docx2pdf.convert(input_path, output_path)
+        return
+    import pythoncom  # pywin32, which docx2pdf uses on Windows
+    pythoncom.CoInitialize()  # docx2pdf does not initialize COM, and GUI jobs run on worker threads
+    try:
+        docx2pdf.convert(input_path, output_path)
+    finally:
+        pythoncom.CoUninitialize()
+
+def docx_to_pdf(input_path, output_path, backend=None):
+    """
+    Convert a DOCX file to PDF with Microsoft Word or LibreOffice (see _office_to_pdf).
+    Shows a clear error if neither is installed.
     """
     try:
-        docx2pdf_convert(input_path, output_path)
+        _office_to_pdf(input_path, output_path, backend, _word_to_pdf)
     except Exception as e:
         raise Exception(
-            "DOCX to PDF conversion failed. This feature requires Microsoft Word to be installed on your system.\n\n"
+            "DOCX to PDF conversion failed. This feature requires Microsoft Word or LibreOffice to be installed on your system.\n\n"
             f"Original error: {e}"
         )
 
-def excel_to_csv(input_path, output_path):
+def _safe_filename(name):
+    """
+    Replace characters that are not allowed (or awkward) in file names.
+    """
+    return re.sub(r'[^\w\-. ]', '_', name).strip() or 'sheet'
+
+def _sheet_csv_path(output_path, title):
+    """
+    Output path of one sheet when every sheet is exported: <name>_<sheet>.csv.
+    """
+    base, ext = os.path.splitext(output_path)
+    return f"{base}_{_safe_filename(title)}{ext or '.csv'}"
+
+def _write_sheet_csv(worksheet, output_path, batch_size, progress_callback=None):
+    """
+    Stream the rows of a read-only worksheet into a CSV file, batch_size rows at a time.
+    Returns the number of rows written.
+    """
+    expected = worksheet.max_row or 0  # From the sheet's dimension record; may be missing
+    width = worksheet.max_column or 0
+    written = 0
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        batch = []
+        for row in worksheet.iter_rows(values_only=True):
+            values = ['' if value is None else value for value in row]
+            width = max(width, len(values))
+            values.extend([''] * (width - len(values)))  # Rows with empty trailing cells come back short
+            batch.append(values)
+            if len(batch) >= batch_size:
+                writer.writerows(batch)
+                written += len(batch)
+                batch.clear()
+                if progress_callback:
+                    progress_callback(written, max(expected, written))
+        writer.writerows(batch)
+        written += len(batch)
+    if progress_callback:
+        progress_callback(written, written)
+    return written
+
+def excel_to_csv(input_path, output_path, sheet=None, all_sheets=False, batch_size=5000, engine='streaming', progress_callback=None):
     """
     Convert an Excel (XLSX) file to CSV.
+    Returns the list of CSV files written.
+
+    By default the first sheet is converted (or the sheet named `sheet`).
+    With all_sheets=True every sheet is exported in the same pass over the
+    workbook, to <name>_<sheet>.csv next to output_path.
+
+    The default 'streaming' engine reads the workbook in openpyxl's read-only
+    mode and writes rows in batches of batch_size, so memory is bounded by the
+    batch size instead of the sheet size. engine='pandas' loads each sheet into
+    a DataFrame first (the original behaviour).
+
+    The two engines do not write identical files. The streaming engine writes
+    cell values as stored: empty header cells stay empty, whole numbers stay
+    integers, dates keep their time and lines end in CRLF (as csv.writer does).
+    The pandas engine reproduces the output of earlier versions: empty headers
+    become "Unnamed: <n>", integer columns with blanks become floats (1.0),
+    midnight dates lose their time and lines end in os.linesep.
     """
-    df = pd.read_excel(input_path)
-    df.to_csv(output_path, index=False)
+    if engine == 'pandas':
+        with stage('read', bytes_read=file_size(input_path)):
+            frames = pd.read_excel(input_path, sheet_name=None if all_sheets else (sheet if sheet is not None else 0))
+        if all_sheets:
+            targets = [(df, _sheet_csv_path(output_path, title)) for title, df in frames.items()]
+        else:
+            targets = [(frames, output_path)]
+        for df, out_path in targets:
+            with stage('write') as counts:
+                df.to_csv(out_path, index=False)
+                counts['written'] = file_size(out_path)
+        return [out_path for _, out_path in targets]
 
-def pptx_to_pdf(input_path, output_path):
+    with stage('open', bytes_read=file_size(input_path)):
+        workbook = openpyxl.load_workbook(input_path, read_only=True, data_only=True)
+    try:
+        if all_sheets:
+            targets = [(ws, _sheet_csv_path(output_path, ws.title)) for ws in workbook.worksheets]
+        else:
+            worksheet = workbook[sheet] if sheet is not None else workbook.worksheets[0]
+            targets = [(worksheet, output_path)]
+        for worksheet, out_path in targets:
+            with stage('sheet') as counts:  # Reading and writing are interleaved row batch by row batch
+                _write_sheet_csv(worksheet, out_path, batch_size, progress_callback)
+                counts['written'] = file_size(out_path)
+    finally:
+        workbook.close()
+    return [out_path for _, out_path in targets]
+
+def _powerpoint_to_pdf(input_path, output_path):
     """
-    Convert a PowerPoint (PPTX) file to PDF.
-    Only works on Windows with Microsoft Office installed.
+    Convert a PPTX file to PDF with PowerPoint over COM (Windows only).
     """
+    import comtypes
     import comtypes.client
-    powerpoint = comtypes.client.CreateObject("Powerpoint.Application")
-    ppt = powerpoint.Presentations.Open(input_path)
-    ppt.SaveAs(output_path, 32)  # 32 = PDF format
-    ppt.Close()
-    powerpoint.Quit()
+    comtypes.CoInitialize()  # COM must be initialized on every thread that uses it (GUI jobs run on workers)
+    try:
+        powerpoint = comtypes.client.CreateObject("Powerpoint.Application")
+        ppt = powerpoint.Presentations.Open(os.path.abspath(input_path))
+        ppt.SaveAs(os.path.abspath(output_path), 32)  # 32 = PDF format
+        ppt.Close()
+        powerpoint.Quit()
+    finally:
+        comtypes.CoUninitialize()
 
-def pdf_to_docx(input_path, output_path):
+def pptx_to_pdf(input_path, output_path, backend=None):
     """
-    Convert a PDF file to DOCX.
+    Convert a PowerPoint (PPTX) file to PDF with Microsoft PowerPoint or LibreOffice.
+
+    backend is 'msoffice' or 'libreoffice'. By default it comes from
+    $FILE_TOOLS_OFFICE_BACKEND, else PowerPoint is used on Windows (falling
+    back to LibreOffice if PowerPoint fails) and LibreOffice on other systems.
+    See _office_to_pdf.
     """
-    cv = PDF2DocxConverter(input_path)
-    cv.convert(output_path, start=0, end=None)
-    cv.close()
+    _office_to_pdf(input_path, output_path, backend, _powerpoint_to_pdf)
+
+def _docx_page_numbers(total, start_page=1, end_page=None, pages=None):
+    """
+    Resolve the pages to convert (1-based) and check them against the page count.
+    Raises ValueError for pages outside the document.
+    """
+    if pages:
+        numbers = sorted(set(int(n) for n in pages))
+    else:
+        end_page = end_page or total
+        if start_page < 1 or start_page > end_page:
+            raise ValueError(f"Invalid page range {start_page}-{end_page}.")
+        numbers = list(range(start_page, end_page + 1))
+    if numbers[0] < 1 or numbers[-1] > total:
+        raise ValueError(f"Pages must be between 1 and {total} (the PDF has {total} pages).")
+    return numbers
+
+def _parse_docx_pages(cv, numbers, settings, progress_callback=None, total=None):
+    """
+    Parse the given pages (1-based) of an open pdf2docx Converter, one at a time.
+    Returns (analyze_seconds, {page_number: seconds}): the time spent extracting
+    the pages and analyzing the document (headers, margins, sections), then the
+    layout parsing time of each page. Page errors follow pdf2docx's
+    ignore_page_error setting.
+    """
+    start = time.perf_counter()
+    cv.load_pages(pages=[n - 1 for n in numbers])
+    cv.parse_document(**settings)
+    analyze_seconds = time.perf_counter() - start
+    timings = {}
+    for done, page in enumerate((page for page in cv.pages if not page.skip_parsing), 1):
+        start = time.perf_counter()
+        try:
+            page.parse(**settings)
+        except Exception as e:
+            if not settings['ignore_page_error']:
+                raise Exception(f"Error when parsing page {page.id + 1}: {e}")
+        timings[page.id + 1] = time.perf_counter() - start
+        if progress_callback:
+            progress_callback(done, total or len(numbers))
+    return analyze_seconds, timings
+
+def _docx_chunk_task(input_path, numbers, json_path, settings):
+    """
+    Worker task for parallel PDF to DOCX: parse one chunk of pages and save the
+    parsed layout to json_path. Runs in a separate process; returns the timings.
+    """
+    cv = pdf2docx.Converter(input_path)
+    try:
+        timings = _parse_docx_pages(cv, numbers, settings)
+        cv.serialize(json_path)
+    finally:
+        cv.close()
+    return timings
+
+def pdf_to_docx(input_path, output_path, start_page=1, end_page=None, pages=None, workers=1,
+                progress_callback=None, **settings):
+    """
+    Convert a PDF file (or some of its pages) to DOCX.
+
+    start_page/end_page (1-based, inclusive) select a page range; pages=[1, 5, 9]
+    selects individual pages instead. With workers > 1 the pages are split into
+    chunks that are parsed in parallel worker processes (the slow part of the
+    conversion); the parsed layouts are then combined into one DOCX.
+    Extra settings are passed to pdf2docx (see Converter.default_settings).
+    If given, progress_callback(done, total) is called as pages are parsed.
+    input_path may also be the PDF as bytes and output_path a writable binary
+    stream (see inmemory); such conversions always run in this process.
+
+    Returns a dict with 'pages', 'seconds' (wall time), 'analyze_seconds' (page
+    extraction and document analysis, summed over workers), 'page_seconds'
+    ({page_number: layout parsing seconds}, which shows the slow pages) and
+    'write_seconds' (building and saving the DOCX).
+    """
+    started = time.perf_counter()
+    in_memory = not isinstance(input_path, str)
+    if in_memory:
+        cv = pdf2docx.Converter(stream=input_path)
+        workers = 1
+    else:
+        numbers = _docx_page_numbers(get_pdf_page_count(input_path), start_page, end_page, pages)
+        cv = pdf2docx.Converter(input_path)
+    try:
+        if in_memory:
+            numbers = _docx_page_numbers(len(cv.fitz_doc), start_page, end_page, pages)
+        options = cv.default_settings
+        options.update(settings)
+        workers = min(workers or 1, len(numbers))
+        with stage('parse', bytes_read=len(input_path) if in_memory else file_size(input_path)):
+            if workers > 1:
+                analyze_seconds, timings = _pdf_to_docx_parallel(cv, input_path, numbers, workers, options,
+                                                                 progress_callback)
+            else:
+                analyze_seconds, timings = _parse_docx_pages(cv, numbers, options, progress_callback)
+        parsed = time.perf_counter()
+        with stage('write') as counts:
+            cv.make_docx(output_path, **options)
+            if isinstance(output_path, str):
+                counts['written'] = file_size(output_path)
+    finally:
+        cv.close()
+    finished = time.perf_counter()
+    return {
+        'pages': len(numbers),
+        'seconds': finished - started,
+        'analyze_seconds': analyze_seconds,
+        'page_seconds': timings,
+        'write_seconds': finished - parsed,
+    }
+
+def _pdf_to_docx_parallel(cv, input_path, numbers, workers, settings, progress_callback):
+    """
+    Process-pool implementation of pdf_to_docx for workers > 1. Each worker
+    writes its parsed pages to a JSON file in a private temporary folder, which
+    are loaded back into cv. Returns the combined (analyze_seconds, page timings).
+    """
+    size = -(-len(numbers) // workers)
+    chunks = [numbers[i:i + size] for i in range(0, len(numbers), size)]
+    analyze_seconds, timings = 0.0, {}
+    with tempfile.TemporaryDirectory(prefix='pdf2docx-') as tmp_dir:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            futures = {
+                pool.submit(_docx_chunk_task, input_path, chunk, os.path.join(tmp_dir, f"chunk_{i}.json"), settings): i
+                for i, chunk in enumerate(chunks)
+            }
+            try:
+                for future in as_completed(futures):
+                    chunk_analyze, chunk_timings = future.result()
+                    analyze_seconds += chunk_analyze
+                    timings.update(chunk_timings)
+                    if progress_callback:
+                        progress_callback(len(timings), len(numbers))
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        cv.load_pages(pages=[n - 1 for n in numbers])
+        for i in range(len(chunks)):
+            cv.deserialize(os.path.join(tmp_dir, f"chunk_{i}.json"))
+    return analyze_seconds, dict(sorted(timings.items()))
 
 def pdf_to_xlsx(input_path, output_path):
     """
@@ -104,20 +944,145 @@ def pdf_to_xlsx(input_path, output_path):
     """
     raise Exception("PDF to Excel conversion is not available because it requires Java and tabula-py. Please use another tool for this conversion.")
 
+# --- Converter Registry ---
+
+IMAGE_FORMATS = ['jpg', 'jpeg', 'png']
+
+# Registry steps share one signature: (input_path, output_path, output_format, progress_callback, options)
+
+def _image_step(input_path, output_path, output_format, progress_callback, options):
+    outputs = convert_image(input_path, output_path, output_format, **options)
+    if progress_callback:
+        progress_callback(1, 1)
+    return outputs
+
+def _copy_jpeg_step(input_path, output_path, output_format, progress_callback, options):
+    """
+    JPG and JPEG are the same format: copy the file instead of decoding and
+    re-encoding it (which would lose quality), unless options ask for changes.
+    """
+    if options:
+        return _image_step(input_path, output_path, output_format, progress_callback, options)
+    shutil.copyfile(input_path, output_path)
+    if progress_callback:
+        progress_callback(1, 1)
+    return [output_path]
+
+def _image_pdf_step(input_path, output_path, output_format, progress_callback, options):
+    image_to_pdf(input_path, output_path, **options)  # JPEG data is embedded as-is, without decoding
+    if progress_callback:
+        progress_callback(1, 1)
+    return [output_path]
+
+def _pdf_images_step(input_path, output_path, output_format, progress_callback, options):
+    return pdf_to_images(input_path, os.path.dirname(output_path), output_format,
+                         progress_callback=progress_callback, **options)
+
+def _pdf_docx_step(input_path, output_path, output_format, progress_callback, options):
+    pdf_to_docx(input_path, output_path, progress_callback=progress_callback, **options)
+    return [output_path]
+
+def _office_pdf_step(input_path, output_path, output_format, progress_callback, options):
+    if input_path.lower().endswith('.pptx'):
+        pptx_to_pdf(input_path, output_path, **options)
+    else:
+        docx_to_pdf(input_path, output_path, **options)
+    if progress_callback:
+        progress_callback(1, 1)
+    return [output_path]
+
+def _excel_csv_step(input_path, output_path, output_format, progress_callback, options):
+    return excel_to_csv(input_path, output_path, progress_callback=progress_callback, **options)
+
+REGISTRY = ConverterRegistry()
+
+# (source, targets, step, relative cost, may write several files); direct targets
+# are offered in this order, chained ones (e.g. PNG → PDF → DOCX) after them
+_BUILTIN_CONVERTERS = [
+    ('jpg',  ['png'],                _image_step,       1.0,  False),
+    ('jpg',  ['jpeg'],               _copy_jpeg_step,   0.1,  False),
+    ('jpg',  ['pdf'],                _image_pdf_step,   1.0,  False),
+    ('jpeg', ['jpg'],                _copy_jpeg_step,   0.1,  False),
+    ('jpeg', ['png'],                _image_step,       1.0,  False),
+    ('jpeg', ['pdf'],                _image_pdf_step,   1.0,  False),
+    ('png',  ['jpg', 'jpeg'],        _image_step,       1.0,  False),
+    ('png',  ['pdf'],                _image_pdf_step,   1.5,  False),  # PNG data is re-packed for the PDF
+    ('pdf',  ['jpg', 'jpeg', 'png'], _pdf_images_step,  3.0,  True),   # Rasterizes every page
+    ('pdf',  ['docx'],               _pdf_docx_step,    10.0, False),  # Layout analysis is slow
+    ('docx', ['pdf'],                _office_pdf_step,  8.0,  False),  # Drives Microsoft Office or LibreOffice
+    ('xlsx', ['csv'],                _excel_csv_step,   2.0,  True),
+    ('pptx', ['pdf'],                _office_pdf_step,  8.0,  False),
+]
+for _source, _targets, _step, _cost, _multi_output in _BUILTIN_CONVERTERS:
+    REGISTRY.register(_source, _targets, cost=_cost, multi_output=_multi_output)(_step)
+
 # --- Supported Formats and Conversion Map ---
 
 SUPPORTED_FORMATS = ['pdf', 'jpg', 'jpeg', 'png', 'docx', 'xlsx', 'pptx']  # Do NOT add 'doc' here
 
-# Map input formats to possible output formats for the dropdown
-CONVERSION_MAP = {
-    'jpg':    ['png', 'jpeg', 'pdf'],
-    'jpeg':   ['jpg', 'png', 'pdf'],
-    'png':    ['jpg', 'jpeg', 'pdf'],
-    'pdf':    ['jpg', 'jpeg', 'png', 'docx'],  # Remove 'xlsx' from PDF outputs
-    'docx':   ['pdf'],
-    'xlsx':   ['csv'],
-    'pptx':   ['pdf'],
-}
+# Map input formats to possible output formats for the dropdown, derived from the registry
+CONVERSION_MAP = REGISTRY.conversion_map(SUPPORTED_FORMATS)
+
+# --- Headless Conversion Dispatch ---
+
+class UnsupportedFormatError(Exception):
+    """
+    Raised when an input file type or format pair cannot be converted.
+    """
+
+def route_for(input_format, output_format):
+    """
+    Return the chain of converters for a format pair (see REGISTRY.route).
+    Raises UnsupportedFormatError for unsupported input types and for pairs
+    without a route, including same-format pairs such as PNG to PNG.
+    """
+    if input_format == 'doc':
+        raise UnsupportedFormatError("DOC files are not supported. Please convert your file to DOCX first.")
+    if input_format not in SUPPORTED_FORMATS:
+        raise UnsupportedFormatError(f"The file type '.{input_format}' is not supported.")
+    route = REGISTRY.route(input_format, output_format)
+    if route is None:
+        raise UnsupportedFormatError(
+            f"Conversion from {input_format.upper()} to {output_format.upper()} is not supported."
+        )
+    return route
+
+def convert_file(input_path, output_path, output_format, progress_callback=None, cache=None, **options):
+    """
+    Convert a single file, choosing the cheapest chain of converters in REGISTRY
+    for the input extension and the requested output format (e.g. PNG → PDF → DOCX
+    for PNG to DOCX). Used by the GUI and the batch engine.
+
+    For document to image conversions the pages are written to the folder that
+    contains output_path (as page_1.png, page_2.png, ...).
+    Extra keyword options are passed to the last converter of the chain (e.g.
+    quality=85 for images).
+    With a resultcache.ResultCache as cache, an input that was converted before
+    with the same pair, options and converter chain is restored from the cache instead.
+    Returns the list of files that were written.
+    Raises UnsupportedFormatError for unknown types or format pairs.
+    """
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+
+    input_format = os.path.splitext(input_path)[1][1:].lower()
+    output_format = output_format.lower()
+    route = route_for(input_format, output_format)
+
+    if cache is not None:
+        with stage('cache'):
+            converter = '>'.join(step.name for step in route)
+            key = cache.key_for(input_path, input_format, output_format, options, converter)
+            restored = cache.fetch(key, output_path)
+        if restored is not None:
+            if progress_callback:
+                progress_callback(1, 1)
+            return restored
+
+    outputs = REGISTRY.convert(input_path, output_path, input_format, output_format, progress_callback, options)
+    if cache is not None:
+        cache.store(key, outputs, output_path)
+    return outputs
 
 # --- GUI Class ---
 
@@ -192,12 +1157,39 @@ class ConverterGUI:
             "- Images → PDF\n"
             "- PDF → Images\n"
             "- PDF → DOCX\n"
-            "- DOCX → PDF\n"
+            "- DOCX, PPTX → PDF (Microsoft Office on Windows, LibreOffice elsewhere)\n"
             "- XLSX → CSV\n"
-            "- PPTX → PDF (Windows only)"
+            "- Other pairs through the formats above (e.g. PNG → DOCX)"
         )
         tb.Label(root, text=info_text, justify='left', foreground='gray').pack(pady=5)
 
+        # --- Background job queue panel ---
+        from jobs import JobPanel  # Imported here: it needs ttkbootstrap at import time
+        self.jobs = JobPanel(root, max_workers=2)
+        self.jobs.pack(pady=5, padx=5, fill='both', expand=True)
+
+        # --- Conversion result cache (opt-in, like batch.py --cache) and its statistics ---
+        # On by default only when $FILE_TOOLS_CACHE names a cache folder; $FILE_TOOLS_CACHE_MB sets its size limit
+        self.cache = None
+        self.cache_enabled = tb.BooleanVar(value=bool(os.environ.get('FILE_TOOLS_CACHE')))
+        try:
+            self.cache_max_bytes = int(os.environ.get('FILE_TOOLS_CACHE_MB', 500)) * 1024 * 1024
+        except ValueError:
+            self.cache_max_bytes = 500 * 1024 * 1024
+        cache_frame = tb.Frame(root)
+        cache_frame.pack(pady=(0, 5))
+        tb.Checkbutton(
+            cache_frame,
+            text="Reuse earlier results",
+            variable=self.cache_enabled,
+            command=self.toggle_cache
+        ).pack(side='left', padx=5)
+        self.cache_status = tb.StringVar()
+        tb.Label(cache_frame, textvariable=self.cache_status, foreground='gray').pack(side='left', padx=5)
+        tb.Button(cache_frame, text="Clear Cache", command=self.clear_cache, bootstyle="secondary-link").pack(side='left')
+        self.toggle_cache()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
     def browse_file(self):
         """
         Open file dialog for user to select input file(s).
@@ -293,8 +1285,8 @@ class ConverterGUI:
 
     def run_conversion(self):
         """
-        Run the appropriate conversion based on user selections.
-        Handles errors and shows success/info dialogs.
+        Validate user selections and queue the conversion as a background job.
+        Success and error dialogs are shown when the job finishes.
         """
         input_path = self.file_path.get()
         output_path = self.output_path.get()
@@ -308,11 +1300,10 @@ class ConverterGUI:
         # Handle multiple images for image-to-PDF
         if ';' in input_path and output_format == 'pdf':
             input_paths = input_path.split(';')
-            try:
-                images_to_pdf(input_paths, output_path)
-                messagebox.showinfo("Success", f"Images merged and saved as PDF:\n{output_path}")
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+            self.jobs.queue.submit(
+                f"Merge {len(input_paths)} images → PDF", images_to_pdf, input_paths, output_path,
+                on_done=lambda job: self.on_job_done(job, f"Images merged and saved as PDF:\n{output_path}")
+            )
             return
 
         if not os.path.exists(input_path):
@@ -320,47 +1311,77 @@ class ConverterGUI:
             return
 
         input_format = os.path.splitext(input_path)[1][1:].lower()
-        if input_format == 'doc':
-            messagebox.showerror("Unsupported Format", "DOC files are not supported. Please convert your file to DOCX first.")
+        if input_format == 'pdf':
+            # Reject unreadable or empty PDFs right away instead of in the background job
+            try:
+                PAGE_INDEX.page_count(input_path)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Error", f"Could not read the PDF:\n{e}")
+                return
+        if input_format not in IMAGE_FORMATS and output_format in IMAGE_FORMATS:
+            success_msg = f"{input_format.upper()} converted to images in folder:\n{os.path.dirname(output_path)}"
+        else:
+            success_msg = f"File converted and saved to:\n{output_path}"
+
+        # --- Run in the background so the window stays responsive ---
+        self.jobs.queue.submit(
+            f"{os.path.basename(input_path)} → {output_format.upper()}",
+            convert_file, input_path, output_path, output_format,
+            cache=self.cache if self.cache_enabled.get() else None,
+            on_done=lambda job: self.on_job_done(job, success_msg)
+        )
+
+    def on_job_done(self, job, success_msg):
+        """
+        Called on the UI thread when a background conversion finishes.
+        Shows the success or error dialog for the job.
+        """
+        self.update_cache_status()
+        if job.status == 'done':
+            messagebox.showinfo("Success", success_msg)
+        elif job.status == 'failed':
+            title = "Unsupported Format" if isinstance(job.error, UnsupportedFormatError) else "Error"
+            messagebox.showerror(title, str(job.error))
+
+    def toggle_cache(self):
+        """
+        Open the result cache when it is switched on (it is scanned once, on first use).
+        """
+        if self.cache_enabled.get() and self.cache is None:
+            self.cache = ResultCache(max_bytes=self.cache_max_bytes)
+        self.update_cache_status()
+
+    def clear_cache(self):
+        """
+        Delete every cached result, after asking the user.
+        """
+        if self.cache is None and not os.path.isdir(default_cache_dir()):
             return
-        if input_format not in SUPPORTED_FORMATS:
-            messagebox.showerror("Unsupported Format", f"The file type '.{input_format}' is not supported.")
+        if not messagebox.askyesno("Clear Cache", "Delete all cached conversion results?"):
             return
+        (self.cache or ResultCache(max_bytes=self.cache_max_bytes)).clear()
+        self.update_cache_status()
 
-        try:
-            # --- Image to image conversion ---
-            if input_format in ['jpg', 'jpeg', 'png'] and output_format in ['jpg', 'jpeg', 'png']:
-                convert_image(input_path, output_path, output_format)
-            # --- Image to PDF ---
-            elif input_format in ['jpg', 'jpeg', 'png'] and output_format == 'pdf':
-                image_to_pdf(input_path, output_path)
-            # --- PDF to images ---
-            elif input_format == 'pdf' and output_format in ['jpg', 'jpeg', 'png']:
-                pdf_to_images(input_path, os.path.dirname(output_path), output_format)
-                messagebox.showinfo("Success", f"PDF converted to images in folder:\n{os.path.dirname(output_path)}")
-                return
-            # --- PDF to DOCX ---
-            elif input_format == 'pdf' and output_format == 'docx':
-                pdf_to_docx(input_path, output_path)
-            # --- PDF to XLSX ---
-            elif input_format == 'pdf' and output_format == 'xlsx':
-                pdf_to_xlsx(input_path, output_path)
-            # --- DOCX to PDF ---
-            elif input_format == 'docx' and output_format == 'pdf':
-                docx_to_pdf(input_path, output_path)
-            # --- XLSX to CSV ---
-            elif input_format == 'xlsx' and output_format == 'csv':
-                excel_to_csv(input_path, output_path)
-            # --- PPTX to PDF ---
-            elif input_format == 'pptx' and output_format == 'pdf':
-                pptx_to_pdf(input_path, output_path)
-            else:
-                messagebox.showinfo("Info", "Conversion not supported for this format pair.")
-                return
+    def update_cache_status(self):
+        """
+        Show the result cache's hit/miss counters, the data it restored and its size.
+        """
+        if not self.cache_enabled.get():
+            self.cache_status.set("Cache: off")
+            return
+        stats = self.cache.stats()
+        saved_mb = stats['bytes_saved'] / 1024 / 1024
+        size_mb = stats['bytes'] / 1024 / 1024
+        limit_mb = self.cache_max_bytes / 1024 / 1024
+        self.cache_status.set(f"Cache: {stats['hits']} hits, {stats['misses']} misses, {saved_mb:.1f} MB reused, "
+                              f"{size_mb:.0f} of {limit_mb:.0f} MB used")
 
-            messagebox.showinfo("Success", f"File converted and saved to:\n{output_path}")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+    def on_close(self):
+        """
+        Stop background jobs and close the window.
+        """
+        self.jobs.queue.shutdown()
+        self.root.destroy()
 
     def open_converted_file(self):
         """
@@ -412,4 +1433,5 @@ def main():
     app.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    multiprocessing.freeze_support()  # Required for worker processes in the packaged .exe
+    main()
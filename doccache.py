@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Parsed PDF Document Cache
+
+Keeps recently used PDFs parsed in memory so that several slices or
+conversions of the same document in a row do not reopen and reparse it.
+Entries are keyed by (absolute path, modification time, size), or by a
+content hash, so an edited file is never served stale. The cache is an LRU
+with a memory budget; hit/miss/eviction counters are available from stats().
+
+Documents are parsed outside the cache's lock (one parse per document at a
+time), and files larger than the whole budget are parsed straight from the
+file instead of being read into memory.
+
+A module-level DOCUMENT_CACHE is shared by pdfslice and convertor.
+"""
+
+# --- Imports ---
+import io
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from lazyimport import lazy_module  # Heavy backends are imported on first use
+
+PyPDF2 = lazy_module('PyPDF2')  # For parsing PDFs
+
+# --- Cache Entry ---
+
+class _Entry:
+    """
+    One parsed document: the reader over its stream (in-memory bytes, or the
+    open file for documents too large to cache), its file size and metadata.
+    The lock serializes use of the reader, whose stream position is shared.
+    """
+    def __init__(self, stream, size):
+        self.stream = stream
+        self.reader = PyPDF2.PdfReader(stream)
+        self.page_count = len(self.reader.pages)
+        self.size = size
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.stream.close()
+
+# --- Document Cache ---
+
+class DocumentCache:
+    """
+    LRU cache of parsed PyPDF2 readers and page-count metadata.
+
+    Parameters:
+        max_bytes (int): Memory budget for cached documents. It counts the raw
+            file bytes each entry holds; the parsed objects PyPDF2 builds on
+            demand come on top. Least recently used entries are evicted to stay
+            below it; files larger than the whole budget are never cached.
+        max_entries (int): Upper bound on the number of cached documents.
+        use_content_hash (bool): Key entries by a SHA-256 of the file instead of
+            (path, mtime, size). Survives copies and touch, but costs a full read
+            of the file on every lookup.
+    """
+    def __init__(self, max_bytes=256 * 1024 * 1024, max_entries=32, use_content_hash=False):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.use_content_hash = use_content_hash
+        self._entries = OrderedDict()
+        self._page_counts = OrderedDict()  # Metadata outlives evicted readers
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._loading = {}  # key -> lock held while that document is being parsed
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key_for(self, path):
+        """
+        Return the cache key for a file as it is on disk right now.
+        """
+        if self.use_content_hash:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            return digest.hexdigest()
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+    def _lookup(self, key):
+        """
+        Return the cached entry for key (counting a hit) or None. Caller holds self._lock.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return entry
+
+    def _load(self, path, key):
+        """
+        Return (entry, cached) for key, parsing the file on a miss.
+
+        The parse runs without self._lock, under a per-key lock, so other
+        documents stay available meanwhile and concurrent misses on the same
+        document parse it once. Entries that were not cached (cached is False)
+        must be closed by the caller.
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry, True
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            with self._lock:
+                entry = self._lookup(key)  # Loaded by another thread while we waited
+                if entry is not None:
+                    return entry, True
+                self.misses += 1
+            try:
+                entry = self._parse(path)
+                with self._lock:
+                    self._remember_page_count(key, entry.page_count)
+                    cached = entry.size <= self.max_bytes
+                    if cached:
+                        self._entries[key] = entry
+                        self._bytes += entry.size
+                        self._evict()
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return entry, cached
+
+    def _parse(self, path):
+        """
+        Parse a PDF from memory, or from the open file when it exceeds the budget.
+        """
+        f = open(path, 'rb')
+        try:
+            size = os.fstat(f.fileno()).st_size
+            if size > self.max_bytes:
+                return _Entry(f, size)
+            with f:
+                return _Entry(io.BytesIO(f.read()), size)
+        except BaseException:
+            f.close()
+            raise
+
+    def _evict(self):
+        while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+
+    def _remember_page_count(self, key, count):
+        self._page_counts[key] = count
+        self._page_counts.move_to_end(key)
+        while len(self._page_counts) > 1024:
+            self._page_counts.popitem(last=False)
+
+    @contextmanager
+    def open_reader(self, path):
+        """
+        Context manager yielding a parsed PdfReader for path.
+        The reader is locked for the duration of the block, so concurrent
+        jobs on the same document take turns instead of corrupting its stream.
+        """
+        key = self.key_for(path)
+        entry, cached = self._load(path, key)
+        try:
+            with entry.lock:
+                yield entry.reader
+        finally:
+            if not cached:
+                entry.close()
+
+    def page_count(self, path):
+        """
+        Return the number of pages in a PDF, from cache when possible.
+        """
+        key = self.key_for(path)
+        with self._lock:
+            count = self._page_counts.get(key)
+            if count is not None:
+                self.hits += 1
+                self._page_counts.move_to_end(key)
+                return count
+        entry, cached = self._load(path, key)
+        if not cached:
+            entry.close()
+        return entry.page_count
+
+    def invalidate(self, path=None):
+        """
+        Drop one document (or everything when path is None).
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._page_counts.clear()
+                self._bytes = 0
+                return
+            absolute = os.path.abspath(path)
+            for key in [k for k in self._entries if isinstance(k, tuple) and k[0] == absolute]:
+                self._bytes -= self._entries.pop(key).size
+            for key in [k for k in self._page_counts if isinstance(k, tuple) and k[0] == absolute]:
+                del self._page_counts[key]
+
+    def stats(self):
+        """
+        Return a dict with hits, misses, evictions, entries and cached bytes.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+# Shared cache used by the tools in this repository
+DOCUMENT_CACHE = DocumentCache()
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+In-Memory Conversion API
+
+Counterparts of the convertor and pdfslice functions that take documents as
+bytes, bytearray, memoryview or binary file objects instead of paths, and
+return the result as bytes or write it to a given binary stream. Useful for
+pipelines that receive uploads and would otherwise write temp files just to
+call the path-based functions.
+
+The work is done by the same stream-based cores that the path-based
+functions wrap (convertor.transcode_image, image_pdf_page, iter_pdf_pages,
+write_page_image, pdf_to_docx), so both APIs behave the same.
+
+Data is handed to the backends without extra copies where they can read
+from memory: Pillow and openpyxl read from a stream over the caller's buffer,
+PyPDF2 parses straight from it, img2pdf and pdf2docx take bytes. Pairs whose
+backends only work on files (DOCX/PPTX to PDF and chained conversions) are
+run through convert_file on a temporary copy.
+
+Every function returns bytes (a list of bytes for multi-page image output)
+when output is None, or writes to the binary stream output and returns None.
+"""
+
+# --- Imports ---
+import io
+import os
+import csv
+import tempfile
+
+from convertor import (
+    PyPDF2, openpyxl, IMAGE_FORMATS, UnsupportedFormatError, convert_file, route_for,
+    transcode_image, image_pdf_page, iter_pdf_pages, render_size, write_page_image, pdf_to_docx,
+)
+from instrument import stage
+
+# --- Buffers and Streams ---
+
+class _ViewReader(io.RawIOBase):
+    """
+    Read-only, seekable stream over a memoryview. Unlike io.BytesIO(view),
+    it does not copy the whole buffer up front; only the bytes actually read are copied.
+    """
+    def __init__(self, view):
+        super().__init__()
+        self._view = view.cast('B') if view.ndim != 1 or view.format != 'B' else view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+def as_stream(data):
+    """
+    Return a readable binary stream for bytes-like data or a file object.
+    bytes are wrapped in a BytesIO, which shares (does not copy) their buffer.
+    """
+    if hasattr(data, 'read'):
+        return data
+    if isinstance(data, bytes):
+        return io.BytesIO(data)
+    return io.BufferedReader(_ViewReader(memoryview(data)))
+
+def as_bytes(data):
+    """
+    Return data as bytes, for backends that only accept bytes. bytes objects
+    are returned as-is; other buffers are copied once and streams are read.
+    """
+    if isinstance(data, bytes):
+        return data
+    if hasattr(data, 'read'):
+        return data.read()
+    return memoryview(data).tobytes()
+
+def _deliver(output, write):
+    """
+    Call write(stream) with output, or with a buffer whose bytes are returned.
+    """
+    if output is not None:
+        write(output)
+        return None
+    buffer = io.BytesIO()
+    write(buffer)
+    return buffer.getvalue()
+
+# --- Images ---
+
+def convert_image_bytes(data, output_format, output=None, quality=None, optimize=False,
+                        progressive=False, max_size=None, dpi=None, max_bytes=None):
+    """
+    In-memory convert_image: re-encode one image as output_format (jpg, jpeg, png).
+    A JPEG (detected from its data) converted to JPEG without any changes, or
+    already within max_bytes, is passed through untouched.
+    """
+    return _deliver(output, lambda stream: transcode_image(
+        as_stream(data), stream, output_format, quality, optimize, progressive, max_size, dpi, max_bytes))
+
+def _image_pdf_bytes(data, png_mode='keep', quality=None, max_page_bytes=None):
+    """
+    One-page PDF for an image given in memory (see convertor.image_pdf_page).
+    """
+    return image_pdf_page(as_bytes(data), png_mode, quality, max_page_bytes)[0]
+
+def image_to_pdf_bytes(data, output=None, png_mode='keep', quality=None, max_page_bytes=None):
+    """
+    In-memory image_to_pdf: wrap one image in a one-page PDF.
+    """
+    pdf_bytes = _image_pdf_bytes(data, png_mode, quality, max_page_bytes)
+    return _deliver(output, lambda stream: stream.write(pdf_bytes))
+
+def images_to_pdf_bytes(items, output=None, png_mode='keep', quality=None, max_page_bytes=None):
+    """
+    In-memory images_to_pdf: one PDF page per image, in order. Pages are
+    appended to the output one at a time with the streaming PDF writer.
+    """
+    from pdfstream import StreamingPdfWriter
+
+    def write(stream):
+        with StreamingPdfWriter(stream) as writer:
+            for data in items:
+                pdf_bytes = _image_pdf_bytes(data, png_mode, quality, max_page_bytes)
+                reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+                writer.add_pages(reader, reader.pages)
+    return _deliver(output, write)
+
+# --- PDF ---
+
+def pdf_page_count_bytes(data):
+    """
+    Number of pages of a PDF given in memory.
+    """
+    return len(PyPDF2.PdfReader(as_stream(data)).pages)
+
+def iter_pdf_bytes_images(data, output_format, dpi=200, max_size=None, chunk_size=10):
+    """
+    Render the pages of an in-memory PDF and yield (page_number, encoded image bytes),
+    chunk_size pages at a time (see convertor.iter_pdf_pages).
+    """
+    pages = iter_pdf_pages(as_bytes(data), chunk_size=chunk_size, dpi=dpi, size=render_size(max_size))
+    for page_number, img in pages:
+        with stage('encode'):
+            buffer = io.BytesIO()
+            try:
+                write_page_image(img, buffer, output_format, max_size)
+            finally:
+                img.close()
+        yield page_number, buffer.getvalue()
+
+def pdf_to_images_bytes(data, output_format, dpi=200, max_size=None, chunk_size=10):
+    """
+    In-memory pdf_to_images: return a list with the encoded image of every page.
+    """
+    return [image for _, image in iter_pdf_bytes_images(data, output_format, dpi, max_size, chunk_size)]
+
+def pdf_to_docx_bytes(data, output=None, start_page=1, end_page=None, pages=None, **settings):
+    """
+    In-memory pdf_to_docx for one process (page ranges as in pdf_to_docx).
+    """
+    raw = as_bytes(data)
+    return _deliver(output, lambda stream: pdf_to_docx(raw, stream, start_page, end_page, pages, **settings))
+
+def slice_pdf_bytes(data, start_page, end_page, output=None, streaming=False):
+    """
+    In-memory slice_pdf: copy pages start_page..end_page (1-based, inclusive).
+
+    Unlike slice_pdf this raises instead of returning a status: ValueError for
+    a page range outside the document. streaming=True writes the pages with
+    the constant-memory writer (see pdfstream).
+    """
+    reader = PyPDF2.PdfReader(as_stream(data))
+    total = len(reader.pages)
+    if not 1 <= start_page <= end_page <= total:
+        raise ValueError(f"Invalid page range {start_page}-{end_page}: the PDF has {total} pages.")
+    selected = [reader.pages[n] for n in range(start_page - 1, end_page)]
+
+    def write(stream):
+        if streaming:
+            from pdfstream import StreamingPdfWriter
+            with StreamingPdfWriter(stream) as writer:
+                writer.add_pages(reader, selected)
+        else:
+            writer = PyPDF2.PdfWriter()
+            for page in selected:
+                writer.add_page(page)
+            writer.write(stream)
+    with stage('write'):
+        return _deliver(output, write)
+
+# --- Spreadsheets ---
+
+def excel_to_csv_bytes(data, output=None, sheet=None):
+    """
+    In-memory excel_to_csv (streaming engine): export one sheet as UTF-8 CSV.
+    """
+    workbook = openpyxl.load_workbook(as_stream(data), read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet is not None else workbook.worksheets[0]
+
+        def write(stream):
+            text = io.TextIOWrapper(stream, encoding='utf-8', newline='', write_through=True)
+            try:
+                writer = csv.writer(text)
+                width = worksheet.max_column or 0
+                for row in worksheet.iter_rows(values_only=True):
+                    values = ['' if value is None else value for value in row]
+                    width = max(width, len(values))
+                    values.extend([''] * (width - len(values)))
+                    writer.writerow(values)
+            finally:
+                text.detach()  # Leave the caller's stream open
+        with stage('sheet'):
+            return _deliver(output, write)
+    finally:
+        workbook.close()
+
+# --- Dispatch ---
+
+def convert_bytes(data, input_format, output_format, output=None, **options):
+    """
+    In-memory convert_file: convert a document given in memory.
+
+    Image, PDF and spreadsheet pairs run fully in memory. Other pairs, such as
+    DOCX/PPTX to PDF and chained conversions, go through convert_file on a
+    temporary copy. Conversions that produce one file per page (PDF to images)
+    return a list of bytes and cannot write to output.
+    Raises UnsupportedFormatError for the pairs convert_file rejects, which
+    include same-format pairs such as PNG to PNG; call convert_image_bytes to
+    re-encode an image in its own format.
+    """
+    input_format = input_format.lower().lstrip('.')
+    output_format = output_format.lower().lstrip('.')
+    route_for(input_format, output_format)  # Same pairs as the file API
+    if input_format in IMAGE_FORMATS and output_format in IMAGE_FORMATS:
+        return convert_image_bytes(data, output_format, output, **options)
+    if input_format in IMAGE_FORMATS and output_format == 'pdf':
+        return image_to_pdf_bytes(data, output, **options)
+    if input_format == 'pdf' and output_format in IMAGE_FORMATS:
+        if output is not None:
+            raise ValueError("PDF to image conversion returns one image per page; call it without output.")
+        return pdf_to_images_bytes(data, output_format, **options)
+    if input_format == 'pdf' and output_format == 'docx':
+        return pdf_to_docx_bytes(data, output, **options)
+    if input_format == 'xlsx' and output_format == 'csv':
+        return excel_to_csv_bytes(data, output, **options)
+    return _convert_via_files(data, input_format, output_format, output, options)
+
+def _convert_via_files(data, input_format, output_format, output, options):
+    """
+    Fallback for backends that need real files: convert a temporary copy with convert_file.
+    """
+    with tempfile.TemporaryDirectory(prefix='file-tools-') as tmp_dir:
+        input_path = os.path.join(tmp_dir, f"input.{input_format}")
+        with open(input_path, 'wb') as f:
+            if hasattr(data, 'read'):
+                for block in iter(lambda: data.read(1024 * 1024), b''):
+                    f.write(block)
+            else:
+                f.write(memoryview(data))
+        out_dir = os.path.join(tmp_dir, 'out')
+        os.makedirs(out_dir)
+        outputs = convert_file(input_path, os.path.join(out_dir, f"output.{output_format}"), output_format, **options)
+        if len(outputs) > 1:
+            if output is not None:
+                raise ValueError("This conversion writes several files; call it without output.")
+            results = []
+            for path in outputs:
+                with open(path, 'rb') as f:
+                    results.append(f.read())
+            return results
+
+        def write(stream):
+            with open(outputs[0], 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    stream.write(block)
+        return _deliver(output, write)
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+Per-Stage Conversion Instrumentation
+
+Records where the time of a conversion goes: the converters mark their
+stages (decode, render, encode, parse, write, ...) with stage(), and while a
+recording() is active each stage emits an event with its duration, the
+bytes it read and wrote and, optionally, the memory it allocated. Outside a
+recording stage() does nothing, so the converters pay almost nothing for it.
+
+Events are plain dicts handed to a sink: a callable, or a JsonlSink that
+appends them to a JSON-lines log which several processes can share.
+aggregate() turns a list of events into a per-stage report.
+
+Example:
+    with recording('scan.png -> pdf', sink=JsonlSink('profile.jsonl'), mode='tracemalloc'):
+        convert_file('scan.png', 'scan.pdf', 'pdf')
+    print(format_report(aggregate(load_events('profile.jsonl'))))
+
+Stages that run in worker processes (e.g. pdf_to_images with workers > 1)
+are only recorded when the worker itself runs inside a recording.
+"""
+
+# --- Imports ---
+import io
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+_RECORDER = contextvars.ContextVar('file_tools_recorder', default=None)
+_STAGE_PATH = contextvars.ContextVar('file_tools_stage_path', default=())
+
+# --- Sinks ---
+
+class JsonlSink:
+    """
+    Appends events to a JSON-lines file, one event per line.
+    Each event is written with a single O_APPEND write, so processes can share the file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = (json.dumps(event, default=str) + "\n").encode('utf-8')
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+def load_events(path):
+    """
+    Read the events of a JSON-lines log (unparsable lines are skipped).
+    """
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+    return events
+
+# --- Recorder ---
+
+class Recorder:
+    """
+    Collects the stage events of one job and forwards them to a sink.
+
+    Parameters:
+        job (str): Name of the job, copied into every event.
+        sink (callable, optional): Called with each event dict as it happens.
+        mode (str, optional): 'tracemalloc' adds allocated-memory peaks per stage;
+            'cprofile' profiles the whole job and adds the slowest functions
+            to the final event.
+    """
+    def __init__(self, job, sink=None, mode=None):
+        if mode not in (None, 'tracemalloc', 'cprofile'):
+            raise ValueError(f"Unknown instrumentation mode: {mode}")
+        self.job = job
+        self.sink = sink
+        self.mode = mode
+        self.events = []
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def emit(self, event):
+        event = dict(event, job=self.job, pid=os.getpid(), ts=round(time.time(), 3))
+        with self._lock:
+            self.events.append(event)
+        if self.sink:
+            self.sink(event)
+
+    def add_io(self, read=0, written=0):
+        with self._lock:
+            self.bytes_read += read
+            self.bytes_written += written
+
+@contextmanager
+def recording(job, sink=None, mode=None):
+    """
+    Record every stage run inside the block. Yields the Recorder.
+    A final 'total' event carries the job's duration, bytes, process peak
+    memory and, in 'cprofile' mode, the slowest functions.
+    """
+    recorder = Recorder(job, sink, mode)
+    token = _RECORDER.set(recorder)
+    path_token = _STAGE_PATH.set(())
+    profiler = None
+    started_tracing = False
+    if mode == 'cprofile':
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif mode == 'tracemalloc':
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+    start = time.perf_counter()
+    status = 'ok'
+    try:
+        yield recorder
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        event = {
+            'stage': 'total',
+            'status': status,
+            'seconds': round(seconds, 6),
+            'bytes_read': recorder.bytes_read,
+            'bytes_written': recorder.bytes_written,
+            'process_peak_mb': _process_peak_mb(),
+        }
+        if profiler is not None:
+            profiler.disable()
+            event['profile'] = _top_functions(profiler)
+        if mode == 'tracemalloc':
+            import tracemalloc
+            event['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+            if started_tracing:
+                tracemalloc.stop()
+        recorder.emit(event)
+        _STAGE_PATH.reset(path_token)
+        _RECORDER.reset(token)
+
+def current_recorder():
+    """
+    Return the active Recorder, or None outside a recording.
+    """
+    return _RECORDER.get()
+
+# --- Stages ---
+
+@contextmanager
+def _measure(recorder, name, bytes_read, bytes_written):
+    path = _STAGE_PATH.get() + (name,)
+    token = _STAGE_PATH.set(path)
+    tracing = recorder.mode == 'tracemalloc'
+    if tracing:
+        import tracemalloc
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    io_counts = {'read': bytes_read, 'written': bytes_written}
+    start = time.perf_counter()
+    try:
+        yield io_counts
+    finally:
+        event = {
+            'stage': "/".join(path),
+            'seconds': round(time.perf_counter() - start, 6),
+            'bytes_read': io_counts['read'],
+            'bytes_written': io_counts['written'],
+        }
+        event.update((key, value) for key, value in io_counts.items() if key not in ('read', 'written'))
+        if tracing:
+            event['alloc_peak_mb'] = round((tracemalloc.get_traced_memory()[1] - before) / 1024 / 1024, 2)
+        _STAGE_PATH.reset(token)
+        recorder.add_io(io_counts['read'], io_counts['written'])
+        recorder.emit(event)
+
+class _NoStage:
+    """
+    Stand-in for stage() outside a recording: does nothing.
+    """
+    def __enter__(self):
+        return {'read': 0, 'written': 0}
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NO_STAGE = _NoStage()
+
+def stage(name, bytes_read=0, bytes_written=0):
+    """
+    Context manager marking one stage of a conversion.
+
+    Byte counts known up front can be passed in; counts found out inside the
+    block can be set on the yielded dict (counts['written'] = size). Other
+    keys set on it (e.g. counts['quality'] = 75) are copied into the event.
+    Nested stages are reported as "outer/inner".
+    """
+    recorder = _RECORDER.get()
+    if recorder is None:
+        return _NO_STAGE
+    return _measure(recorder, name, bytes_read, bytes_written)
+
+def file_size(path):
+    """
+    Size of a file in bytes (0 if it does not exist), for stage byte counts.
+    """
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+# --- Reporting ---
+
+def _process_peak_mb():
+    """
+    Peak resident memory of this process in MB (None where unavailable).
+    """
+    try:
+        with open('/proc/self/status') as f:
+            return round(next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024, 1)
+    except (OSError, StopIteration):
+        pass
+    try:
+        import sys
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024, 1)
+    except ImportError:
+        return None
+
+def _top_functions(profiler, limit=15):
+    """
+    Return the `limit` functions with the highest cumulative time as text lines.
+    """
+    import pstats
+    buffer = io.StringIO()
+    pstats.Stats(profiler, stream=buffer).sort_stats('cumulative').print_stats(limit)
+    lines = buffer.getvalue().splitlines()
+    start = next((i for i, line in enumerate(lines) if line.lstrip().startswith('ncalls')), 0)
+    return [line.rstrip() for line in lines[start:] if line.strip()]
+
+def aggregate(events):
+    """
+    Summarize events per stage: {stage: {count, seconds, mean_seconds, max_seconds,
+    bytes_read, bytes_written, compression_ratio, alloc_peak_mb}}. The 'total'
+    row covers whole jobs. compression_ratio (bytes read per byte written) is
+    None for stages that do not both read and write.
+    """
+    report = {}
+    for event in events:
+        name = event.get('stage')
+        if name is None:
+            continue
+        row = report.setdefault(name, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                                       'bytes_read': 0, 'bytes_written': 0, 'alloc_peak_mb': None})
+        seconds = event.get('seconds', 0.0)
+        row['count'] += 1
+        row['seconds'] += seconds
+        row['max_seconds'] = max(row['max_seconds'], seconds)
+        row['bytes_read'] += event.get('bytes_read', 0)
+        row['bytes_written'] += event.get('bytes_written', 0)
+        peak = event.get('alloc_peak_mb', event.get('traced_peak_mb'))
+        if peak is not None:
+            row['alloc_peak_mb'] = max(row['alloc_peak_mb'] or 0.0, peak)
+    for row in report.values():
+        row['mean_seconds'] = row['seconds'] / row['count']
+        both = row['bytes_read'] and row['bytes_written']
+        row['compression_ratio'] = row['bytes_read'] / row['bytes_written'] if both else None
+    return report
+
+def format_report(report):
+    """
+    Render an aggregate() report as a text table, slowest stages first.
+    """
+    lines = [f"{'stage':<28} {'count':>6} {'total s':>9} {'mean s':>8} {'max s':>8} "
+             f"{'read MB':>8} {'write MB':>8} {'ratio':>6} {'alloc MB':>8}"]
+    rows = sorted(report.items(), key=lambda item: (item[0] != 'total', -item[1]['seconds']))
+    for name, row in rows:
+        alloc = "" if row['alloc_peak_mb'] is None else f"{row['alloc_peak_mb']:.1f}"
+        ratio = "" if row.get('compression_ratio') is None else f"{row['compression_ratio']:.2f}"
+        lines.append(f"{name:<28} {row['count']:>6} {row['seconds']:>9.3f} {row['mean_seconds']:>8.3f} "
+                     f"{row['max_seconds']:>8.3f} {row['bytes_read'] / 1048576:>8.1f} "
+                     f"{row['bytes_written'] / 1048576:>8.1f} {ratio:>6} {alloc:>8}")
+    return "\n".join(lines)
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Background Job Queue for the GUIs
+
+Runs conversions on worker threads so the Tk main loop never blocks, and
+shows them in a job panel with progress, elapsed time and throughput.
+Worker threads never touch widgets: results are handed back to the UI
+thread through a queue that is polled with root.after().
+"""
+
+# --- Imports ---
+import time
+import queue
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import ttkbootstrap as tb  # For modern Tkinter GUI
+
+# --- Job Model ---
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a running job when the user has cancelled it.
+
+    Derives from BaseException (like asyncio.CancelledError) so converters
+    that report failures with a broad `except Exception` do not swallow it.
+    """
+
+class Job:
+    """
+    A single unit of background work and its live progress.
+
+    The worker thread updates done/total through report(), which is passed
+    to the job function as its progress_callback. report() raises
+    JobCancelled once cancel() has been called, so long-running converters
+    stop at their next progress update.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, name, func, args, kwargs, on_done=None):
+        self.id = next(self._ids)
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done = on_done
+        self.status = 'queued'  # queued, running, done, failed, cancelled
+        self.done = 0
+        self.total = 0
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """
+        Request cancellation. Queued jobs never start; running jobs stop at
+        their next progress update.
+        """
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.status = 'cancelled'
+
+    def report(self, done, total):
+        """
+        Progress callback for the job function.
+        """
+        if self.cancelled:
+            raise JobCancelled()
+        self.done = done
+        self.total = total
+
+    @property
+    def elapsed(self):
+        """
+        Seconds the job has been running (or ran for).
+        """
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def throughput(self):
+        """
+        Completed units (pages, files) per second.
+        """
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed', 'cancelled')
+
+# --- Job Queue ---
+
+class JobQueue:
+    """
+    Executes jobs on a thread pool and delivers their results on the Tk thread.
+
+    on_update(job) is called (on the UI thread) whenever a job changes state
+    and periodically while it runs; each job's own on_done(job) is called
+    once when it finishes.
+    """
+    def __init__(self, root, max_workers=2, on_update=None, poll_ms=200):
+        self.root = root
+        self.on_update = on_update
+        self.poll_ms = poll_ms
+        self.jobs = {}
+        self._events = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, name, func, *args, on_done=None, **kwargs):
+        """
+        Queue func(*args, progress_callback=job.report, **kwargs) and return its Job.
+        """
+        job = Job(name, func, args, kwargs, on_done)
+        self.jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job)
+        self._notify(job)
+        return job
+
+    def cancel(self, job_id):
+        """
+        Cancel a job by id. Cancelled queued jobs are reported immediately.
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.is_finished:
+            return
+        job.cancel()
+        if job.status == 'cancelled':
+            job.finished = job.started = time.perf_counter()
+            self._events.put(job)
+
+    def clear_finished(self):
+        """
+        Forget finished jobs and return their ids.
+        """
+        finished = [job_id for job_id, job in self.jobs.items() if job.is_finished]
+        for job_id in finished:
+            del self.jobs[job_id]
+        return finished
+
+    def shutdown(self):
+        """
+        Cancel everything and stop the worker threads (used when the window closes).
+        """
+        for job in self.jobs.values():
+            job.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _run(self, job):
+        # Runs on a worker thread: must not touch any widget.
+        if job.cancelled:
+            job.status = 'cancelled'
+        else:
+            job.status = 'running'
+            job.started = time.perf_counter()
+            try:
+                job.result = job.func(*job.args, progress_callback=job.report, **job.kwargs)
+                job.status = 'done'
+            except JobCancelled:
+                job.status = 'cancelled'
+            except Exception as e:
+                job.error = e
+                job.status = 'failed'
+            job.finished = time.perf_counter()
+        self._events.put(job)
+
+    def _notify(self, job):
+        if self.on_update:
+            self.on_update(job)
+
+    def _poll(self):
+        # Runs on the Tk thread: deliver finished jobs, then refresh running ones.
+        while True:
+            try:
+                job = self._events.get_nowait()
+            except queue.Empty:
+                break
+            self._notify(job)
+            if job.on_done:
+                job.on_done(job)
+        for job in list(self.jobs.values()):
+            if job.status == 'running':
+                self._notify(job)
+        self.root.after(self.poll_ms, self._poll)
+
+# --- Job Panel Widget ---
+
+class JobPanel(tb.Labelframe):
+    """
+    Table of background jobs with Cancel and Clear Finished buttons.
+    Creates and owns its JobQueue, available as panel.queue.
+    """
+    COLUMNS = (
+        ('name', "Job", 220),
+        ('status', "Status", 80),
+        ('progress', "Progress", 80),
+        ('elapsed', "Elapsed", 70),
+        ('rate', "Rate", 70),
+    )
+
+    def __init__(self, root, max_workers=2, **kwargs):
+        super().__init__(root, text="Jobs", **kwargs)
+        self.tree = tb.Treeview(self, columns=[c[0] for c in self.COLUMNS], show='headings', height=5)
+        for key, heading, width in self.COLUMNS:
+            self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width, anchor='w' if key == 'name' else 'center')
+        self.tree.pack(fill='both', expand=True, padx=5, pady=5)
+
+        btn_frame = tb.Frame(self)
+        btn_frame.pack(fill='x', padx=5, pady=(0, 5))
+        tb.Button(btn_frame, text="Cancel Selected", command=self.cancel_selected, bootstyle="danger-outline").pack(side='left', padx=5)
+        tb.Button(btn_frame, text="Clear Finished", command=self.clear_finished, bootstyle="secondary-outline").pack(side='left', padx=5)
+
+        self.queue = JobQueue(root, max_workers=max_workers, on_update=self.refresh)
+
+    def refresh(self, job):
+        """
+        Insert or update the row for a job.
+        """
+        progress = f"{job.done}/{job.total}" if job.total else "-"
+        rate = f"{job.throughput:.1f}/s" if job.done else "-"
+        values = (job.name, job.status, progress, f"{job.elapsed:.1f}s", rate)
+        iid = str(job.id)
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=values)
+        else:
+            self.tree.insert('', 'end', iid=iid, values=values)
+
+    def cancel_selected(self):
+        """
+        Cancel every selected job.
+        """
+        for iid in self.tree.selection():
+            self.queue.cancel(int(iid))
+
+    def clear_finished(self):
+        """
+        Remove finished jobs from the table.
+        """
+        for job_id in self.queue.clear_finished():
+            self.tree.delete(str(job_id))
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Lazy Backend Imports
+
+Conversion backends (Pillow, pandas, pdf2docx, ...) are expensive to import
+and most runs only need one of them. lazy_module() returns a stand-in that
+imports the real module the first time one of its attributes is used, so
+start-up only pays for the backends that are actually needed.
+
+Every lazy module is recorded in a registry; preload() imports them up front
+(for example in long-running worker processes).
+"""
+
+# --- Imports ---
+import importlib
+import threading
+
+# --- Backend Registry ---
+
+_REGISTRY = {}
+_LOCK = threading.RLock()
+
+class LazyModule:
+    """
+    Proxy for a module that is imported on first attribute access.
+    on_load(module), if given, runs once right after the import.
+    """
+    def __init__(self, name, on_load=None):
+        self.__dict__['_name'] = name
+        self.__dict__['_on_load'] = on_load
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with _LOCK:
+                module = self.__dict__['_module']
+                if module is None:
+                    module = importlib.import_module(self._name)
+                    if self._on_load:
+                        self._on_load(module)
+                    self.__dict__['_module'] = module
+        return module
+
+    @property
+    def is_loaded(self):
+        return self.__dict__['_module'] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+def lazy_module(name, on_load=None):
+    """
+    Return the (shared) lazy proxy for the module called name.
+    """
+    with _LOCK:
+        proxy = _REGISTRY.get(name)
+        if proxy is None:
+            proxy = _REGISTRY[name] = LazyModule(name, on_load)
+        return proxy
+
+def loaded_backends():
+    """
+    Return the names of registered backends that have been imported so far.
+    """
+    return sorted(name for name, proxy in _REGISTRY.items() if proxy.is_loaded)
+
+def preload(names=None):
+    """
+    Import registered backends now. Backends that fail to import (for
+    example Windows-only ones) are skipped; their names are returned.
+    """
+    failed = []
+    for name in list(names or _REGISTRY):
+        try:
+            lazy_module(name)._load()
+        except Exception:
+            failed.append(name)
+    return failed
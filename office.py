@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""
+LibreOffice Conversion Backend
+
+Converts office documents (DOCX, PPTX, ...) to PDF with a pool of headless
+LibreOffice (soffice) instances, for systems without Microsoft Office.
+
+Each instance has its own user profile, so instances never share state and
+several conversions run at once. When LibreOffice's Python bridge (the
+`uno` module, e.g. the python3-uno package) is importable, instances are
+started once and kept running, and documents are converted over a UNO pipe
+connection: no start-up cost per file. Without it, each conversion runs
+`soffice --convert-to pdf` on the instance's profile, which is already
+initialized, so only the first conversion per instance pays for creating it.
+
+A conversion that exceeds its timeout kills the instance, which is then
+restarted (recycled) for the next job; instances are also recycled after
+max_conversions jobs to keep long-running processes from growing.
+
+The shared pool (get_pool) belongs to the process that created it and is
+closed when that process exits, including pool worker processes, which
+skip atexit handlers.
+"""
+
+# --- Imports ---
+import os
+import sys
+import glob
+import time
+import queue
+import shutil
+import signal
+import tempfile
+import threading
+import subprocess
+from multiprocessing import util as mp_util
+
+# Export filter per input type (LibreOffice picks the application from the file)
+PDF_FILTERS = {
+    'docx': 'writer_pdf_Export', 'doc': 'writer_pdf_Export', 'odt': 'writer_pdf_Export', 'rtf': 'writer_pdf_Export',
+    'pptx': 'impress_pdf_Export', 'ppt': 'impress_pdf_Export', 'odp': 'impress_pdf_Export',
+    'xlsx': 'calc_pdf_Export', 'xls': 'calc_pdf_Export', 'ods': 'calc_pdf_Export',
+}
+
+class OfficeError(Exception):
+    """
+    Raised when LibreOffice is missing, fails to start or fails to convert a document.
+    """
+
+class OfficeTimeout(OfficeError):
+    """
+    Raised when a conversion exceeds its timeout (the instance is killed).
+    """
+
+# --- Locating LibreOffice ---
+
+def find_soffice():
+    """
+    Return the path of the soffice executable, or None if LibreOffice is not installed.
+    $FILE_TOOLS_SOFFICE overrides the search.
+    """
+    candidates = [os.environ.get('FILE_TOOLS_SOFFICE'), shutil.which('soffice'), shutil.which('libreoffice')]
+    if sys.platform == 'darwin':
+        candidates.append('/Applications/LibreOffice.app/Contents/MacOS/soffice')
+    elif os.name == 'nt':
+        for base in (os.environ.get('PROGRAMFILES'), os.environ.get('PROGRAMFILES(X86)')):
+            if base:
+                candidates.append(os.path.join(base, 'LibreOffice', 'program', 'soffice.exe'))
+    else:
+        candidates.extend(['/usr/lib/libreoffice/program/soffice', '/usr/lib64/libreoffice/program/soffice'])
+        candidates.extend(sorted(glob.glob('/opt/libreoffice*/program/soffice'), reverse=True))
+    return next((path for path in candidates if path and os.path.isfile(path)), None)
+
+def is_available():
+    """
+    True if a LibreOffice installation was found.
+    """
+    return find_soffice() is not None
+
+def _uno_available():
+    try:
+        import uno  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _file_url(path):
+    """
+    file:// URL for a local path (as LibreOffice expects for -env and UNO).
+    """
+    path = os.path.abspath(path)
+    if os.name == 'nt':
+        return 'file:///' + path.replace('\\', '/')
+    return 'file://' + path
+
+# soffice is a launcher that starts soffice.bin: run it in its own process
+# group, so a hung conversion can be killed together with its children
+_NEW_GROUP = {'start_new_session': True} if os.name == 'posix' else {}
+
+def _kill_tree(process):
+    """
+    Kill a process started with _NEW_GROUP together with its process group.
+    Also safe after the launcher exited, to catch children left behind.
+    """
+    if os.name == 'posix':
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+            return
+        except OSError:
+            pass
+    process.kill()
+
+# --- Instance ---
+
+class OfficeInstance:
+    """
+    One LibreOffice process (or, without UNO, one user profile) with its own profile folder.
+    """
+    def __init__(self, soffice, profile_dir, index, use_uno, start_timeout=60.0):
+        self.soffice = soffice
+        self.profile_dir = profile_dir
+        self.index = index
+        self.use_uno = use_uno
+        self.start_timeout = start_timeout
+        self.process = None
+        self.desktop = None
+        self.conversions = 0
+        self.generation = 0
+
+    def _base_args(self):
+        return [self.soffice, f"-env:UserInstallation={_file_url(self.profile_dir)}",
+                '--headless', '--invisible', '--nologo', '--norestore', '--nodefault', '--nolockcheck']
+
+    def start(self):
+        """
+        Start the soffice process and connect to it (UNO mode only).
+        """
+        if not self.use_uno:
+            return
+        import uno
+
+        self.generation += 1
+        pipe_name = f"file_tools_{os.getpid()}_{self.index}_{self.generation}"
+        self.process = subprocess.Popen(self._base_args() + [f"--accept=pipe,name={pipe_name};urp;"],
+                                        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL, **_NEW_GROUP)
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext('com.sun.star.bridge.UnoUrlResolver', local)
+        deadline = time.monotonic() + self.start_timeout
+        while True:
+            try:
+                context = resolver.resolve(f"uno:pipe,name={pipe_name};urp;StarOffice.ComponentContext")
+                break
+            except Exception:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise OfficeError("LibreOffice did not start (is another program using its profile?).")
+                time.sleep(0.25)
+        self.desktop = context.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', context)
+        self.conversions = 0
+
+    def stop(self):
+        """
+        Terminate the soffice process (if any) and anything left in its process group.
+        """
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+            _kill_tree(self.process)
+            self.process.wait()
+            self.process = None
+
+    def kill(self):
+        """
+        Kill the process immediately (used when a conversion hangs).
+        """
+        if self.process is not None and self.process.poll() is None:
+            _kill_tree(self.process)
+
+    def alive(self):
+        return not self.use_uno or (self.process is not None and self.process.poll() is None)
+
+    def convert(self, input_path, output_path, timeout):
+        """
+        Convert one document to PDF; raises OfficeError on failure or timeout.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        if self.use_uno:
+            self._convert_uno(input_path, output_path, timeout)
+        else:
+            self._convert_cli(input_path, output_path, timeout)
+        self.conversions += 1
+
+    def _convert_uno(self, input_path, output_path, timeout):
+        import uno
+        from com.sun.star.beans import PropertyValue
+
+        def prop(name, value):
+            p = PropertyValue()
+            p.Name, p.Value = name, value
+            return p
+
+        ext = os.path.splitext(input_path)[1][1:].lower()
+        result = {}
+
+        def work():
+            try:
+                doc = self.desktop.loadComponentFromURL(
+                    uno.systemPathToFileUrl(os.path.abspath(input_path)), '_blank', 0,
+                    (prop('Hidden', True), prop('ReadOnly', True)))
+                if doc is None:
+                    raise OfficeError(f"LibreOffice could not open {os.path.basename(input_path)}.")
+                try:
+                    doc.storeToURL(uno.systemPathToFileUrl(os.path.abspath(output_path)),
+                                   (prop('FilterName', PDF_FILTERS.get(ext, 'writer_pdf_Export')),))
+                finally:
+                    doc.close(True)
+            except BaseException as e:
+                result['error'] = e
+
+        # UNO calls cannot be interrupted: run the call on a helper thread and
+        # kill the instance if it does not return in time
+        worker = threading.Thread(target=work, daemon=True)
+        worker.start()
+        worker.join(timeout)
+        if worker.is_alive():
+            self.kill()
+            raise OfficeTimeout(f"Conversion timed out after {timeout:.0f}s.")
+        if 'error' in result:
+            error = result['error']
+            raise error if isinstance(error, OfficeError) else OfficeError(f"LibreOffice conversion failed: {error}")
+
+    def _convert_cli(self, input_path, output_path, timeout):
+        with tempfile.TemporaryDirectory(prefix='soffice-out-') as out_dir:
+            args = self._base_args() + ['--convert-to', 'pdf', '--outdir', out_dir, os.path.abspath(input_path)]
+            proc = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    text=True, **_NEW_GROUP)
+            self.process = proc  # So that stop() and kill() reach a running conversion
+            try:
+                stdout, stderr = proc.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                _kill_tree(proc)
+                proc.communicate()
+                raise OfficeTimeout(f"Conversion timed out after {timeout:.0f}s.")
+            finally:
+                self.process = None
+            produced = os.path.join(out_dir, os.path.splitext(os.path.basename(input_path))[0] + '.pdf')
+            if not os.path.exists(produced):
+                detail = (stderr or stdout or '').strip()
+                raise OfficeError(f"LibreOffice conversion failed. {detail}".strip())
+            shutil.move(produced, output_path)
+
+# --- Pool ---
+
+class OfficePool:
+    """
+    Pool of OfficeInstances; convert() borrows an idle instance for one document.
+
+    Parameters:
+        size (int): Number of instances, i.e. conversions that can run at once.
+        soffice (str, optional): Path of soffice (default: find_soffice()).
+        timeout (float): Seconds per conversion before the instance is killed and recycled.
+        max_conversions (int): Recycle an instance after this many conversions.
+        use_uno (bool, optional): Force (True) or disable (False) persistent UNO
+            instances; by default they are used when the uno module is importable.
+        profile_root (str, optional): Folder for the per-instance profiles.
+    """
+    def __init__(self, size=2, soffice=None, timeout=120.0, max_conversions=200, use_uno=None, profile_root=None):
+        self.soffice = soffice or find_soffice()
+        if not self.soffice:
+            raise OfficeError("LibreOffice (soffice) was not found. Install LibreOffice or set FILE_TOOLS_SOFFICE.")
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self.max_conversions = max_conversions
+        self.use_uno = _uno_available() if use_uno is None else use_uno
+        self.profile_root = profile_root or tempfile.mkdtemp(prefix='file-tools-office-')
+        self._idle = queue.Queue()
+        self._instances = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {'conversions': 0, 'failures': 0, 'timeouts': 0, 'recycled': 0}
+        for index in range(self.size):
+            instance = OfficeInstance(self.soffice, os.path.join(self.profile_root, f"profile_{index}"),
+                                      index, self.use_uno)
+            self._instances.append(instance)
+            self._idle.put(instance)  # Started on first use
+
+    def convert(self, input_path, output_path, timeout=None):
+        """
+        Convert input_path to a PDF at output_path, waiting for a free instance if needed.
+        Raises OfficeError on failure.
+        """
+        if self._closed:
+            raise OfficeError("The LibreOffice pool has been closed.")
+        instance = self._idle.get()
+        try:
+            if not instance.alive():
+                instance.stop()
+                instance.start()
+            try:
+                instance.convert(input_path, output_path, timeout or self.timeout)
+            except OfficeError as e:
+                with self._lock:
+                    self.stats['failures'] += 1
+                    if isinstance(e, OfficeTimeout):
+                        self.stats['timeouts'] += 1
+                self._recycle(instance)
+                raise
+            with self._lock:
+                self.stats['conversions'] += 1
+            if instance.conversions >= self.max_conversions:
+                self._recycle(instance)
+        finally:
+            self._idle.put(instance)
+        return output_path
+
+    def _recycle(self, instance):
+        """
+        Stop an instance; it is restarted on its next use.
+        """
+        instance.kill()
+        instance.stop()
+        with self._lock:
+            self.stats['recycled'] += 1
+
+    def close(self):
+        """
+        Stop every instance (killing its whole process group) and remove the profiles.
+        Safe to call more than once.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for instance in self._instances:
+            instance.stop()
+        shutil.rmtree(self.profile_root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# --- Shared Pool ---
+
+_POOL = None
+_POOL_PID = None
+_POOL_LOCK = threading.Lock()
+
+def get_pool():
+    """
+    Return the process-wide pool, creating it on first use.
+    Its size comes from $FILE_TOOLS_OFFICE_INSTANCES (default 2).
+
+    The pool is closed when the process exits. A multiprocessing finalizer is
+    used instead of atexit because ProcessPoolExecutor workers leave through
+    os._exit(), which skips atexit but runs multiprocessing's finalizers. A
+    forked child gets its own pool instead of sharing the parent's instances.
+    """
+    global _POOL, _POOL_PID
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_PID != os.getpid():
+            _POOL = OfficePool(size=int(os.environ.get('FILE_TOOLS_OFFICE_INSTANCES', 2)))
+            _POOL_PID = os.getpid()
+            mp_util.Finalize(None, _POOL.close, exitpriority=10)
+        return _POOL
+
+def office_to_pdf(input_path, output_path, timeout=None):
+    """
+    Convert an office document to PDF with the shared LibreOffice pool.
+    """
+    return get_pool().convert(input_path, output_path, timeout)
@@ -0,0 +1,603 @@
+# -*- coding: utf-8 -*-
+"""
+Fast PDF Page Index
+
+Builds a page index of a PDF (page count, page sizes, the object number and
+byte offset of every page) by reading only the trailer, the cross-reference
+data and the page tree, without parsing page contents or loading the file
+into memory. The file is memory-mapped and only the page tree is parsed, so
+indexing time grows with the number of pages rather than the file size.
+Tools use it to check page ranges before starting any work, and the
+streaming slicer to locate pages directly.
+
+Classic xref tables, xref streams, object streams and incremental updates
+are understood. Files the fast reader cannot handle (damaged xref data,
+encrypted object streams, unusual stream filters) are indexed with PyPDF2
+instead, which is slower but recovers from more damage.
+
+A module-level PAGE_INDEX caches indexes keyed by (absolute path,
+modification time, size), so an edited file is indexed again.
+"""
+
+# --- Imports ---
+import os
+import re
+import zlib
+import operator
+import threading
+from itertools import accumulate
+from collections import OrderedDict
+from lazyimport import lazy_module  # Heavy backends are imported on first use
+from pdfstream import open_mapped, _indirect_of, INHERITABLE_KEYS
+
+PyPDF2 = lazy_module('PyPDF2')  # Fallback for files the fast reader cannot index
+
+DEFAULT_PAGE_SIZE = (612.0, 792.0)  # US Letter, used when a page has no /MediaBox
+
+class PdfIndexError(ValueError):
+    """
+    Raised when a PDF cannot be indexed or a page range falls outside it.
+    """
+
+# --- Index Records ---
+
+class PageInfo:
+    """
+    One page of the index.
+
+    Attributes:
+        number (int): Page number (1-based).
+        ref (tuple): (object number, generation) of the page object.
+        offset (int or None): Byte offset of the page object in the file, or None
+            when it is stored inside a compressed object stream.
+        width, height (float): Page size in points as displayed (rotation applied).
+        rotate (int): Page rotation in degrees (0, 90, 180 or 270).
+    """
+    def __init__(self, number, ref, offset, width, height, rotate=0):
+        self.number = number
+        self.ref = ref
+        self.offset = offset
+        self.width = width
+        self.height = height
+        self.rotate = rotate
+
+    def __repr__(self):
+        return f"<PageInfo {self.number}: {self.width:g}x{self.height:g} pt, object {self.ref[0]}>"
+
+class PdfIndex:
+    """
+    Page index of one PDF file (see build_index).
+    """
+    def __init__(self, path, file_size, version, pages, encrypted=False, fast=True):
+        self.path = path
+        self.file_size = file_size
+        self.version = version
+        self.pages = pages
+        self.encrypted = encrypted
+        self.fast = fast  # False when the index was built with the PyPDF2 fallback
+
+    @property
+    def page_count(self):
+        return len(self.pages)
+
+    def page(self, number):
+        """
+        Return the PageInfo of a page (1-based).
+        """
+        self.check_range(number, number)
+        return self.pages[number - 1]
+
+    def check_range(self, start_page, end_page):
+        """
+        Raise PdfIndexError unless 1 <= start_page <= end_page <= page_count.
+        """
+        if start_page < 1 or end_page < start_page:
+            raise PdfIndexError(f"Invalid page range {start_page}-{end_page}.")
+        if end_page > self.page_count:
+            raise PdfIndexError(
+                f"Page {end_page} is out of range: {os.path.basename(self.path)} has {self.page_count} pages."
+            )
+
+# --- Tokenizer ---
+
+_SPACE = re.compile(rb'(?:[\s\x00]+|%[^\r\n]*)*')
+_REGULAR = re.compile(rb'[^\s()<>\[\]{}/%\x00]*')
+_NUMBER = re.compile(rb'[+-]?(?:\d+\.?\d*|\.\d+)')
+_REF_TAIL = re.compile(rb'\s+(\d+)\s+R(?![^\s()<>\[\]{}/%])')
+_OBJ_HEADER = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj')
+_XREF_SUBSECTION = re.compile(rb'(\d+)\s+(\d+)')
+_XREF_ENTRY = re.compile(rb'(\d{10})\s(\d{5})\s([nf])')
+_NAME_ESCAPE = re.compile(rb'#([0-9A-Fa-f]{2})')
+
+class _Ref(tuple):
+    """
+    Indirect reference (object number, generation).
+    """
+
+def _skip(buf, pos):
+    """
+    Skip whitespace and comments.
+    """
+    return _SPACE.match(buf, pos).end()
+
+def _parse(buf, pos):
+    """
+    Parse one PDF value at pos. Returns (value, position after it).
+    Dictionaries become dicts with '/Name' keys, arrays lists, names str,
+    strings bytes and indirect references _Ref.
+    """
+    pos = _skip(buf, pos)
+    c = buf[pos]
+    if c == 0x2F:  # /Name
+        m = _REGULAR.match(buf, pos + 1)
+        name = _NAME_ESCAPE.sub(lambda e: bytes([int(e.group(1), 16)]), m.group())
+        return '/' + name.decode('latin-1'), m.end()
+    if c == 0x3C:  # << dictionary >> or <hex string>
+        if buf[pos + 1] == 0x3C:
+            result = {}
+            pos += 2
+            while True:
+                pos = _skip(buf, pos)
+                if buf[pos] == 0x3E:
+                    return result, pos + 2
+                key, pos = _parse(buf, pos)
+                result[key], pos = _parse(buf, pos)
+        end = buf.find(b'>', pos)
+        return bytes(buf[pos + 1:end]), end + 1
+    if c == 0x5B:  # [ array ]
+        result = []
+        pos += 1
+        while True:
+            pos = _skip(buf, pos)
+            if buf[pos] == 0x5D:
+                return result, pos + 1
+            value, pos = _parse(buf, pos)
+            result.append(value)
+    if c == 0x28:  # (literal string), with balanced parentheses and escapes
+        depth, i = 0, pos
+        while True:
+            ch = buf[i]
+            if ch == 0x5C:
+                i += 2
+                continue
+            if ch == 0x28:
+                depth += 1
+            elif ch == 0x29:
+                depth -= 1
+                if depth == 0:
+                    return bytes(buf[pos + 1:i]), i + 1
+            i += 1
+    m = _NUMBER.match(buf, pos)
+    if m:
+        token = m.group()
+        if b'.' in token:
+            return float(token), m.end()
+        ref = _REF_TAIL.match(buf, m.end())
+        if ref:
+            return _Ref((int(token), int(ref.group(1)))), ref.end()
+        return int(token), m.end()
+    word = _REGULAR.match(buf, pos).group()
+    if not word:
+        raise PdfIndexError(f"Unexpected data at byte {pos}.")
+    return {b'true': True, b'false': False, b'null': None}.get(word, word.decode('latin-1')), pos + len(word)
+
+def _unpredict_row(kind, row, prev, bpp):
+    """
+    Undo one PNG filter byte by byte (Average and Paeth rows, and short rows).
+    """
+    row = bytearray(row)
+    for i in range(len(row)):
+        left = row[i - bpp] if i >= bpp else 0
+        up = prev[i] if i < len(prev) else 0
+        if kind == 1:
+            row[i] = (row[i] + left) & 0xFF
+        elif kind == 2:
+            row[i] = (row[i] + up) & 0xFF
+        elif kind == 3:
+            row[i] = (row[i] + ((left + up) >> 1)) & 0xFF
+        elif kind == 4:
+            corner = prev[i - bpp] if bpp <= i < len(prev) + bpp else 0
+            p = left + up - corner
+            pa, pb, pc = abs(p - left), abs(p - up), abs(p - corner)
+            row[i] = (row[i] + (left if pa <= pb and pa <= pc else up if pb <= pc else corner)) & 0xFF
+    return bytes(row)
+
+def _unpredict_up(rows, prev, columns):
+    """
+    Decode consecutive Up-filtered rows (given without their filter bytes,
+    joined) in one pass: down each byte column the output is a running sum
+    starting from the previous row, so every column is one accumulate().
+    """
+    out = bytearray(len(rows))
+    for column in range(columns):
+        sums = accumulate(rows[column::columns], operator.add, initial=prev[column])
+        next(sums)
+        out[column::columns] = bytes(map(_LOW_BYTE, sums))
+    return out
+
+_LOW_BYTE = (0xFF).__and__
+_NOT_UP = re.compile(rb'[^\x02]')
+
+def _unpredict(data, parms):
+    """
+    Undo the PNG predictors used by xref and object streams.
+
+    Rows are decoded whole rather than byte by byte where possible: runs of
+    Up rows (what PDF writers use for xref streams) are decoded column-wise
+    with _unpredict_up, None rows are copied and Sub rows are running sums
+    over each byte lane. Average and Paeth rows go through _unpredict_row.
+    """
+    predictor = parms.get('/Predictor', 1)
+    if predictor == 1:
+        return data
+    if predictor < 10:
+        raise PdfIndexError(f"Unsupported predictor {predictor}.")
+    bpp = max(1, parms.get('/Colors', 1) * parms.get('/BitsPerComponent', 8) // 8)
+    columns = parms.get('/Columns', 1) * bpp
+    stride = columns + 1
+    full = len(data) // stride * stride  # A short last row is decoded on its own
+    kinds = data[0:full:stride]
+    out = bytearray()
+    prev = bytes(columns)
+    index = 0
+    while index < len(kinds):
+        kind = kinds[index]
+        if kind == 2:
+            other = _NOT_UP.search(kinds, index)
+            end = other.start() if other else len(kinds)
+            rows = bytearray(data[index * stride:end * stride])
+            del rows[::stride]  # Drop the filter bytes
+            out += _unpredict_up(rows, prev, columns)
+            index = end
+        else:
+            row = bytes(data[index * stride + 1:(index + 1) * stride])
+            if kind == 1:
+                lanes = bytearray(row)
+                for lane in range(bpp):
+                    lanes[lane::bpp] = bytes(map(_LOW_BYTE, accumulate(row[lane::bpp], operator.add)))
+                row = lanes
+            elif kind != 0:
+                row = _unpredict_row(kind, row, prev, bpp)
+            out += row
+            index += 1
+        prev = bytes(out[-columns:])
+    if full < len(data):
+        out += _unpredict_row(data[full], data[full + 1:], prev, bpp)
+    return bytes(out)
+
+# --- Fast Reader ---
+
+class _FastReader:
+    """
+    Reads cross-reference data and individual objects from a mapped PDF.
+    """
+    def __init__(self, buf):
+        self.buf = buf
+        self.entries = {}  # object number -> (type, field 2, field 3) as in xref streams
+        self.trailer = {}
+        self._object_streams = OrderedDict()
+        self._read_xref_chain()
+
+    def _read_xref_chain(self):
+        buf = self.buf
+        tail = buf.rfind(b'startxref', max(0, len(buf) - 4096))
+        if tail < 0:
+            raise PdfIndexError("No startxref found.")
+        offset, _ = _parse(buf, tail + len(b'startxref'))
+        pending, seen = [offset], set()
+        # Newest section first: entries and trailer keys already seen win
+        while pending:
+            offset = pending.pop(0)
+            if not isinstance(offset, int) or offset in seen:
+                continue
+            seen.add(offset)
+            trailer = self._read_xref_section(offset)
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            pending.extend(trailer[key] for key in ('/XRefStm', '/Prev') if key in trailer)
+
+    def _read_xref_section(self, offset):
+        """
+        Read one xref table or stream into self.entries and return its trailer.
+        """
+        buf = self.buf
+        pos = _skip(buf, offset)
+        if buf[pos:pos + 4] != b'xref':
+            return self._read_xref_stream(pos)
+        pos += 4
+        while True:
+            pos = _skip(buf, pos)
+            if buf[pos:pos + 7] == b'trailer':
+                return _parse(buf, pos + 7)[0]
+            m = _XREF_SUBSECTION.match(buf, pos)
+            if not m:
+                raise PdfIndexError(f"Malformed xref table at byte {pos}.")
+            first, count = int(m.group(1)), int(m.group(2))
+            pos = m.end()
+            for num in range(first, first + count):
+                entry = _XREF_ENTRY.match(buf, _skip(buf, pos))
+                if not entry:
+                    raise PdfIndexError(f"Malformed xref entry at byte {pos}.")
+                in_use = entry.group(3) == b'n'
+                self.entries.setdefault(num, (1, int(entry.group(1)), int(entry.group(2))) if in_use else (0, 0, 0))
+                pos = entry.end()
+
+    def _read_xref_stream(self, pos):
+        header = _OBJ_HEADER.match(self.buf, pos)
+        if not header:
+            raise PdfIndexError(f"No xref data at byte {pos}.")
+        info, pos = _parse(self.buf, header.end())
+        if info.get('/Type') != '/XRef':
+            raise PdfIndexError(f"No xref data at byte {pos}.")
+        data = self._stream_data(info, pos)
+        widths = info['/W']
+        index = info.get('/Index', [0, info['/Size']])
+        row = sum(widths)
+        at = 0
+        for first, count in zip(index[0::2], index[1::2]):
+            for num in range(first, first + count):
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(data[at:at + width], 'big'))
+                    at += width
+                kind = fields[0] if widths[0] else 1
+                if kind in (1, 2):
+                    self.entries.setdefault(num, (kind, fields[1], fields[2]))
+                else:
+                    self.entries.setdefault(num, (0, 0, 0))
+            if at > len(data):
+                break
+        return info
+
+    def _stream_data(self, info, pos):
+        """
+        Decoded data of the stream whose dictionary ends at pos.
+        """
+        buf = self.buf
+        pos = _skip(buf, pos)
+        if buf[pos:pos + 6] != b'stream':
+            raise PdfIndexError(f"Missing stream data at byte {pos}.")
+        pos += 6
+        if buf[pos:pos + 2] == b'\r\n':
+            pos += 2
+        elif buf[pos] in (0x0A, 0x0D):
+            pos += 1
+        data = bytes(buf[pos:pos + self.resolve(info['/Length'])])
+        filters = self.resolve(info.get('/Filter')) or []
+        parms = self.resolve(info.get('/DecodeParms')) or []
+        if not isinstance(filters, list):
+            filters = [filters]
+        if not isinstance(parms, list):
+            parms = [parms]
+        for i, name in enumerate(filters):
+            if name not in ('/FlateDecode', '/Fl'):
+                raise PdfIndexError(f"Unsupported stream filter {name}.")
+            data = zlib.decompress(data)
+            parm = self.resolve(parms[i]) if i < len(parms) else None
+            if parm:
+                data = _unpredict(data, parm)
+        return data
+
+    def _object_stream(self, number):
+        """
+        Return (decoded data, {object number: offset}) of an object stream.
+        """
+        cached = self._object_streams.get(number)
+        if cached is not None:
+            return cached
+        entry = self.entries.get(number)
+        if not entry or entry[0] != 1:
+            raise PdfIndexError(f"Object stream {number} is missing.")
+        header = _OBJ_HEADER.match(self.buf, entry[1])
+        if not header:
+            raise PdfIndexError(f"Object stream {number} is not at its xref offset.")
+        info, pos = _parse(self.buf, header.end())
+        data = self._stream_data(info, pos)
+        first = self.resolve(info['/First'])
+        numbers = [int(n) for n in re.findall(rb'\d+', data[:first])]
+        offsets = {numbers[i]: first + numbers[i + 1] for i in range(0, len(numbers) - 1, 2)}
+        self._object_streams[number] = (data, offsets)
+        if len(self._object_streams) > 16:
+            self._object_streams.popitem(last=False)
+        return data, offsets
+
+    def get(self, ref):
+        """
+        Return the object for an indirect reference (None for free or missing objects).
+        """
+        entry = self.entries.get(ref[0])
+        if not entry or entry[0] == 0:
+            return None
+        if entry[0] == 1:
+            header = _OBJ_HEADER.match(self.buf, entry[1])
+            if not header or int(header.group(1)) != ref[0]:
+                raise PdfIndexError(f"Object {ref[0]} is not at its xref offset.")
+            return _parse(self.buf, header.end())[0]
+        data, offsets = self._object_stream(entry[1])
+        if ref[0] not in offsets:
+            raise PdfIndexError(f"Object {ref[0]} is missing from its object stream.")
+        return _parse(data, offsets[ref[0]])[0]
+
+    def resolve(self, value):
+        for _ in range(32):
+            if not isinstance(value, _Ref):
+                return value
+            value = self.get(value)
+        raise PdfIndexError("Reference chain too long.")
+
+    def page_nodes(self):
+        """
+        Walk the page tree. Returns [(page ref, inherited attributes)] in page order.
+        """
+        root = self.resolve(self.trailer.get('/Root'))
+        if not isinstance(root, dict):
+            raise PdfIndexError("The document catalog is missing.")
+        pages = []
+        stack = [(root.get('/Pages'), {})]
+        seen = set()
+        while stack:
+            ref, inherited = stack.pop()
+            if not isinstance(ref, _Ref) or ref in seen:
+                continue  # Page tree nodes are always indirect; a repeat is a cycle
+            seen.add(ref)
+            node = self.resolve(ref)
+            if not isinstance(node, dict):
+                continue
+            attributes = dict(inherited)
+            attributes.update((key, node[key]) for key in INHERITABLE_KEYS if key in node)
+            kids = self.resolve(node.get('/Kids'))
+            if node.get('/Type') == '/Page' or not isinstance(kids, list):
+                pages.append((ref, attributes))
+            else:
+                stack.extend((kid, attributes) for kid in reversed(kids))
+        return pages
+
+def _page_size(box, rotate):
+    """
+    (width, height) of a [x1 y1 x2 y2] box as displayed with the given rotation.
+    """
+    if not box or len(box) != 4:
+        width, height = DEFAULT_PAGE_SIZE
+    else:
+        x1, y1, x2, y2 = (float(v) for v in box)
+        width, height = abs(x2 - x1), abs(y2 - y1)
+    return (height, width) if rotate in (90, 270) else (width, height)
+
+def _index_fast(path, mapping):
+    reader = _FastReader(mapping)
+    pages = []
+    for number, (ref, attributes) in enumerate(reader.page_nodes(), 1):
+        box = reader.resolve(attributes.get('/CropBox') or attributes.get('/MediaBox'))
+        if isinstance(box, list):
+            box = [reader.resolve(v) for v in box]
+        rotate = int(reader.resolve(attributes.get('/Rotate')) or 0) % 360
+        entry = reader.entries.get(ref[0])
+        offset = entry[1] if entry and entry[0] == 1 else None
+        pages.append(PageInfo(number, tuple(ref), offset, *_page_size(box, rotate), rotate=rotate))
+    # The page tree walk skips nodes it cannot read; /Count catches that
+    tree = reader.resolve(reader.resolve(reader.trailer.get('/Root')).get('/Pages'))
+    count = reader.resolve(tree.get('/Count')) if isinstance(tree, dict) else None
+    if count != len(pages):
+        raise PdfIndexError(f"The page tree has {len(pages)} pages but /Count says {count}.")
+    return pages, '/Encrypt' in reader.trailer
+
+def _index_pypdf2(path, mapping):
+    reader = PyPDF2.PdfReader(mapping)
+    if reader.is_encrypted:
+        reader.decrypt('')  # Most "encrypted" PDFs only restrict editing
+    offsets = {}
+    for generation, objects in getattr(reader, 'xref', {}).items():
+        offsets.update(((number, generation), offset) for number, offset in objects.items())
+    pages = []
+    for number, page in enumerate(reader.pages, 1):
+        ref = _indirect_of(page)
+        rotate = int(getattr(page, 'rotation', 0) or 0) % 360
+        box = page.cropbox
+        width, height = _page_size([box.left, box.bottom, box.right, box.top], rotate)
+        pages.append(PageInfo(number, (ref.idnum, ref.generation), offsets.get((ref.idnum, ref.generation)),
+                              width, height, rotate))
+    return pages, reader.is_encrypted
+
+def build_index(path):
+    """
+    Index a PDF file. Uses the fast reader and falls back to PyPDF2 when it
+    fails or finds a page count that disagrees with the page tree's /Count.
+    Raises PdfIndexError if the file is not a readable PDF.
+    """
+    try:
+        pdf_file, mapping = open_mapped(path)
+    except ValueError:
+        raise PdfIndexError(f"{os.path.basename(path)} is empty.")
+    try:
+        head = mapping[:1024]
+        start = head.find(b'%PDF-')
+        if start < 0:
+            raise PdfIndexError(f"{os.path.basename(path)} is not a PDF file.")
+        version = head[start + 5:start + 8].decode('latin-1', 'replace')
+        fast = True
+        try:
+            pages, encrypted = _index_fast(path, mapping)
+            if not pages:
+                raise PdfIndexError("No pages found in the page tree.")
+        except Exception:
+            fast = False
+            try:
+                pages, encrypted = _index_pypdf2(path, mapping)
+            except Exception as e:
+                raise PdfIndexError(f"Could not read {os.path.basename(path)}: {e}")
+        return PdfIndex(path, len(mapping), version, pages, encrypted, fast)
+    finally:
+        mapping.close()
+        pdf_file.close()
+
+# --- Index Cache ---
+
+class PageIndexCache:
+    """
+    LRU cache of PdfIndex objects keyed by (absolute path, mtime, size).
+
+    Parameters:
+        max_entries (int): Number of indexes to keep.
+        max_pages (int): Upper bound on the pages of all cached indexes together.
+    """
+    def __init__(self, max_entries=64, max_pages=2000000):
+        self.max_entries = max_entries
+        self.max_pages = max_pages
+        self._entries = OrderedDict()
+        self._pages = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        """
+        Return the PdfIndex of a file, building it on a miss.
+        """
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return index
+            self.misses += 1
+        index = build_index(path)  # Outside the lock: other files can be indexed meanwhile
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = index
+                self._pages += index.page_count
+                while self._entries and (len(self._entries) > self.max_entries or self._pages > self.max_pages):
+                    self._pages -= self._entries.popitem(last=False)[1].page_count
+        return index
+
+    def page_count(self, path):
+        """
+        Return the number of pages in a PDF.
+        """
+        return self.get(path).page_count
+
+    def check_range(self, path, start_page, end_page):
+        """
+        Raise PdfIndexError unless start_page..end_page are pages of the PDF.
+        """
+        self.get(path).check_range(start_page, end_page)
+
+    def invalidate(self, path=None):
+        """
+        Drop the index of one file (or everything when path is None).
+        """
+        with self._lock:
+            absolute = os.path.abspath(path) if path is not None else None
+            for key in [k for k in self._entries if absolute is None or k[0] == absolute]:
+                self._pages -= self._entries.pop(key).page_count
+
+    def stats(self):
+        """
+        Return a dict with hits, misses, entries and indexed pages.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'pages': self._pages}
+
+# Shared index used by the tools in this repository
+PAGE_INDEX = PageIndexCache()
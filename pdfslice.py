@@ -13,14 +13,21 @@ Built with ttkbootstrap for a modern, user-friendly interface.
 
 # --- Imports ---
 import os
-import PyPDF2  # For PDF reading and writing
-import ttkbootstrap as tb  # For modern Tkinter GUI
-from ttkbootstrap.constants import *  # Bootstrap style constants
-from tkinter import filedialog, messagebox  # For file dialogs and popups
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from lazyimport import lazy_module  # Heavy backends are imported on first use
+from doccache import DOCUMENT_CACHE  # Parsed PDFs shared between operations
+from pdfindex import PAGE_INDEX  # Page counts and page locations without a full parse
+from instrument import stage, file_size  # Per-stage timing (no-op unless a recording is active)
+
+PyPDF2 = lazy_module('PyPDF2')  # For PDF reading and writing
+tb = lazy_module('ttkbootstrap')  # For modern Tkinter GUI
+filedialog = lazy_module('tkinter.filedialog')  # For file dialogs
+messagebox = lazy_module('tkinter.messagebox')  # For popups
 
 # --- PDF Slicing Logic ---
 
-def slice_pdf(input_pdf, start_page, end_page, output_pdf):
+def slice_pdf(input_pdf, start_page, end_page, output_pdf, progress_callback=None, streaming=False):
     """
     Slices a PDF from start_page to end_page (inclusive) and saves it as output_pdf.
 
@@ -29,31 +36,183 @@ def slice_pdf(input_pdf, start_page, end_page, output_pdf):
         start_page (int): Starting page number (1-based).
         end_page (int): Ending page number (1-based).
         output_pdf (str): Path to save the sliced PDF.
+        progress_callback (callable, optional): Called as progress_callback(done, total)
+            after each page is added.
+        streaming (bool): Memory-map the input and write pages straight to output_pdf
+            one object at a time (see pdfstream). Memory stays near constant, which suits
+            multi-GB inputs; outlines and other document-level data are not copied.
 
     Returns:
         (bool, str): (Success flag, Message)
     """
     try:
-        # Open the input PDF for reading
-        with open(input_pdf, 'rb') as pdf_file:
-            reader = PyPDF2.PdfReader(pdf_file)
+        # Check the range against the page index before any parsing
+        with stage('index'):
+            page_count = PAGE_INDEX.page_count(input_pdf)
+        if start_page < 1 or end_page < start_page:
+            return False, f"Invalid page range {start_page}-{end_page}."
+        if end_page > page_count:
+            return False, f"End page {end_page} is beyond the last page: the PDF has {page_count} pages."
+
+        if streaming:
+            from pdfstream import stream_slice
+            with stage('stream', bytes_read=file_size(input_pdf)) as counts:
+                stream_slice(input_pdf, [(start_page, end_page)], output_pdf, progress_callback)
+                counts['written'] = file_size(output_pdf)
+            return True, f"PDF sliced successfully and saved as:\n{output_pdf}"
+
+        # Get the parsed input PDF (reused if this document was parsed recently)
+        with ExitStack() as stack:
+            with stage('parse', bytes_read=file_size(input_pdf)):
+                reader = stack.enter_context(DOCUMENT_CACHE.open_reader(input_pdf))
             writer = PyPDF2.PdfWriter()
 
             # Add the specified page range to the writer (PyPDF2 uses 0-based indexing)
-            for page_num in range(start_page - 1, end_page):
-                writer.add_page(reader.pages[page_num])
+            with stage('select'):
+                total = end_page - start_page + 1
+                for page_num in range(start_page - 1, end_page):
+                    writer.add_page(reader.pages[page_num])
+                    if progress_callback:
+                        progress_callback(page_num - start_page + 2, total)
 
             # Ensure the output directory exists
             os.makedirs(os.path.dirname(output_pdf), exist_ok=True)
 
             # Write the selected pages to the output PDF
-            with open(output_pdf, 'wb') as output_file:
-                writer.write(output_file)
+            with stage('write') as counts:
+                with open(output_pdf, 'wb') as output_file:
+                    writer.write(output_file)
+                counts['written'] = file_size(output_pdf)
 
         return True, f"PDF sliced successfully and saved as:\n{output_pdf}"
     except Exception as e:
         return False, f"An error occurred: {e}"
 
+# --- Multi-Range Splitting ---
+
+def parse_page_ranges(spec, page_count):
+    """
+    Turn a page range specification into a list of (start, end) tuples (1-based, inclusive).
+
+    Parameters:
+        spec (str or list): Either a string such as "1-10,15,20-end" or "every 10"
+            ("20-" is short for "20-end"),
+            or a list whose items are page numbers or (start, end) pairs.
+        page_count (int): Number of pages in the document ("end" refers to this).
+
+    Returns:
+        list[tuple[int, int]]: The ranges, in the order given.
+
+    Raises:
+        ValueError: If the spec is malformed or a range falls outside the document.
+    """
+    ranges = []
+    if isinstance(spec, str):
+        for part in spec.replace(';', ',').split(','):
+            part = part.strip().lower()
+            if not part:
+                continue
+            if part.startswith('every'):
+                ranges.extend(every_n_pages(int(part[len('every'):]), page_count))
+                continue
+            first, dash, last = (text.strip() for text in part.partition('-'))
+            try:
+                start = page_count if first == 'end' else int(first)
+                # "3-" runs to the last page, like "3-end"
+                end = start if not dash else page_count if last in ('', 'end') else int(last)
+            except ValueError:
+                raise ValueError(f"Malformed page range '{part}'.") from None
+            ranges.append((start, end))
+    else:
+        for item in spec:
+            start, end = (item, item) if isinstance(item, int) else item
+            ranges.append((int(start), int(end)))
+
+    if not ranges:
+        raise ValueError("No page ranges given.")
+    for start, end in ranges:
+        if start < 1 or end < start or end > page_count:
+            raise ValueError(f"Invalid page range {start}-{end} for a document with {page_count} pages.")
+    return ranges
+
+def every_n_pages(n, page_count):
+    """
+    Split a document into consecutive chunks of n pages: [(1, n), (n+1, 2n), ...].
+    """
+    if n < 1:
+        raise ValueError("Chunk size must be at least 1 page.")
+    return [(start, min(start + n - 1, page_count)) for start in range(1, page_count + 1, n)]
+
+def _write_ranges(reader, ranges, output_paths, progress_callback=None):
+    """
+    Write each (start, end) range of an open reader to its output path.
+    Page objects come straight from the one reader and are shared by all outputs.
+    """
+    pages = reader.pages
+    for done, ((start, end), out_path) in enumerate(zip(ranges, output_paths), 1):
+        writer = PyPDF2.PdfWriter()
+        for page_num in range(start - 1, end):
+            writer.add_page(pages[page_num])
+        with open(out_path, 'wb') as output_file:
+            writer.write(output_file)
+        if progress_callback:
+            progress_callback(done, len(ranges))
+
+def _split_worker(input_pdf, ranges, output_paths):
+    """
+    Worker task for concurrent splitting: parse the input once and write a share of the outputs.
+    """
+    with open(input_pdf, 'rb') as pdf_file:
+        _write_ranges(PyPDF2.PdfReader(pdf_file), ranges, output_paths)
+    return output_paths
+
+def split_pdf(input_pdf, ranges, output_folder=None, workers=1, progress_callback=None):
+    """
+    Split one PDF into several outputs, one per page range, parsing the input only once.
+
+    Parameters:
+        input_pdf (str): Path to the input PDF file.
+        ranges (str or list): Range spec accepted by parse_page_ranges,
+            e.g. "1-10,15,20-end", "every 25" or [(1, 10), (11, 20)].
+        output_folder (str, optional): Where to save the outputs (default: next to the input).
+            Files are named <name>_pages_<start>_to_<end>.pdf.
+        workers (int): With workers > 1 the outputs are written concurrently by worker
+            processes; each worker parses the input once for its share of the ranges.
+        progress_callback (callable, optional): Called as progress_callback(done, total)
+            after each output file is written.
+
+    Returns:
+        (bool, str, list): (Success flag, Message, Output paths)
+    """
+    try:
+        base = os.path.splitext(os.path.basename(input_pdf))[0]
+        output_folder = output_folder or os.path.dirname(input_pdf)
+        os.makedirs(output_folder or '.', exist_ok=True)
+
+        ranges = parse_page_ranges(ranges, PAGE_INDEX.page_count(input_pdf))
+        output_paths = [
+            os.path.join(output_folder, f"{base}_pages_{start}_to_{end}.pdf") for start, end in ranges
+        ]
+        if workers <= 1 or len(ranges) == 1:
+            with DOCUMENT_CACHE.open_reader(input_pdf) as reader:
+                _write_ranges(reader, ranges, output_paths, progress_callback)
+
+        if workers > 1 and len(ranges) > 1:
+            # Deal ranges round-robin so every worker gets a similar amount of work
+            workers = min(workers, len(ranges))
+            shares = [(ranges[i::workers], output_paths[i::workers]) for i in range(workers)]
+            done = 0
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_split_worker, input_pdf, r, o) for r, o in shares]
+                for future in as_completed(futures):
+                    done += len(future.result())
+                    if progress_callback:
+                        progress_callback(done, len(ranges))
+
+        return True, f"PDF split into {len(output_paths)} files in:\n{output_folder}", output_paths
+    except Exception as e:
+        return False, f"An error occurred: {e}", []
+
 # --- GUI Class ---
 
 class PDFSliceGUI:
@@ -71,6 +230,7 @@ class PDFSliceGUI:
         self.pdf_path = tb.StringVar()
         self.start_page = tb.StringVar()
         self.end_page = tb.StringVar()
+        self.ranges = tb.StringVar()
 
         # --- PDF file selection row ---
         file_frame = tb.Frame(root)
@@ -90,6 +250,12 @@ class PDFSliceGUI:
         tb.Label(center_frame, text="End Page:").pack(side='left', padx=(5,2))
         tb.Entry(center_frame, textvariable=self.end_page, width=10).pack(side='left', padx=(0,5))
 
+        # --- Optional multi-range input row ---
+        ranges_frame = tb.Frame(root)
+        ranges_frame.pack(pady=5, fill='x')
+        tb.Label(ranges_frame, text="Or Split Into Ranges:").pack(side='left', padx=5)
+        tb.Entry(ranges_frame, textvariable=self.ranges, width=40).pack(side='left', padx=5)
+
         # --- Slice button (rounded, padded, hover effect) ---
         tb.Button(
             root,
@@ -103,10 +269,18 @@ class PDFSliceGUI:
         # --- Info label ---
         info_text = (
             "Select a PDF and enter the start and end page numbers (1-based).\n"
+            "To split into several files at once, enter ranges instead,\n"
+            "e.g. 1-10,15,20-end or every 10.\n"
             "The sliced PDF will be saved in the same folder as the original."
         )
         tb.Label(root, text=info_text, justify='left', foreground='gray').pack(pady=5)
 
+        # --- Background job queue panel ---
+        from jobs import JobPanel  # Imported here: it needs ttkbootstrap at import time
+        self.jobs = JobPanel(root, max_workers=2)
+        self.jobs.pack(pady=5, padx=5, fill='both', expand=True)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
     def browse_pdf(self):
         """
         Open a file dialog for the user to select a PDF file.
@@ -115,20 +289,48 @@ class PDFSliceGUI:
         path = filedialog.askopenfilename(filetypes=[("PDF files", "*.pdf")])
         if path:
             self.pdf_path.set(path)
+            # Suggest the whole document; the page count comes from the page index
+            try:
+                page_count = PAGE_INDEX.page_count(path)
+            except (OSError, ValueError):
+                return
+            self.start_page.set('1')
+            self.end_page.set(str(page_count))
 
     def run_slice(self):
         """
-        Validate user input and perform the PDF slicing operation.
-        Shows success or error messages as appropriate.
+        Validate user input and queue the PDF slicing operation as a background job.
+        Shows success or error messages when the job finishes.
         """
         pdf_path = self.pdf_path.get()
         start = self.start_page.get()
         end = self.end_page.get()
+        ranges = self.ranges.get().strip()
 
         # --- Input validation ---
         if not pdf_path or not os.path.exists(pdf_path):
             messagebox.showerror("Error", "Please select a valid PDF file.")
             return
+
+        try:
+            page_count = PAGE_INDEX.page_count(pdf_path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not read the PDF:\n{e}")
+            return
+
+        # --- Multi-range split ---
+        if ranges:
+            try:
+                parse_page_ranges(ranges, page_count)
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            self.jobs.queue.submit(
+                f"{os.path.basename(pdf_path)} split {ranges}",
+                split_pdf, pdf_path, ranges,
+                on_done=self.on_slice_done
+            )
+            return
         try:
             start_page = int(start)
             end_page = int(end)
@@ -138,18 +340,41 @@ class PDFSliceGUI:
         if start_page < 1 or end_page < start_page:
             messagebox.showerror("Error", "Invalid page range.")
             return
+        if end_page > page_count:
+            messagebox.showerror("Error", f"End page {end_page} is beyond the last page: the PDF has {page_count} pages.")
+            return
 
         # --- Output file path construction ---
         base = os.path.splitext(os.path.basename(pdf_path))[0]
         out_folder = os.path.dirname(pdf_path)
         out_path = os.path.join(out_folder, f"{base}_pages_{start_page}_to_{end_page}.pdf")
 
-        # --- Perform slicing ---
-        success, msg = slice_pdf(pdf_path, start_page, end_page, out_path)
-        if success:
-            messagebox.showinfo("Success", msg)
-        else:
-            messagebox.showerror("Error", msg)
+        # --- Perform slicing in the background ---
+        self.jobs.queue.submit(
+            f"{os.path.basename(pdf_path)} pages {start_page}-{end_page}",
+            slice_pdf, pdf_path, start_page, end_page, out_path,
+            on_done=self.on_slice_done
+        )
+
+    def on_slice_done(self, job):
+        """
+        Called on the UI thread when a background slice finishes.
+        """
+        if job.status == 'failed':
+            messagebox.showerror("Error", str(job.error))
+        elif job.status == 'done':
+            success, msg = job.result[:2]
+            if success:
+                messagebox.showinfo("Success", msg)
+            else:
+                messagebox.showerror("Error", msg)
+
+    def on_close(self):
+        """
+        Stop background jobs and close the window.
+        """
+        self.jobs.queue.shutdown()
+        self.root.destroy()
 
 # --- Main Application Entry Point ---
 
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Constant-Memory PDF Writer
+
+Writes selected pages of existing PDFs straight to an output stream. Each
+page and the objects it needs (contents, fonts, images, ...) are copied one
+object at a time and written immediately, with stream data copied in its
+encoded form, so memory stays close to the size of the largest single object
+instead of growing with the size of the output. The cross-reference table is
+rebuilt from the offsets recorded while writing.
+
+Used by pdfslice.slice_pdf(streaming=True) for very large (multi-GB) inputs.
+
+Limitations: the output keeps pages only (no outlines, forms or other
+document-level catalog entries), links to pages that are not part of the
+output become null, and encrypted inputs are not supported.
+"""
+
+# --- Imports ---
+import os
+import mmap
+from collections import deque
+from lazyimport import lazy_module  # Heavy backends are imported on first use
+
+PyPDF2 = lazy_module('PyPDF2')  # For reading PDF objects
+
+# Page attributes that may be inherited from the page tree (PDF 1.7, section 7.7.3.4)
+INHERITABLE_KEYS = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+# --- Helpers ---
+
+def _indirect_of(page):
+    """
+    Return the IndirectObject of a PyPDF2 PageObject (attribute name differs between versions).
+    An IndirectObject is returned as-is.
+    """
+    if isinstance(page, PyPDF2.generic.IndirectObject):
+        return page
+    ref = getattr(page, 'indirect_reference', None) or getattr(page, 'indirect_ref', None)
+    if ref is None:
+        raise ValueError("Page is not part of a parsed PDF (no indirect reference).")
+    return ref
+
+def _page_type(obj):
+    """
+    Return '/Page', '/Pages' or None for a resolved PDF object.
+    """
+    if isinstance(obj, PyPDF2.generic.DictionaryObject):
+        node_type = obj.get('/Type')
+        if node_type in ('/Page', '/Pages'):
+            return node_type
+    return None
+
+class _CountingStream:
+    """
+    Wraps a binary output stream and counts the bytes written, so offsets
+    are known even for streams that cannot tell() (sockets, pipes).
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = 0
+
+    def write(self, data):
+        self.stream.write(data)
+        self.position += len(data)
+        return len(data)
+
+# --- Streaming Writer ---
+
+class StreamingPdfWriter:
+    """
+    Incrementally writes a PDF made of pages copied from one or more readers.
+
+    Usage:
+        with open(out_path, 'wb') as f, StreamingPdfWriter(f) as writer:
+            writer.add_pages(reader, [reader.pages[0], reader.pages[5]])
+
+    Nothing is buffered apart from the object offsets and the list of page
+    numbers needed for the final page tree and xref table.
+    """
+    CATALOG = 1
+    PAGES_ROOT = 2
+
+    def __init__(self, stream):
+        self.out = _CountingStream(stream)
+        self.offsets = [0, 0, 0]  # index = object number; 1 and 2 are reserved
+        self.kids = []
+        self.closed = False
+        self.out.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+    def _allocate(self):
+        self.offsets.append(0)
+        return len(self.offsets) - 1
+
+    def add_pages(self, reader, pages, progress_callback=None):
+        """
+        Copy pages (PageObjects of reader, or IndirectObjects pointing at
+        page objects) to the output, in order.
+
+        Objects shared between pages (fonts, images) are written once per call.
+        If given, progress_callback(done, total) is called after each page.
+        """
+        if reader.is_encrypted:
+            raise ValueError("Encrypted PDFs are not supported by the streaming writer.")
+
+        page_refs = [_indirect_of(page) for page in pages]
+        refs = {}
+        for ref in page_refs:
+            key = (ref.idnum, ref.generation)
+            if key not in refs:
+                refs[key] = self._allocate()
+        page_keys = set(refs)
+
+        for done, ref in enumerate(page_refs, 1):
+            number = refs[(ref.idnum, ref.generation)]
+            if self.offsets[number]:
+                # Same page selected twice: a page has one /Parent, so write a
+                # second page dictionary that shares the first one's contents
+                number = self._allocate()
+            self.kids.append(number)
+            pending = deque([(number, ref)])
+            while pending:
+                obj_number, obj_ref = pending.popleft()
+                obj = reader.get_object(obj_ref)
+                self._begin_object(obj_number)
+                if (obj_ref.idnum, obj_ref.generation) in page_keys:
+                    self._write_page(obj, refs, page_keys, pending)
+                else:
+                    self._write_value(obj, refs, page_keys, pending)
+                self._end_object()
+            # Let the reader forget the objects it parsed for this page
+            cache = getattr(reader, 'resolved_objects', None)
+            if isinstance(cache, dict):
+                cache.clear()
+            if progress_callback:
+                progress_callback(done, len(page_refs))
+
+    def close(self):
+        """
+        Write the page tree, catalog, xref table and trailer. The underlying
+        stream is left open.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        kids = " ".join(f"{n} 0 R" for n in self.kids)
+        self._begin_object(self.PAGES_ROOT)
+        self.out.write(f"<< /Type /Pages /Count {len(self.kids)} /Kids [ {kids} ] >>".encode('ascii'))
+        self._end_object()
+        self._begin_object(self.CATALOG)
+        self.out.write(f"<< /Type /Catalog /Pages {self.PAGES_ROOT} 0 R >>".encode('ascii'))
+        self._end_object()
+
+        xref_offset = self.out.position
+        lines = [f"xref\n0 {len(self.offsets)}\n", "0000000000 65535 f \n"]
+        lines.extend(f"{offset:010d} 00000 n \n" for offset in self.offsets[1:])
+        lines.append(f"trailer\n<< /Size {len(self.offsets)} /Root {self.CATALOG} 0 R >>\n")
+        lines.append(f"startxref\n{xref_offset}\n%%EOF\n")
+        self.out.write("".join(lines).encode('ascii'))
+
+    # --- Object serialization ---
+
+    def _begin_object(self, number):
+        self.offsets[number] = self.out.position
+        self.out.write(f"{number} 0 obj\n".encode('ascii'))
+
+    def _end_object(self):
+        self.out.write(b"\nendobj\n")
+
+    def _ref(self, indirect, refs, page_keys, pending):
+        """
+        Return the output object number for an indirect reference (None for
+        references that must not be copied), queueing new objects.
+        """
+        key = (indirect.idnum, indirect.generation)
+        number = refs.get(key)
+        if number is not None:
+            return number
+        # Never pull in other pages or the source page tree through links or /Parent entries
+        if _page_type(indirect.get_object()) is not None:
+            return None
+        number = refs[key] = self._allocate()
+        pending.append((number, indirect))
+        return number
+
+    def _write_page(self, page, refs, page_keys, pending):
+        """
+        Write a page dictionary, pointing it at the new page tree and
+        copying inherited attributes that only exist on its old ancestors.
+        """
+        entries = {key: value for key, value in dict.items(page) if key != '/Parent'}
+        parent = page['/Parent'] if '/Parent' in page else None
+        while parent is not None and any(key not in entries for key in INHERITABLE_KEYS):
+            for key in INHERITABLE_KEYS:
+                if key not in entries and key in parent:
+                    entries[PyPDF2.generic.NameObject(key)] = dict.__getitem__(parent, key)
+            parent = parent['/Parent'] if '/Parent' in parent else None
+        self.out.write(b"<<")
+        for key, value in entries.items():
+            self.out.write(b"\n")
+            key.write_to_stream(self.out, None)
+            self.out.write(b" ")
+            self._write_value(value, refs, page_keys, pending)
+        self.out.write(f"\n/Parent {self.PAGES_ROOT} 0 R\n>>".encode('ascii'))
+
+    def _write_value(self, obj, refs, page_keys, pending):
+        generic = PyPDF2.generic
+        if obj is None:
+            self.out.write(b"null")  # Dangling reference in the source file
+        elif isinstance(obj, generic.IndirectObject):
+            number = self._ref(obj, refs, page_keys, pending)
+            self.out.write(b"null" if number is None else f"{number} 0 R".encode('ascii'))
+        elif isinstance(obj, generic.StreamObject):
+            data = obj._data  # Raw, still-encoded bytes: no decode/re-encode round trip
+            self.out.write(b"<<")
+            for key, value in dict.items(obj):
+                if key == '/Length':
+                    continue
+                self.out.write(b"\n")
+                key.write_to_stream(self.out, None)
+                self.out.write(b" ")
+                self._write_value(value, refs, page_keys, pending)
+            self.out.write(f"\n/Length {len(data)}\n>>\nstream\n".encode('ascii'))
+            self.out.write(data)
+            self.out.write(b"\nendstream")
+        elif isinstance(obj, generic.DictionaryObject):
+            self.out.write(b"<<")
+            for key, value in dict.items(obj):
+                self.out.write(b"\n")
+                key.write_to_stream(self.out, None)
+                self.out.write(b" ")
+                self._write_value(value, refs, page_keys, pending)
+            self.out.write(b"\n>>")
+        elif isinstance(obj, generic.ArrayObject):
+            self.out.write(b"[")
+            for item in list.__iter__(obj):
+                self.out.write(b" ")
+                self._write_value(item, refs, page_keys, pending)
+            self.out.write(b" ]")
+        else:
+            obj.write_to_stream(self.out, None)
+
+# --- Memory-Mapped Slicing ---
+
+def open_mapped(input_pdf):
+    """
+    Memory-map a PDF for reading. Returns (file, mapping); close both when done.
+    The operating system pages the file in on demand instead of Python reading it.
+    """
+    pdf_file = open(input_pdf, 'rb')
+    try:
+        mapping = mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except Exception:
+        pdf_file.close()
+        raise
+    return pdf_file, mapping
+
+def stream_slice(input_pdf, ranges, output_pdf, progress_callback=None):
+    """
+    Copy the given (start, end) page ranges (1-based, inclusive) of input_pdf
+    to output_pdf with constant memory. Returns the number of pages written.
+
+    Pages are located through the page index (see pdfindex), so the reader
+    never has to load the whole page tree. Raises pdfindex.PdfIndexError
+    for ranges outside the document.
+    """
+    from pdfindex import PAGE_INDEX  # pdfindex itself imports this module
+    index = PAGE_INDEX.get(input_pdf)
+    for start, end in ranges:
+        index.check_range(start, end)
+    pdf_file, mapping = open_mapped(input_pdf)
+    try:
+        reader = PyPDF2.PdfReader(mapping)
+        selected = [PyPDF2.generic.IndirectObject(page.ref[0], page.ref[1], reader)
+                    for start, end in ranges for page in index.pages[start - 1:end]]
+        os.makedirs(os.path.dirname(output_pdf) or '.', exist_ok=True)
+        with open(output_pdf, 'wb') as output_file:
+            with StreamingPdfWriter(output_file) as writer:
+                writer.add_pages(reader, selected, progress_callback)
+        return len(selected)
+    finally:
+        mapping.close()
+        pdf_file.close()
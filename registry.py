@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Converter Registry and Routing
+
+Each converter declares the format it reads, the formats it writes and a
+relative cost. For a requested pair the registry finds the cheapest chain of
+converters (Dijkstra over the formats), so pairs without a direct converter,
+such as PNG to DOCX (PNG → PDF → DOCX), still work. Intermediate files live in
+a temporary folder that is removed when the chain finishes.
+
+Converters that can write several files (e.g. one image per PDF page) are
+only used as the last step of a chain.
+"""
+
+# --- Imports ---
+import os
+import heapq
+import tempfile
+
+from instrument import stage  # Per-stage timing (no-op unless a recording is active)
+
+# --- Converter Record ---
+
+class Converter:
+    """
+    One registered conversion step.
+
+    func(input_path, output_path, output_format, progress_callback, options)
+    performs the step and returns the list of files it wrote.
+    """
+    def __init__(self, func, source, target, cost=1.0, multi_output=False, name=None):
+        self.func = func
+        self.source = source
+        self.target = target
+        self.cost = cost
+        self.multi_output = multi_output
+        self.name = name or func.__name__
+
+    def __repr__(self):
+        return f"<Converter {self.name}: {self.source} → {self.target} (cost {self.cost})>"
+
+# --- Registry ---
+
+class ConverterRegistry:
+    """
+    Collection of converters with cost-aware routing between formats.
+    """
+    def __init__(self):
+        self._edges = {}  # source format -> [Converter], in registration order
+
+    def register(self, source, targets, cost=1.0, multi_output=False, name=None):
+        """
+        Decorator registering func as a converter from source to each of targets.
+
+        Usage:
+            @registry.register('pdf', ['docx'], cost=10)
+            def pdf_to_docx_step(input_path, output_path, output_format, progress_callback, options):
+                ...
+        """
+        def decorator(func):
+            for target in targets:
+                self.add(Converter(func, source, target, cost, multi_output, name))
+            return func
+        return decorator
+
+    def add(self, converter):
+        """
+        Register a Converter. A later converter for the same pair replaces the earlier one.
+        """
+        edges = self._edges.setdefault(converter.source, [])
+        edges[:] = [c for c in edges if c.target != converter.target]
+        edges.append(converter)
+
+    def direct(self, source):
+        """
+        Return the converters reading source, in registration order.
+        """
+        return list(self._edges.get(source, []))
+
+    def route(self, source, target):
+        """
+        Return the cheapest list of Converters turning source into target,
+        or None if there is no chain. A converter with several outputs is only
+        ever the last step.
+        """
+        routes = self._shortest_routes(source)
+        return routes.get(target, (None, None))[1]
+
+    def _shortest_routes(self, source):
+        """
+        Dijkstra from source: {format: (cost, [Converter, ...])} for every reachable format.
+        """
+        best = {}
+        queue = [(0.0, 0, source, [])]
+        counter = 1  # Tie-breaker, so heapq never compares converter lists
+        while queue:
+            cost, _, fmt, path = heapq.heappop(queue)
+            if fmt in best:
+                continue
+            best[fmt] = (cost, path)
+            if path and path[-1].multi_output:
+                continue  # Several output files cannot feed another step
+            for converter in self._edges.get(fmt, []):
+                if converter.target not in best:
+                    heapq.heappush(queue, (cost + converter.cost, counter, converter.target, path + [converter]))
+                    counter += 1
+        del best[source]
+        return best
+
+    def targets(self, source):
+        """
+        Return every format reachable from source: direct targets first (in
+        registration order), then the others from cheapest to most expensive.
+        """
+        routes = self._shortest_routes(source)
+        direct = [c.target for c in self._edges.get(source, []) if c.target in routes]
+        chained = sorted((fmt for fmt in routes if fmt not in direct), key=lambda fmt: (routes[fmt][0], fmt))
+        return direct + chained
+
+    def conversion_map(self, sources):
+        """
+        Build a CONVERSION_MAP-style dict {source: [targets]} for the given sources.
+        """
+        return {source: self.targets(source) for source in sources}
+
+    def convert(self, input_path, output_path, source, target, progress_callback=None, options=None):
+        """
+        Convert input_path along the cheapest route from source to target.
+
+        Intermediate results are written to a temporary folder. options go to
+        the last step, which produces the requested output; earlier steps run
+        with their defaults. Every step reports progress through
+        progress_callback, scaled so that each step covers an equal share of
+        the whole chain (see _step_progress); exceptions the callback raises,
+        such as a job cancellation, stop the chain at any step.
+        Returns the list of files written. Raises LookupError if there is no route.
+        """
+        route = self.route(source, target)
+        if route is None:
+            raise LookupError(f"No conversion route from {source} to {target}.")
+        if len(route) == 1:
+            return route[0].func(input_path, output_path, target, progress_callback, options or {})
+
+        # Chains are recorded with one stage per step, e.g. "png->pdf/embed"
+        base = os.path.splitext(os.path.basename(output_path))[0]
+        with tempfile.TemporaryDirectory(prefix='file-tools-') as tmp_dir:
+            current = input_path
+            for index, step in enumerate(route[:-1]):
+                intermediate = os.path.join(tmp_dir, f"{base}.{step.target}")
+                with stage(f"{step.source}->{step.target}"):
+                    step.func(current, intermediate, step.target,
+                              _step_progress(progress_callback, index, len(route)), {})
+                if progress_callback:
+                    progress_callback(index + 1, len(route))  # Also covers steps that report nothing
+                current = intermediate
+            last = route[-1]
+            with stage(f"{last.source}->{last.target}"):
+                return last.func(current, output_path, target,
+                                 _step_progress(progress_callback, len(route) - 1, len(route)), options or {})
+
+def _step_progress(progress_callback, index, count):
+    """
+    Wrap progress_callback for step index of a count-step chain: a step's
+    (done, total) becomes (index * total + done, count * total), i.e. the
+    step's progress mapped into its share of the chain.
+    """
+    if progress_callback is None:
+        return None
+
+    def report(done, total):
+        if total:
+            progress_callback(index * total + done, count * total)
+        else:
+            progress_callback(index, count)
+    return report
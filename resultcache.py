@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Content-Addressed Conversion Result Cache
+
+Stores the outputs of finished conversions on disk, keyed by a hash of the
+input file's content, the conversion pair, the conversion options and the
+converter chain and backend library versions that produced them. When
+the same input is converted again the stored outputs are copied (or
+hard-linked) into place instead of running the converter.
+
+The cache has a size limit with least-recently-used eviction and keeps
+hit/miss/bytes-saved counters for the batch engine and the GUI. The cache
+folder is scanned once, when a ResultCache is created; after that entry
+sizes and recency are tracked in memory.
+"""
+
+# --- Imports ---
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Bump when the stored layout or the meaning of outputs changes
+CACHE_VERSION = 1
+
+# Libraries whose version is part of every cache key, so an upgrade that
+# changes their output does not serve results made by the old version
+BACKEND_PACKAGES = ['Pillow', 'img2pdf', 'pdf2image', 'PyPDF2', 'openpyxl', 'pdf2docx']
+
+# --- Helpers ---
+
+def default_cache_dir():
+    """
+    Return the default cache folder: $FILE_TOOLS_CACHE, else the user's local cache folder.
+    """
+    if os.environ.get('FILE_TOOLS_CACHE'):
+        return os.environ['FILE_TOOLS_CACHE']
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'file-tools', 'results')
+
+def file_digest(path, block_size=1024 * 1024):
+    """
+    Return the SHA-256 hex digest of a file's content.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+_BACKEND_VERSIONS = None
+
+def backend_versions():
+    """
+    Return {package: version} for BACKEND_PACKAGES (None when not installed).
+    Read from package metadata, so the backends themselves are not imported.
+    """
+    global _BACKEND_VERSIONS
+    if _BACKEND_VERSIONS is None:
+        from importlib import metadata
+        versions = {}
+        for name in BACKEND_PACKAGES:
+            try:
+                versions[name] = metadata.version(name)
+            except metadata.PackageNotFoundError:
+                versions[name] = None
+        _BACKEND_VERSIONS = versions
+    return _BACKEND_VERSIONS
+
+# --- Result Cache ---
+
+class ResultCache:
+    """
+    On-disk cache of conversion outputs.
+
+    Each entry is a folder <root>/<key[:2]>/<key>/ holding the output files and
+    a manifest.json. The manifest's modification time is the entry's last use:
+    it orders the in-memory LRU index built at start-up, which drives eviction
+    once the cache grows beyond max_bytes. Entries written by other processes
+    after start-up are not counted until the next start-up.
+
+    Parameters:
+        root (str, optional): Cache folder (default: default_cache_dir()).
+        max_bytes (int): Size limit for all stored outputs.
+        use_hardlinks (bool): Restore outputs as hard links instead of copies.
+            Faster and uses no extra disk space, but the restored file shares
+            its data with the cache entry, so editing it in place would also
+            change the cached copy. Falls back to copying across file systems.
+    """
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, root=None, max_bytes=2 * 1024 * 1024 * 1024, use_hardlinks=False):
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.use_hardlinks = use_hardlinks
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        os.makedirs(self.root, exist_ok=True)
+        self._index = OrderedDict()  # key -> stored bytes, least recently used first
+        self._total = 0
+        for _, size, key in sorted(self._scan()):
+            self._index[key] = size
+            self._total += size
+
+    def key_for(self, input_path, input_format, output_format, options=None, converter=None):
+        """
+        Return the cache key for converting input_path with the given pair and options.
+        converter names the converter chain (e.g. "_image_pdf_step>_pdf_docx_step");
+        CACHE_VERSION and backend_versions() are always included.
+        """
+        payload = json.dumps({
+            'content': file_digest(input_path),
+            'pair': [input_format.lower(), output_format.lower()],
+            'options': options or {},
+            'converter': converter,
+            'version': CACHE_VERSION,
+            'backends': backend_versions(),
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def fetch(self, key, output_path):
+        """
+        Restore a cached result for key. Returns the restored paths, or None on a miss.
+
+        A single stored output is restored to output_path; several outputs
+        (e.g. the pages of a PDF) are restored into output_path's folder under
+        their stored names. An entry removed while it is being restored (by
+        another process's eviction) counts as a miss.
+        """
+        entry = self._entry_dir(key)
+        manifest_path = os.path.join(entry, self.MANIFEST)
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return self._miss(key)
+
+        names = manifest['outputs']
+        folder = os.path.dirname(output_path) or '.'
+        targets = [output_path] if len(names) == 1 else [os.path.join(folder, name) for name in names]
+        os.makedirs(folder, exist_ok=True)
+        restored_bytes = 0
+        try:
+            for name, target in zip(names, targets):
+                restored_bytes += self._restore(os.path.join(entry, name), target)
+            os.utime(manifest_path)  # Mark as recently used (for the next start-up)
+        except FileNotFoundError:
+            return self._miss(key)
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += restored_bytes
+            if key in self._index:
+                self._index.move_to_end(key)
+        return targets
+
+    def _miss(self, key):
+        with self._lock:
+            self.misses += 1
+            self._total -= self._index.pop(key, 0)
+        return None
+
+    def _restore(self, source, target):
+        if os.path.abspath(source) == os.path.abspath(target):
+            return os.path.getsize(source)
+        if os.path.exists(target):
+            os.remove(target)
+        if self.use_hardlinks:
+            try:
+                os.link(source, target)
+                return os.path.getsize(target)
+            except OSError:
+                pass  # Different file system or links not supported: copy instead
+        shutil.copyfile(source, target)
+        return os.path.getsize(target)
+
+    def store(self, key, outputs, output_path):
+        """
+        Save the outputs of a conversion under key, then evict old entries if needed.
+        Outputs must live in output_path's folder (as all converters write them).
+        """
+        entry = self._entry_dir(key)
+        if os.path.exists(os.path.join(entry, self.MANIFEST)):
+            return
+        folder = os.path.dirname(output_path) or '.'
+        names = [os.path.relpath(path, folder) for path in outputs]
+        if any(name.startswith('..') for name in names):
+            return  # Output outside the expected folder: do not cache
+        size = sum(os.path.getsize(path) for path in outputs)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.dirname(entry))
+        try:
+            for name, path in zip(names, outputs):
+                target = os.path.join(staging, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(path, target)
+            with open(os.path.join(staging, self.MANIFEST), 'w', encoding='utf-8') as f:
+                json.dump({'outputs': names}, f)
+            os.rename(staging, entry)  # Atomic: readers never see a half-written entry
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)  # Lost a race with another writer, or disk full
+            return
+        with self._lock:
+            if key not in self._index:
+                self._index[key] = size
+                self._total += size
+        self.evict()
+
+    def _scan(self):
+        """
+        Return (last_used, size, key) for every entry on disk (start-up only).
+        """
+        entries = []
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                manifest = os.path.join(entry.path, self.MANIFEST)
+                if entry.name.startswith('.') or not os.path.exists(manifest):
+                    continue
+                size = 0
+                for folder, _, files in os.walk(entry.path):
+                    size += sum(os.path.getsize(os.path.join(folder, name)) for name in files)
+                size -= os.path.getsize(manifest)
+                entries.append((os.path.getmtime(manifest), size, entry.name))
+        return entries
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+        """
+        victims = []
+        with self._lock:
+            while self._index and self._total > self.max_bytes:
+                key, size = self._index.popitem(last=False)
+                self._total -= size
+                self.evictions += 1
+                victims.append(key)
+        for key in victims:
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def clear(self):
+        """
+        Delete every cached entry.
+        """
+        with self._lock:
+            self._index.clear()
+            self._total = 0
+        for shard in os.scandir(self.root):
+            if shard.is_dir():
+                shutil.rmtree(shard.path, ignore_errors=True)
+
+    def stats(self):
+        """
+        Return a dict with hits, misses, bytes_saved, evictions, entries and bytes.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bytes_saved': self.bytes_saved,
+                'evictions': self.evictions,
+                'entries': len(self._index),
+                'bytes': self._total,
+            }
@@ -0,0 +1,508 @@
+# -*- coding: utf-8 -*-
+"""
+Local Conversion Service
+
+A long-running HTTP service (on localhost or a UNIX socket) that accepts
+conversion and slicing jobs and runs them in a pool of warm worker
+processes, so the heavy backends (Pillow, PyPDF2, pdf2docx, ...) are
+imported once per worker instead of once per job.
+
+Jobs beyond the worker count wait in a bounded queue; when the queue is
+full the service answers 503 with a Retry-After header instead of piling
+up work. Results are streamed back in the response body (a ZIP archive
+when a conversion writes several files).
+
+Endpoints:
+    POST /convert?to=pdf&name=scan.png[&options={"quality": 85}]   body: the input file
+         (options are limited to the keys in CONVERT_OPTIONS for the conversion's last step)
+    POST /slice?start=1&end=10[&streaming=1]                       body: the input PDF
+    GET  /metrics    queue depth, running jobs, counters and latency percentiles (JSON)
+    GET  /health
+
+Example:
+    python service.py --port 8765 --workers 4
+    curl --data-binary @scan.png "http://127.0.0.1:8765/convert?to=pdf&name=scan.png" -o scan.pdf
+"""
+
+# --- Imports ---
+import os
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import tempfile
+import threading
+import socketserver
+import multiprocessing
+from collections import deque
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+# Backends imported by every worker at start-up (GUI toolkits are left out)
+WARM_BACKENDS = ['PIL.Image', 'img2pdf', 'pdf2image', 'PyPDF2', 'openpyxl', 'pdf2docx']
+
+COPY_CHUNK = 1024 * 1024
+
+# Client options accepted by /convert, per converter step (the last step of
+# the route receives them); anything else is rejected with 400
+_IMAGE_OPTIONS = {'quality', 'optimize', 'progressive', 'max_size', 'dpi', 'max_bytes'}
+CONVERT_OPTIONS = {
+    '_image_step': _IMAGE_OPTIONS,
+    '_copy_jpeg_step': _IMAGE_OPTIONS,
+    '_image_pdf_step': {'png_mode', 'quality', 'max_page_bytes'},
+    '_pdf_images_step': {'dpi', 'max_size', 'chunk_size'},
+    '_pdf_docx_step': {'start_page', 'end_page', 'pages'},
+    '_office_pdf_step': set(),
+    '_excel_csv_step': {'sheet', 'all_sheets'},
+}
+
+# --- Worker Process Side ---
+
+def _warm_worker():
+    """
+    Process-pool initializer: import the converters and their backends once.
+    """
+    import convertor  # noqa: F401  (registers the lazy backends)
+    import pdfslice  # noqa: F401
+    from lazyimport import preload
+    preload(WARM_BACKENDS)
+
+def _run_convert(input_path, output_path, output_format, options):
+    """
+    Worker task: convert one file. Returns the list of files written.
+    """
+    from convertor import convert_file
+    return convert_file(input_path, output_path, output_format, **options)
+
+def _run_slice(input_path, start_page, end_page, output_path, streaming):
+    """
+    Worker task: slice one PDF. Returns [output_path]; raises on failure.
+    """
+    from pdfslice import slice_pdf
+    success, msg = slice_pdf(input_path, start_page, end_page, output_path, streaming=streaming)
+    if not success:
+        raise ValueError(msg)
+    return [output_path]
+
+# --- Service Core ---
+
+class ServiceBusy(Exception):
+    """
+    Raised when the job queue is full; reported to clients as 503.
+    """
+
+class JobTimeout(Exception):
+    """
+    Raised when a job does not finish within job_timeout; reported as 504.
+    The job keeps its worker (and its slot) until it actually finishes.
+    """
+
+class ConversionService:
+    """
+    Worker pool plus a bounded queue and metrics.
+
+    Parameters:
+        workers (int): Worker processes (maximum number of jobs running at once).
+        max_queue (int): Jobs allowed to wait for a worker; further jobs are rejected.
+        job_timeout (float): Seconds a client waits for a job's result.
+        work_dir (str, optional): Folder for uploads and results (default: a temp folder).
+    """
+    def __init__(self, workers=None, max_queue=16, job_timeout=600.0, work_dir=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix='file-tools-service-')
+        self.pool = self._new_pool()
+        self._slots = threading.BoundedSemaphore(self.workers + max_queue)  # Running + waiting jobs
+        self._run_slots = threading.Semaphore(self.workers)
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.pool_restarts = 0
+        self._detached = set()  # Job folders still in use by timed-out jobs
+        self.latencies = deque(maxlen=1000)  # (wait seconds, run seconds) of recent jobs
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+
+    def _replace_pool(self, broken):
+        """
+        Swap in a new worker pool after a worker crashed (BrokenProcessPool).
+        Only the first caller that sees a given broken pool replaces it.
+        """
+        with self._lock:
+            if self.pool is not broken:
+                return
+            self.pool = self._new_pool()
+            self.pool_restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, func, args):
+        """
+        Submit a job, replacing the pool once if it is already broken.
+        Returns (pool, future).
+        """
+        pool = self.pool
+        try:
+            return pool, pool.submit(func, *args)
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+            pool = self.pool
+            return pool, pool.submit(func, *args)
+
+    def warm_up(self):
+        """
+        Start every worker process now instead of on the first request.
+        """
+        for future in [self.pool.submit(time.sleep, 0) for _ in range(self.workers)]:
+            future.result()
+
+    def run(self, func, *args, job_dir=None):
+        """
+        Run func(*args) in the pool and return its result.
+
+        At most `workers` jobs are handed to the pool at once; the others wait
+        here, in the calling request thread, which is what queue_depth counts.
+        Raises ServiceBusy if max_queue jobs are already waiting, and JobTimeout
+        if the job takes longer than job_timeout. A timed-out job keeps its slot
+        until the worker finishes it, and its job_dir is only removed then (see
+        discard). A job whose worker crashes fails with RuntimeError and the
+        pool is rebuilt for the next jobs.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ServiceBusy("Too many jobs waiting; try again later.")
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+        self._run_slots.acquire()
+        started = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        detached = False
+        try:
+            pool, future = self._submit(func, args)
+            try:
+                result = future.result(timeout=self.job_timeout)
+            except FutureTimeout:
+                detached = True
+                with self._lock:
+                    self.timed_out += 1
+                    if job_dir:
+                        self._detached.add(job_dir)
+                future.add_done_callback(lambda _: self._finish(job_dir))
+                raise JobTimeout(f"The job did not finish within {self.job_timeout:g} seconds.")
+            except BrokenProcessPool:
+                self._replace_pool(pool)
+                raise RuntimeError("A worker process crashed while running this job.")
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            if not detached:
+                self._finish(None)
+        with self._lock:
+            self.completed += 1
+            self.latencies.append((started - submitted, time.perf_counter() - started))
+        return result
+
+    def _finish(self, job_dir):
+        """
+        Release a job's slots (and, for a timed-out job, remove its folder).
+        """
+        with self._lock:
+            self.running -= 1
+            self._detached.discard(job_dir)
+        self._run_slots.release()
+        self._slots.release()
+        if job_dir:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    def discard(self, job_dir):
+        """
+        Remove a request's job folder, unless a timed-out job still uses it.
+        """
+        with self._lock:
+            if job_dir in self._detached:
+                return
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+    def metrics(self):
+        """
+        Return queue depth, counters and latency percentiles (milliseconds).
+        """
+        with self._lock:
+            latencies = list(self.latencies)
+            metrics = {
+                'workers': self.workers,
+                'queue_depth': self.queued,
+                'queue_limit': self.max_queue,
+                'running': self.running,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'pool_restarts': self.pool_restarts,
+                'uptime_seconds': round(time.time() - self.started, 1),
+            }
+        for name, values in (('wait_ms', [w for w, _ in latencies]),
+                             ('run_ms', [r for _, r in latencies]),
+                             ('total_ms', [w + r for w, r in latencies])):
+            metrics[name] = _percentiles(values)
+        return metrics
+
+    def shutdown(self):
+        """
+        Stop the worker processes and remove the work folder.
+        """
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+def _percentiles(values):
+    """
+    Return p50/p95/p99/max of a list of seconds, in milliseconds.
+    """
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None, 'max': None}
+    ordered = sorted(values)
+
+    def pick(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 1)
+
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99), 'max': round(ordered[-1] * 1000, 1)}
+
+# --- HTTP Front End ---
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    Translates HTTP requests into ConversionService jobs.
+    """
+    server_version = 'file-tools-service/1.0'
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else 'unix-socket'
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    # --- Responses ---
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, indent=2).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, path, content_type, download_name):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(os.path.getsize(path)))
+        self.send_header('Content-Disposition', f'attachment; filename="{download_name}"')
+        self.end_headers()
+        with open(path, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile, COPY_CHUNK)
+
+    def _send_outputs(self, outputs, job_dir, base_name):
+        """
+        Stream one output file as-is, or several as a ZIP archive.
+        """
+        if len(outputs) == 1:
+            ext = os.path.splitext(outputs[0])[1]
+            self._send_file(outputs[0], _content_type(ext), f"{base_name}{ext}")
+            return
+        archive = os.path.join(job_dir, 'outputs.zip')
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_STORED) as zf:  # Outputs are compressed formats already
+            for path in outputs:
+                zf.write(path, os.path.basename(path))
+        self._send_file(archive, 'application/zip', f"{base_name}.zip")
+
+    # --- Requests ---
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/metrics':
+            self._send_json(200, self.service.metrics())
+        elif path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f"Unknown endpoint: {path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path not in ('/convert', '/slice'):
+            self._send_json(404, {'error': f"Unknown endpoint: {url.path}"})
+            return
+        job_dir = tempfile.mkdtemp(dir=self.service.work_dir)
+        try:
+            if url.path == '/convert':
+                self._handle_convert(params, job_dir)
+            else:
+                self._handle_slice(params, job_dir)
+        except ServiceBusy as e:
+            self._send_json(503, {'error': str(e)}, {'Retry-After': '1'})
+        except JobTimeout as e:
+            self._send_json(504, {'error': str(e)})
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+        finally:
+            self.service.discard(job_dir)
+
+    def _receive_upload(self, job_dir, name):
+        """
+        Stream the request body to job_dir/name without holding it in memory.
+        """
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            raise ValueError("Request body (the input file) is empty.")
+        path = os.path.join(job_dir, 'in', os.path.basename(name))
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            remaining = length
+            while remaining:
+                chunk = self.rfile.read(min(COPY_CHUNK, remaining))
+                if not chunk:
+                    raise ValueError("Upload ended early.")
+                f.write(chunk)
+                remaining -= len(chunk)
+        return path
+
+    def _handle_convert(self, params, job_dir):
+        from convertor import UnsupportedFormatError
+
+        output_format = params['to'].lower()
+        name = params.get('name') or 'input'
+        if not os.path.splitext(name)[1]:
+            raise ValueError("'name' must include the input file's extension, e.g. name=scan.png")
+        options = _check_options(name, output_format, json.loads(params.get('options') or '{}'))
+        input_path = self._receive_upload(job_dir, name)
+        base = os.path.splitext(os.path.basename(name))[0]
+        output_path = os.path.join(job_dir, 'out', f"{base}.{output_format}")
+        os.makedirs(os.path.dirname(output_path))
+        try:
+            outputs = self.service.run(_run_convert, input_path, output_path, output_format, options,
+                                       job_dir=job_dir)
+        except UnsupportedFormatError as e:
+            raise ValueError(str(e))
+        self._send_outputs(outputs, job_dir, base)
+
+    def _handle_slice(self, params, job_dir):
+        start_page = int(params['start'])
+        end_page = int(params['end'])
+        streaming = params.get('streaming', '0').lower() in ('1', 'true', 'yes')
+        input_path = self._receive_upload(job_dir, params.get('name') or 'input.pdf')
+        output_path = os.path.join(job_dir, 'out', 'slice.pdf')
+        outputs = self.service.run(_run_slice, input_path, start_page, end_page, output_path, streaming,
+                                   job_dir=job_dir)
+        self._send_outputs(outputs, job_dir, f"pages_{start_page}-{end_page}")
+
+def _check_options(name, output_format, options):
+    """
+    Validate client options for a conversion against CONVERT_OPTIONS.
+    Raises ValueError (400) for unsupported pairs or options.
+    """
+    from convertor import REGISTRY
+
+    if not isinstance(options, dict):
+        raise ValueError("'options' must be a JSON object.")
+    input_format = os.path.splitext(name)[1][1:].lower()
+    route = REGISTRY.route(input_format, output_format)
+    if route is None:
+        raise ValueError(f"Conversion from {input_format.upper()} to {output_format.upper()} is not supported.")
+    allowed = CONVERT_OPTIONS.get(route[-1].name, set())
+    unknown = sorted(set(options) - allowed)
+    if unknown:
+        raise ValueError(f"Unsupported options for {input_format} to {output_format}: {', '.join(unknown)}"
+                         f" (allowed: {', '.join(sorted(allowed)) or 'none'}).")
+    return options
+
+def _content_type(ext):
+    """
+    Return the MIME type for an output extension.
+    """
+    return {
+        '.pdf': 'application/pdf',
+        '.png': 'image/png',
+        '.jpg': 'image/jpeg',
+        '.jpeg': 'image/jpeg',
+        '.csv': 'text/csv',
+        '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    }.get(ext.lower(), 'application/octet-stream')
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    HTTP server on a UNIX domain socket (one thread per connection).
+    """
+    daemon_threads = True
+
+def make_server(service, host='127.0.0.1', port=8765, socket_path=None, quiet=False):
+    """
+    Create (but do not start) the HTTP server for a ConversionService.
+    With socket_path the server listens on a UNIX socket instead of host:port.
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)  # Left over from a previous run
+        server = ThreadingUnixHTTPServer(socket_path, ServiceHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.service = service
+    server.quiet = quiet
+    return server
+
+# --- Command-Line Entry Point ---
+
+def main(argv=None):
+    """
+    Parse command-line arguments and serve until interrupted (Ctrl+C).
+    """
+    parser = argparse.ArgumentParser(description="Run the local conversion service.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("--socket", metavar="PATH", help="Listen on a UNIX socket instead of TCP")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--max-queue", type=int, default=16, help="Jobs allowed to wait before requests get 503")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds to wait for one job")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not log requests")
+    args = parser.parse_args(argv)
+
+    service = ConversionService(args.workers, args.max_queue, args.timeout)
+    service.warm_up()
+    server = make_server(service, args.host, args.port, args.socket, args.quiet)
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"Serving on {where} with {service.workers} workers (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental Folder Sync
+
+Keeps an output folder in step with an input folder: only files that were
+added or changed since the last run are converted, and outputs whose source
+file was deleted are removed. A small state index (path, mtime, size, hash
+and the outputs produced) is stored in the output folder, so a rerun over
+an unchanged tree only has to stat every file. Files that failed to convert
+are recorded too, and are only retried once they change.
+
+Example:
+    python sync.py scans/ converted/ -t pdf -t xlsx=csv --watch
+"""
+
+# --- Imports ---
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+
+from convertor import CONVERSION_MAP
+from batch import ConversionResult, output_paths_for, run_batch
+from resultcache import file_digest
+
+STATE_FILE = '.file-tools-sync.json'
+
+# --- Target Formats ---
+
+def parse_targets(specs):
+    """
+    Turn target specs into an {input_format: output_format} map.
+
+    A plain format ("pdf") applies to every input type that can be converted
+    to it; "xlsx=csv" sets the target for one input type. Later specs win.
+    """
+    targets = {}
+    for spec in specs:
+        spec = spec.lower().lstrip('.')
+        if '=' in spec:
+            source, target = (part.strip().lstrip('.') for part in spec.split('=', 1))
+            if target not in CONVERSION_MAP.get(source, []):
+                raise ValueError(f"No conversion from '{source}' to '{target}'.")
+            targets[source] = target
+        else:
+            for source, outputs in CONVERSION_MAP.items():
+                if spec in outputs:
+                    targets[source] = spec
+    if not targets:
+        raise ValueError("No input type can be converted to the requested format(s).")
+    return targets
+
+# --- State Index ---
+
+def load_state(state_path):
+    """
+    Read the sync index ({relative source path: record}); empty if missing or unreadable.
+    """
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state_path, state):
+    """
+    Write the sync index atomically (a crash never leaves a truncated index).
+    """
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp_path, state_path)
+
+def scan_sources(src, targets, skip_dir=None):
+    """
+    Walk src and return {relative path: os.stat_result} for every file with a target format.
+    skip_dir (the output folder, if it is inside src) is not descended into.
+    """
+    found = {}
+    skip_dir = os.path.abspath(skip_dir) if skip_dir else None
+    stack = [src]
+    while stack:
+        folder = stack.pop()
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if os.path.abspath(entry.path) != skip_dir:
+                        stack.append(entry.path)
+                elif entry.is_file():
+                    ext = os.path.splitext(entry.name)[1][1:].lower()
+                    if ext in targets:
+                        found[os.path.relpath(entry.path, src)] = entry.stat()
+    return found
+
+def _remove_outputs(dst, rel_outputs):
+    """
+    Delete previously produced outputs and any folders they leave empty.
+    """
+    for rel in rel_outputs:
+        path = os.path.join(dst, rel)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        folder = os.path.dirname(path)
+        while os.path.abspath(folder) != os.path.abspath(dst):
+            try:
+                os.rmdir(folder)  # Only succeeds when empty
+            except OSError:
+                break
+            folder = os.path.dirname(folder)
+
+def _record_failure(state, rel, st, digest, output_format, output, result):
+    """
+    Record a failed conversion under the source's mtime, size and hash, so it
+    is not retried until the source changes. Outputs of an earlier successful
+    run are kept in the record (and on disk) for later cleanup.
+    """
+    state[rel] = {
+        'mtime_ns': st.st_mtime_ns,
+        'size': st.st_size,
+        'hash': digest,
+        'format': output_format,
+        'output': output,
+        'outputs': state.get(rel, {}).get('outputs', []),
+        'error': result.error,
+    }
+
+# --- Sync ---
+
+def sync_directory(src, dst, targets, workers=None, delete=True, cache_dir=None, progress_callback=None):
+    """
+    Bring dst up to date with src.
+
+    Parameters:
+        src (str): Input folder (scanned recursively).
+        dst (str): Output folder; the folder structure of src is mirrored.
+        targets (dict): {input_format: output_format}, see parse_targets.
+        workers (int, optional): Worker processes for the conversions.
+        delete (bool): Remove outputs whose source file no longer exists.
+        cache_dir (str, optional): Result cache folder passed to the batch engine.
+        progress_callback (callable, optional): progress_callback(result, done, total)
+            for each converted file.
+
+    Returns:
+        dict: Counts of added, modified, unchanged, deleted and failed files,
+        'skipped' files (failed before and unchanged since, so not retried),
+        the failed ConversionResults under 'errors', and 'seconds'.
+    """
+    start = time.perf_counter()
+    os.makedirs(dst, exist_ok=True)
+    state_path = os.path.join(dst, STATE_FILE)
+    state = load_state(state_path)
+    sources = scan_sources(src, targets, skip_dir=dst)
+    summary = {'added': 0, 'modified': 0, 'unchanged': 0, 'deleted': 0, 'failed': 0, 'skipped': 0, 'errors': []}
+
+    # Output names are planned over the whole tree, so a.png and a.jpg always
+    # get the same distinct outputs (a.png.pdf, a.jpg.pdf) whichever changed
+    planned = output_paths_for([
+        (os.path.join(src, rel), targets[os.path.splitext(rel)[1][1:].lower()], os.path.join(dst, os.path.dirname(rel)))
+        for rel in sources
+    ])
+
+    # --- Find new and changed files (stat first; hash only when stat differs) ---
+    todo = {}
+    for rel, st in sources.items():
+        record = state.get(rel)
+        output_format = targets[os.path.splitext(rel)[1][1:].lower()]
+        out_path = planned[os.path.join(src, rel)]
+        output = os.path.relpath(out_path, dst) if out_path else None
+        if record and record.get('format') == output_format and record.get('output', output) == output:
+            # A failed file is retried only when it changes, not on every --watch pass
+            failed = 'error' in record
+            outputs = record.get('outputs') or ['']
+            outputs_present = failed or os.path.exists(os.path.join(dst, outputs[0]))  # Cheap check: first output only
+            if record['mtime_ns'] == st.st_mtime_ns and record['size'] == st.st_size and outputs_present:
+                summary['skipped' if failed else 'unchanged'] += 1
+                continue
+            digest = file_digest(os.path.join(src, rel))
+            if digest == record['hash'] and outputs_present:
+                record.update(mtime_ns=st.st_mtime_ns, size=st.st_size)  # Touched, not modified
+                summary['skipped' if failed else 'unchanged'] += 1
+                continue
+            todo[rel] = ('modified', digest)
+        else:
+            todo[rel] = ('added' if not record else 'modified', None)
+
+    # --- Remove outputs of deleted sources ---
+    for rel in [rel for rel in state if rel not in sources]:
+        if delete:
+            _remove_outputs(dst, state[rel].get('outputs', []))
+        del state[rel]
+        summary['deleted'] += 1
+
+    # --- Convert, grouped by output format ---
+    groups = {}
+    for rel in todo:
+        output_format = targets[os.path.splitext(rel)[1][1:].lower()]
+        path = os.path.join(src, rel)
+        if planned[path] is None:
+            result = ConversionResult(
+                path, '', output_format, status='error', error="Output name collides with another input's output."
+            )
+            _record_failure(state, rel, sources[rel], todo[rel][1] or file_digest(path), output_format, None, result)
+            summary['failed'] += 1
+            summary['errors'].append(result)
+            continue
+        groups.setdefault(output_format, []).append((rel, (path, planned[path])))
+    for output_format, items in groups.items():
+        results = run_batch([job for _, job in items], output_format, workers, progress_callback, cache_dir=cache_dir)
+        for (rel, _), result in zip(items, results):
+            kind, digest = todo[rel]
+            digest = digest or file_digest(os.path.join(src, rel))
+            output = os.path.relpath(planned[os.path.join(src, rel)], dst)
+            old_outputs = set(state.get(rel, {}).get('outputs', []))
+            if result.status != 'ok':
+                _record_failure(state, rel, sources[rel], digest, output_format, output, result)
+                summary['failed'] += 1
+                summary['errors'].append(result)
+                continue
+            new_outputs = [os.path.relpath(path, dst) for path in result.outputs]
+            _remove_outputs(dst, old_outputs.difference(new_outputs))  # e.g. a PDF that lost pages
+            st = sources[rel]
+            state[rel] = {
+                'mtime_ns': st.st_mtime_ns,
+                'size': st.st_size,
+                'hash': digest,
+                'format': output_format,
+                'output': output,
+                'outputs': new_outputs,
+            }
+            summary[kind] += 1
+
+    save_state(state_path, state)
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+def watch(src, dst, targets, interval=2.0, on_sync=None, **settings):
+    """
+    Sync repeatedly, every `interval` seconds, until interrupted (Ctrl+C).
+    Polling keeps this dependency-free; unchanged trees cost one stat per file.
+    on_sync(summary) is called after every pass.
+    """
+    try:
+        while True:
+            summary = sync_directory(src, dst, targets, **settings)
+            if on_sync:
+                on_sync(summary)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+# --- Command-Line Entry Point ---
+
+def main(argv=None):
+    """
+    Parse command-line arguments and run one sync (or keep watching).
+    Exit status is 1 if any file failed to convert, in this run or (unchanged) in an earlier one.
+    """
+    parser = argparse.ArgumentParser(description="Convert only new or changed files from one folder into another.")
+    parser.add_argument("src", help="Input folder")
+    parser.add_argument("dst", help="Output folder")
+    parser.add_argument("-t", "--to", action="append", required=True, dest="targets",
+                        help="Target format (e.g. pdf) or per-type mapping (e.g. xlsx=csv); repeatable")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--no-delete", action="store_true", help="Keep outputs whose source was deleted")
+    parser.add_argument("--cache", metavar="DIR", help="Result cache folder to reuse earlier conversions")
+    parser.add_argument("--watch", action="store_true", help="Keep running and sync whenever files change")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between scans in --watch mode")
+    args = parser.parse_args(argv)
+
+    try:
+        targets = parse_targets(args.targets)
+    except ValueError as e:
+        parser.error(str(e))
+
+    def report(summary):
+        changed = summary['added'] + summary['modified'] + summary['deleted'] + summary['failed']
+        if changed or not args.watch:
+            print(f"{summary['added']} added, {summary['modified']} modified, {summary['deleted']} deleted, "
+                  f"{summary['unchanged']} unchanged, {summary['failed']} failed, "
+                  f"{summary['skipped']} skipped (failed before) in {summary['seconds']:.2f}s")
+        for result in summary['errors']:
+            print(f"  ERROR {result.input_path}: {result.error}")
+
+    settings = {'workers': args.workers, 'delete': not args.no_delete, 'cache_dir': args.cache}
+    if args.watch:
+        watch(args.src, args.dst, targets, args.interval, on_sync=report, **settings)
+        return 0
+    summary = sync_directory(args.src, args.dst, targets, **settings)
+    report(summary)
+    return 1 if summary['failed'] or summary['skipped'] else 0
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal PDF writer for the tests.
+
+Builds small documents byte by byte in each cross-reference layout the
+fast page index understands: classic xref tables, xref streams (with the
+PNG Up predictor), object streams and incremental updates.
+"""
+
+# --- Imports ---
+import re
+import zlib
+
+def page_tree(groups, media_box=(0, 0, 612, 792), rotate=None):
+    """
+    Objects for a catalog (1) and a two-level page tree.
+
+    groups is a list of page lists; each page is a dict of extra page keys
+    (e.g. {'/MediaBox': '[0 0 200 300]'}). Every group becomes an
+    intermediate /Pages node; media_box is inherited from the root and
+    rotate (if given) from the first group's node.
+    Returns {object number: body bytes}.
+    """
+    objects = {}
+    number = 3
+    kid_refs = []
+    total = 0
+    for index, pages in enumerate(groups):
+        node = number
+        number += 1
+        page_refs = []
+        for extra in pages:
+            keys = ''.join(f" {key} {value}" for key, value in extra.items())
+            objects[number] = f"<< /Type /Page /Parent {node} 0 R{keys} >>".encode()
+            page_refs.append(f"{number} 0 R")
+            number += 1
+        inherited = f" /Rotate {rotate}" if rotate is not None and index == 0 else ''
+        objects[node] = (f"<< /Type /Pages /Parent 2 0 R /Kids [{' '.join(page_refs)}] "
+                         f"/Count {len(pages)}{inherited} >>").encode()
+        kid_refs.append(f"{node} 0 R")
+        total += len(pages)
+    box = ' '.join(str(v) for v in media_box)
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kid_refs)}] /Count {total} /MediaBox [{box}] >>".encode()
+    return objects
+
+def _xref_table(offsets, trailer):
+    """
+    A classic xref table with one subsection per object (so an incremental
+    update lists only the objects it writes).
+    """
+    lines = [b"xref", b"0 1", b"0000000000 65535 f "]
+    for number, offset in sorted(offsets.items()):
+        lines += [f"{number} 1".encode(), f"{offset:010d} 00000 n ".encode()]
+    return b"\n".join(lines) + b"\ntrailer\n" + trailer + b"\n"
+
+def _up_predict(rows, columns):
+    """
+    Encode rows with the PNG Up filter (what PDF writers use for xref streams).
+    """
+    out = bytearray()
+    prev = bytes(columns)
+    for row in rows:
+        out.append(2)
+        out += bytes((row[i] - prev[i]) & 0xFF for i in range(columns))
+        prev = row
+    return bytes(out)
+
+def _xref_stream(entries, size, extra, predictor):
+    """
+    An xref stream object body; entries maps object number -> (type, field 2, field 3).
+    Only those objects (and the free head, 0) are listed, via /Index.
+    """
+    widths = (1, 4, 2)
+    numbers = [0] + sorted(entries)
+    rows = []
+    for num in numbers:
+        kind, field2, field3 = entries.get(num, (0, 0, 65535))
+        rows.append(kind.to_bytes(1, 'big') + field2.to_bytes(4, 'big') + field3.to_bytes(2, 'big'))
+    parms = ''
+    if predictor:
+        data = _up_predict(rows, sum(widths))
+        parms = f" /DecodeParms << /Predictor 12 /Columns {sum(widths)} >>"
+    else:
+        data = b''.join(rows)
+    data = zlib.compress(data)
+    index = ' '.join(f"{num} 1" for num in numbers)
+    head = (f"<< /Type /XRef /Size {size} /Index [{index}] /W [{' '.join(map(str, widths))}] "
+            f"/Filter /FlateDecode{parms} /Length {len(data)}{extra} >>").encode()
+    return head + b"\nstream\n" + data + b"\nendstream"
+
+def _object_stream(objects):
+    """
+    Pack {number: body} into an object stream body. Returns (body, {number: index}).
+    """
+    header, data, index = [], b'', {}
+    for position, (number, body) in enumerate(sorted(objects.items())):
+        header.append(f"{number} {len(data)}")
+        index[number] = position
+        data += body + b"\n"
+    header = ' '.join(header).encode() + b"\n"
+    content = zlib.compress(header + data)
+    body = (f"<< /Type /ObjStm /N {len(objects)} /First {len(header)} /Filter /FlateDecode "
+            f"/Length {len(content)} >>").encode() + b"\nstream\n" + content + b"\nendstream"
+    return body, index
+
+def _write_objects(out, objects, offsets):
+    for number, body in sorted(objects.items()):
+        offsets[number] = len(out)
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+def build_pdf(objects, xref='table', object_stream=False, predictor=True, prev=None, base=b''):
+    """
+    Serialize objects ({number: body bytes}) as a PDF with catalog 1 0 R.
+
+    xref is 'table' or 'stream'. object_stream=True (xref streams only)
+    stores every non-stream object in one compressed object stream.
+    With base and prev, the objects are appended to base as an incremental
+    update whose xref section points back to offset prev.
+    """
+    out = bytearray(base or b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    entries = {}
+    packed = {}
+    if object_stream:
+        packed = {n: body for n, body in objects.items() if b'stream' not in body}
+    plain = {n: body for n, body in objects.items() if n not in packed}
+    size = max(list(objects) + [_max_object(base)]) + 1
+    if packed:
+        stream_number = size
+        size += 1
+        body, index = _object_stream(packed)
+        plain[stream_number] = body
+        entries.update((n, (2, stream_number, i)) for n, i in index.items())
+    _write_objects(out, plain, offsets)
+    entries.update((n, (1, offset, 0)) for n, offset in offsets.items())
+    back = f" /Prev {prev}" if prev is not None else ''
+    if xref == 'table':
+        start = len(out)
+        trailer = f"<< /Size {size} /Root 1 0 R{back} >>".encode()
+        out += _xref_table(offsets, trailer)
+    else:
+        number = size
+        size += 1
+        start = len(out)
+        entries[number] = (1, start, 0)
+        body = _xref_stream(entries, size, f" /Root 1 0 R{back}", predictor)
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    out += f"startxref\n{start}\n%%EOF\n".encode()
+    return bytes(out)
+
+def _max_object(data):
+    numbers = [int(n) for n in re.findall(rb'(\d+) 0 obj', data or b'')]
+    return max(numbers, default=0)
+
+def last_startxref(data):
+    """
+    Offset of the newest xref section of a PDF built by build_pdf.
+    """
+    return int(re.findall(rb'startxref\s+(\d+)', data)[-1])
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite bookkeeping: saving results and comparing with a baseline.
+"""
+
+# --- Imports ---
+import os
+import sys
+import json
+import argparse
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import benchmark  # noqa: E402
+
+def _args(**overrides):
+    settings = dict(pages=4, image_mp=1.0, rows=100, cols=5, dpi=72, repeat=1,
+                    out=None, compare=None, threshold=0.15, strict=False)
+    settings.update(overrides)
+    return argparse.Namespace(**settings)
+
+def _suite(seconds):
+    return lambda args: {'pdf_slice': {'status': 'ok', 'seconds': seconds, 'peak_rss_mb': 50.0}}
+
+def test_compare_with_the_file_being_overwritten(tmp_path, monkeypatch):
+    path = str(tmp_path / 'bench.json')
+    monkeypatch.setattr(benchmark, 'run_suite', _suite(1.0))
+    assert benchmark.bench_suite(_args(out=path)) == 0
+
+    # Same file for --out and --compare: the old run is the baseline, the new one is saved
+    monkeypatch.setattr(benchmark, 'run_suite', _suite(2.0))
+    assert benchmark.bench_suite(_args(out=path, compare=path)) == 1
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['results']['pdf_slice']['seconds'] == 2.0
+
+def test_no_regression_within_threshold(tmp_path, monkeypatch):
+    path = str(tmp_path / 'bench.json')
+    monkeypatch.setattr(benchmark, 'run_suite', _suite(1.0))
+    benchmark.bench_suite(_args(out=path))
+    monkeypatch.setattr(benchmark, 'run_suite', _suite(1.1))
+    assert benchmark.bench_suite(_args(compare=path)) == 0
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Excel to CSV: both engines export the same sheets to the same files, and the
+pandas engine keeps the output of df.to_csv.
+"""
+
+# --- Imports ---
+import os
+import sys
+import datetime
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import openpyxl  # noqa: E402
+import pandas as pd  # noqa: E402
+from convertor import excel_to_csv  # noqa: E402
+
+@pytest.fixture
+def workbook(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Data'
+    ws.append(['name', None, 'n', 'when'])
+    ws.append(['a', 1, 2.5, datetime.datetime(2024, 1, 2)])
+    ws.append(['b', None, 3, None])
+    wb.create_sheet('Q1 & totals').append(['x', 'y'])
+    path = str(tmp_path / 'book.xlsx')
+    wb.save(path)
+    return path
+
+@pytest.mark.parametrize('engine', ['streaming', 'pandas'])
+def test_all_sheets(tmp_path, workbook, engine):
+    written = excel_to_csv(workbook, str(tmp_path / 'out.csv'), all_sheets=True, engine=engine)
+    assert [os.path.basename(path) for path in written] == ['out_Data.csv', 'out_Q1 _ totals.csv']
+    with open(written[1], encoding='utf-8') as f:
+        assert f.read().splitlines() == ['x,y']
+
+@pytest.mark.parametrize('engine', ['streaming', 'pandas'])
+def test_named_sheet(tmp_path, workbook, engine):
+    output = str(tmp_path / 'out.csv')
+    assert excel_to_csv(workbook, output, sheet='Q1 & totals', engine=engine) == [output]
+    with open(output, encoding='utf-8') as f:
+        assert f.read().splitlines() == ['x,y']
+
+def test_pandas_engine_keeps_old_output(tmp_path, workbook):
+    output, expected = str(tmp_path / 'out.csv'), str(tmp_path / 'expected.csv')
+    excel_to_csv(workbook, output, engine='pandas')
+    pd.read_excel(workbook, sheet_name=0).to_csv(expected, index=False)
+    with open(output, 'rb') as f, open(expected, 'rb') as g:
+        assert f.read() == g.read()
+
+def test_streaming_writes_stored_values(tmp_path, workbook):
+    output = str(tmp_path / 'out.csv')
+    excel_to_csv(workbook, output)
+    with open(output, 'rb') as f:
+        assert f.read() == b'name,,n,when\r\na,1,2.5,2024-01-02 00:00:00\r\nb,,3,\r\n'
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory conversion API: convert_bytes accepts the same format pairs as
+convert_file and gives the same results for them.
+"""
+
+# --- Imports ---
+import io
+import os
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import PyPDF2  # noqa: E402
+from PIL import Image  # noqa: E402
+from convertor import CONVERSION_MAP, UnsupportedFormatError, convert_file  # noqa: E402
+from inmemory import convert_bytes, convert_image_bytes  # noqa: E402
+
+def _png(color='red', size=(24, 16)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+@pytest.mark.parametrize('input_format, output_format', [
+    ('png', 'png'), ('jpg', 'jpg'), ('pdf', 'pdf'),  # Same format
+    ('xlsx', 'pdf'), ('png', 'csv'),                 # No route
+    ('doc', 'pdf'), ('gif', 'png'),                  # Unsupported input
+])
+def test_rejects_what_convert_file_rejects(tmp_path, input_format, output_format):
+    with pytest.raises(UnsupportedFormatError):
+        convert_bytes(b'data', input_format, output_format)
+    path = tmp_path / f"input.{input_format}"
+    path.write_bytes(b'data')
+    with pytest.raises(UnsupportedFormatError):
+        convert_file(str(path), str(tmp_path / f"output.{output_format}"), output_format)
+
+def test_accepts_every_image_pair_of_the_conversion_map():
+    for input_format in ('png', 'jpg', 'jpeg'):
+        source = convert_image_bytes(_png(), input_format)
+        for output_format in CONVERSION_MAP[input_format]:
+            if output_format != 'docx':  # Needs pdf2docx's layout analysis; covered by convert_file
+                assert convert_bytes(source, input_format, output_format.upper())
+
+def test_same_format_re_encoding_goes_through_convert_image_bytes():
+    data = convert_image_bytes(_png(size=(400, 200)), 'png', max_size=100)
+    assert Image.open(io.BytesIO(data)).size == (100, 50)
+
+def test_image_to_pdf_matches_convert_file(tmp_path):
+    data = _png()
+    path = tmp_path / 'scan.png'
+    path.write_bytes(data)
+    output = str(tmp_path / 'scan.pdf')
+    convert_file(str(path), output, 'pdf')
+    with open(output, 'rb') as f:
+        expected = PyPDF2.PdfReader(f).pages[0].mediabox
+        assert PyPDF2.PdfReader(io.BytesIO(convert_bytes(data, '.PNG', 'pdf'))).pages[0].mediabox == expected
+
+def test_writes_to_a_stream():
+    stream = io.BytesIO()
+    assert convert_bytes(_png(), 'png', 'jpg', output=stream) is None
+    assert stream.getvalue()[:2] == b'\xff\xd8'
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Fast page index (pdfindex): page counts, sizes and rotation must match
+PyPDF2 on every cross-reference layout, and damaged files must either fall
+back to PyPDF2 or raise PdfIndexError.
+"""
+
+# --- Imports ---
+import os
+import sys
+import random
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import PyPDF2  # noqa: E402
+from pdfindex import PdfIndexError, build_index, _unpredict  # noqa: E402
+from pdfbuild import build_pdf, last_startxref, page_tree  # noqa: E402
+
+# Two /Pages nodes: the root gives every page its MediaBox, the first node a
+# /Rotate; pages override MediaBox and Rotate individually
+GROUPS = [
+    [{}, {'/MediaBox': '[0 0 200 300]'}, {'/CropBox': '[10 10 110 60]'}],
+    [{'/Rotate': '180'}, {'/MediaBox': '[0 0 400 100]', '/Rotate': '270'}],
+]
+
+LAYOUTS = {
+    'xref-table': dict(xref='table'),
+    'xref-stream': dict(xref='stream'),
+    'xref-stream-no-predictor': dict(xref='stream', predictor=False),
+    'object-stream': dict(xref='stream', object_stream=True),
+}
+
+def _write(tmp_path, data, name='doc.pdf'):
+    path = str(tmp_path / name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+def _pypdf2_pages(path):
+    """
+    (object number, width, height, rotate) per page as PyPDF2 sees them, with
+    the rotation applied to the crop box as pdfindex reports it.
+    """
+    pages = []
+    for page in PyPDF2.PdfReader(path).pages:
+        rotate = page.rotation % 360
+        width, height = float(page.cropbox.width), float(page.cropbox.height)
+        if rotate in (90, 270):
+            width, height = height, width
+        pages.append((page.indirect_reference.idnum, width, height, rotate))
+    return pages
+
+def _index_pages(index):
+    return [(page.ref[0], page.width, page.height, page.rotate) for page in index.pages]
+
+# --- Layouts ---
+
+@pytest.mark.parametrize('layout', sorted(LAYOUTS))
+def test_fast_index_matches_pypdf2(tmp_path, layout):
+    path = _write(tmp_path, build_pdf(page_tree(GROUPS, rotate=90), **LAYOUTS[layout]))
+    index = build_index(path)
+    assert index.fast
+    assert index.page_count == 5
+    assert _index_pages(index) == _pypdf2_pages(path)
+
+def test_inherited_attributes(tmp_path):
+    path = _write(tmp_path, build_pdf(page_tree(GROUPS, rotate=90)))
+    index = build_index(path)
+    assert (index.page(1).width, index.page(1).height, index.page(1).rotate) == (792, 612, 90)
+    assert (index.page(4).width, index.page(4).height, index.page(4).rotate) == (612, 792, 180)
+
+def test_offsets_point_at_page_objects(tmp_path):
+    data = build_pdf(page_tree(GROUPS))
+    index = build_index(_write(tmp_path, data))
+    for page in index.pages:
+        assert data[page.offset:].startswith(f"{page.ref[0]} 0 obj".encode())
+
+def test_object_stream_pages_have_no_offset(tmp_path):
+    index = build_index(_write(tmp_path, build_pdf(page_tree(GROUPS), xref='stream', object_stream=True)))
+    assert all(page.offset is None for page in index.pages)
+
+@pytest.mark.parametrize('xref', ['table', 'stream'])
+def test_incremental_update(tmp_path, xref):
+    base = build_pdf(page_tree([[{}, {}]]), xref=xref)
+    # The update adds page 10 and rewrites only the objects that change
+    update = {
+        2: b"<< /Type /Pages /Kids [3 0 R] /Count 3 /MediaBox [0 0 612 792] >>",
+        3: b"<< /Type /Pages /Parent 2 0 R /Kids [4 0 R 10 0 R 5 0 R] /Count 3 >>",
+        10: b"<< /Type /Page /Parent 3 0 R /MediaBox [0 0 100 100] >>",
+    }
+    data = build_pdf(update, xref=xref, base=base, prev=last_startxref(base))
+    path = _write(tmp_path, data)
+    index = build_index(path)
+    assert index.fast
+    assert [page.ref[0] for page in index.pages] == [4, 10, 5]
+    assert _index_pages(index) == _pypdf2_pages(path)
+
+# --- Damaged Files ---
+
+def test_count_mismatch_falls_back_to_pypdf2(tmp_path):
+    objects = page_tree([[{}, {}, {}]])
+    objects[2] = objects[2].replace(b'/Count 3', b'/Count 4')
+    index = build_index(_write(tmp_path, build_pdf(objects)))
+    assert not index.fast
+    assert index.page_count == 3
+
+def test_broken_xref_offset_falls_back(tmp_path):
+    data = build_pdf(page_tree(GROUPS))
+    start = last_startxref(data)
+    data = data.replace(f"startxref\n{start}".encode(), f"startxref\n{start - 7}".encode())
+    index = build_index(_write(tmp_path, data))
+    assert not index.fast
+    assert index.page_count == 5
+
+@pytest.mark.parametrize('layout', sorted(LAYOUTS))
+@pytest.mark.parametrize('keep', [0.3, 0.6, 0.95])
+def test_truncated_file_falls_back_or_raises(tmp_path, layout, keep):
+    data = build_pdf(page_tree(GROUPS), **LAYOUTS[layout])
+    path = _write(tmp_path, data[:int(len(data) * keep)])
+    try:
+        index = build_index(path)
+    except PdfIndexError:
+        return
+    assert not index.fast
+    assert index.page_count == len(PyPDF2.PdfReader(path).pages)
+
+def test_not_a_pdf(tmp_path):
+    with pytest.raises(PdfIndexError):
+        build_index(_write(tmp_path, b'hello world\n' * 20, 'notes.pdf'))
+
+def test_empty_file(tmp_path):
+    with pytest.raises(PdfIndexError):
+        build_index(_write(tmp_path, b'', 'empty.pdf'))
+
+def test_page_out_of_range(tmp_path):
+    index = build_index(_write(tmp_path, build_pdf(page_tree(GROUPS))))
+    with pytest.raises(PdfIndexError):
+        index.page(6)
+    with pytest.raises(PdfIndexError):
+        index.check_range(3, 2)
+
+# --- PNG Predictors ---
+
+def _paeth(left, up, corner):
+    p = left + up - corner
+    pa, pb, pc = abs(p - left), abs(p - up), abs(p - corner)
+    return left if pa <= pb and pa <= pc else up if pb <= pc else corner
+
+def _png_encode(rows, kinds, bpp):
+    """
+    Reference PNG filter encoder: filter each row with the given filter type.
+    """
+    out = bytearray()
+    prev = bytes(len(rows[0]))
+    for row, kind in zip(rows, kinds):
+        out.append(kind)
+        for i, value in enumerate(row):
+            left = row[i - bpp] if i >= bpp else 0
+            up = prev[i]
+            corner = prev[i - bpp] if i >= bpp else 0
+            predicted = [0, left, up, (left + up) >> 1, _paeth(left, up, corner)][kind]
+            out.append((value - predicted) & 0xFF)
+        prev = row
+    return bytes(out)
+
+@pytest.mark.parametrize('colors, columns', [(1, 7), (3, 4), (4, 2), (2, 1)])
+@pytest.mark.parametrize('kinds', [[0], [1], [2], [3], [4], [0, 1, 2, 3, 4], [2, 2, 2, 0, 2, 1]])
+def test_unpredict_round_trip(colors, columns, kinds):
+    rng = random.Random(f"{colors}-{columns}-{kinds}")
+    width = colors * columns
+    rows = [bytes(rng.randrange(256) for _ in range(width)) for _ in range(40)]
+    row_kinds = [kinds[i % len(kinds)] for i in range(len(rows))]
+    encoded = _png_encode(rows, row_kinds, colors)
+    parms = {'/Predictor': 12, '/Colors': colors, '/Columns': columns}
+    assert _unpredict(encoded, parms) == b''.join(rows)
+
+def test_unpredict_short_last_row():
+    rows = [bytes(range(i, i + 5)) for i in range(0, 50, 5)]
+    encoded = _png_encode(rows, [2] * len(rows), 1) + bytes([2, 9, 9])
+    decoded = _unpredict(encoded, {'/Predictor': 12, '/Columns': 5})
+    assert decoded[:50] == b''.join(rows)
+    assert decoded[50:] == bytes([(rows[-1][0] + 9) & 0xFF, (rows[-1][1] + 9) & 0xFF])
+
+def test_unpredict_without_predictor():
+    assert _unpredict(b'abc', {}) == b'abc'
+    with pytest.raises(PdfIndexError):
+        _unpredict(b'abc', {'/Predictor': 2})
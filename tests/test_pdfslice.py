@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Page range parsing for the PDF slicer: parse_page_ranges and every_n_pages.
+"""
+
+# --- Imports ---
+import os
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from pdfslice import every_n_pages, parse_page_ranges  # noqa: E402
+
+@pytest.mark.parametrize('spec, expected', [
+    ("1-10,15,20-end", [(1, 10), (15, 15), (20, 30)]),
+    ("3", [(3, 3)]),
+    ("3-", [(3, 30)]),
+    ("3 - ", [(3, 30)]),
+    ("end", [(30, 30)]),
+    ("end-end", [(30, 30)]),
+    ("28-END", [(28, 30)]),
+    (" 5 - 7 ; 1-2 ", [(5, 7), (1, 2)]),
+    ("1-2,,4", [(1, 2), (4, 4)]),
+    ("every 10", [(1, 10), (11, 20), (21, 30)]),
+    ("every 25, 1", [(1, 25), (26, 30), (1, 1)]),
+    ([4, (1, 3), ('7', '9')], [(4, 4), (1, 3), (7, 9)]),
+])
+def test_parse_page_ranges(spec, expected):
+    assert parse_page_ranges(spec, 30) == expected
+
+@pytest.mark.parametrize('spec', [
+    "", " , ", [],       # Nothing given
+    "0", "31", "0-3",    # Outside the document
+    "5-3", "29-31",      # Reversed or running past the end
+    "-3", "a-b", "1-x", "every", "every 0", "1-2-3",
+])
+def test_parse_page_ranges_rejects(spec):
+    with pytest.raises(ValueError):
+        parse_page_ranges(spec, 30)
+
+@pytest.mark.parametrize('n, page_count, expected', [
+    (10, 30, [(1, 10), (11, 20), (21, 30)]),
+    (10, 25, [(1, 10), (11, 20), (21, 25)]),
+    (1, 3, [(1, 1), (2, 2), (3, 3)]),
+    (50, 7, [(1, 7)]),
+    (3, 0, []),
+])
+def test_every_n_pages(n, page_count, expected):
+    assert every_n_pages(n, page_count) == expected
+
+def test_every_n_pages_needs_positive_size():
+    with pytest.raises(ValueError):
+        every_n_pages(0, 10)
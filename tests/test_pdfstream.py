@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming slicer (pdfstream): the output must hold the same pages as the
+PyPDF2 slicer, keep attributes inherited from the source page tree and be
+readable by PyPDF2.
+"""
+
+# --- Imports ---
+import io
+import os
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import PyPDF2  # noqa: E402
+from pdfstream import StreamingPdfWriter, stream_slice  # noqa: E402
+from pdfslice import slice_pdf  # noqa: E402
+from pdfindex import PdfIndexError  # noqa: E402
+from pdfbuild import build_pdf, page_tree  # noqa: E402
+
+FONT = 90
+
+def _document(xref='table', object_stream=False, second_rotate=180):
+    """
+    Six pages in two /Pages nodes. The root sets the MediaBox, the first node
+    a Rotate of 90 and the second second_rotate (None: no /Rotate); every page
+    has its own content stream and shares one font.
+    """
+    groups = [
+        [{}, {'/MediaBox': '[0 0 200 300]'}, {'/Rotate': '0'}],
+        [{}, {'/CropBox': '[5 5 100 100]'}, {'/Rotate': '270'}],
+    ]
+    objects = page_tree(groups, rotate=90)
+    if second_rotate is not None:
+        node = max(n for n, body in objects.items() if body.startswith(b'<< /Type /Pages /Parent'))
+        objects[node] = objects[node][:-2] + f"/Rotate {second_rotate} >>".encode()
+    pages = sorted(n for n, body in objects.items() if body.startswith(b'<< /Type /Page '))
+    for index, number in enumerate(pages, 1):
+        content = f"BT /F1 12 Tf 72 72 Td (page {index}) Tj ET".encode()
+        objects[100 + index] = f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream"
+        objects[number] = objects[number][:-2] + (
+            f"/Contents {100 + index} 0 R /Resources << /Font << /F1 {FONT} 0 R >> >> >>").encode()
+    objects[FONT] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    return build_pdf(objects, xref=xref, object_stream=object_stream)
+
+@pytest.fixture(params=['table', 'stream', 'object-stream'])
+def source(tmp_path, request):
+    data = _document(xref='table' if request.param == 'table' else 'stream',
+                     object_stream=request.param == 'object-stream')
+    path = str(tmp_path / 'source.pdf')
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+def _describe(path):
+    """
+    (text of the content stream, rotation, media box, crop box) per page.
+    """
+    reader = PyPDF2.PdfReader(path, strict=True)
+    return [
+        (page.get_contents().get_data(), page.rotation % 360,
+         [float(v) for v in page.mediabox], [float(v) for v in page.cropbox])
+        for page in reader.pages
+    ]
+
+@pytest.mark.parametrize('start, end', [(1, 6), (2, 4), (5, 5), (1, 1)])
+def test_streaming_matches_pypdf2(tmp_path, source, start, end):
+    streamed, copied = str(tmp_path / 'streamed.pdf'), str(tmp_path / 'copied.pdf')
+    assert slice_pdf(source, start, end, streamed, streaming=True)[0]
+    assert slice_pdf(source, start, end, copied, streaming=False)[0]
+    pages = _describe(streamed)
+    assert len(pages) == end - start + 1
+    assert pages == _describe(copied)
+
+def test_inherited_attributes_are_kept(tmp_path, source):
+    output = str(tmp_path / 'out.pdf')
+    stream_slice(source, [(1, 2)], output)
+    pages = _describe(output)
+    assert [rotation for _, rotation, _, _ in pages] == [90, 90]
+    assert pages[0][2] == [0, 0, 612, 792]  # From the root /Pages node
+    assert pages[1][2] == [0, 0, 200, 300]  # The page's own box
+
+def test_sibling_node_does_not_inherit(tmp_path):
+    # PyPDF2 3.0 carries the first node's /Rotate over to its sibling when it
+    # flattens the tree, so the expected values are spelled out here
+    source = str(tmp_path / 'source.pdf')
+    with open(source, 'wb') as f:
+        f.write(_document(second_rotate=None))
+    output = str(tmp_path / 'out.pdf')
+    stream_slice(source, [(1, 6)], output)
+    assert [rotation for _, rotation, _, _ in _describe(output)] == [90, 90, 0, 0, 0, 270]
+
+def test_several_ranges(tmp_path, source):
+    output = str(tmp_path / 'out.pdf')
+    assert stream_slice(source, [(5, 6), (1, 2)], output) == 4
+    texts = [text for text, _, _, _ in _describe(output)]
+    assert texts == [f"BT /F1 12 Tf 72 72 Td (page {n}) Tj ET".encode() for n in (5, 6, 1, 2)]
+
+def test_overlapping_ranges_repeat_pages(tmp_path, source):
+    output = str(tmp_path / 'out.pdf')
+    assert stream_slice(source, [(1, 2), (2, 3)], output) == 4
+    pages = _describe(output)
+    assert [text[-9:-7] for text, _, _, _ in pages] == [b' 1', b' 2', b' 2', b' 3']
+    assert pages[1] == pages[2]
+
+def test_shared_objects_written_once(tmp_path, source):
+    output = str(tmp_path / 'out.pdf')
+    stream_slice(source, [(1, 6)], output)
+    with open(output, 'rb') as f:
+        assert f.read().count(b'/BaseFont /Helvetica') == 1
+
+def test_range_outside_document(tmp_path, source):
+    with pytest.raises(PdfIndexError):
+        stream_slice(source, [(4, 7)], str(tmp_path / 'out.pdf'))
+    ok, message = slice_pdf(source, 4, 7, str(tmp_path / 'out.pdf'), streaming=True)
+    assert not ok and '6 pages' in message
+
+def test_writer_over_several_readers(source):
+    reader = PyPDF2.PdfReader(source)
+    buffer = io.BytesIO()
+    with StreamingPdfWriter(buffer) as writer:
+        writer.add_pages(reader, [reader.pages[0]])
+        writer.add_pages(PyPDF2.PdfReader(source), [reader.pages[3], reader.pages[4]])
+    output = PyPDF2.PdfReader(io.BytesIO(buffer.getvalue()), strict=True)
+    assert len(output.pages) == 3
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Converter registry: routing between formats, chained conversions and the
+CONVERSION_MAP derived from the built-in converters.
+"""
+
+# --- Imports ---
+import os
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from registry import ConverterRegistry  # noqa: E402
+from convertor import CONVERSION_MAP, REGISTRY  # noqa: E402
+
+# The hand-written table CONVERSION_MAP replaced: its pairs all have a direct converter
+OLD_CONVERSION_MAP = {
+    'jpg':    ['png', 'jpeg', 'pdf'],
+    'jpeg':   ['jpg', 'png', 'pdf'],
+    'png':    ['jpg', 'jpeg', 'pdf'],
+    'pdf':    ['jpg', 'jpeg', 'png', 'docx'],
+    'docx':   ['pdf'],
+    'xlsx':   ['csv'],
+    'pptx':   ['pdf'],
+}
+
+def _names(route):
+    return [step.name for step in route]
+
+# --- Built-in Routes ---
+
+@pytest.mark.parametrize('source, target, step', [
+    ('jpg', 'jpeg', '_copy_jpeg_step'),
+    ('jpeg', 'jpg', '_copy_jpeg_step'),
+    ('jpg', 'png', '_image_step'),
+    ('png', 'jpg', '_image_step'),
+    ('png', 'pdf', '_image_pdf_step'),
+    ('pdf', 'png', '_pdf_images_step'),
+    ('pdf', 'docx', '_pdf_docx_step'),
+    ('docx', 'pdf', '_office_pdf_step'),
+    ('pptx', 'pdf', '_office_pdf_step'),
+    ('xlsx', 'csv', '_excel_csv_step'),
+])
+def test_direct_route(source, target, step):
+    assert _names(REGISTRY.route(source, target)) == [step]
+
+@pytest.mark.parametrize('source, target, steps', [
+    ('png', 'docx', ['_image_pdf_step', '_pdf_docx_step']),
+    ('jpg', 'docx', ['_image_pdf_step', '_pdf_docx_step']),
+    ('docx', 'png', ['_office_pdf_step', '_pdf_images_step']),
+    ('pptx', 'docx', ['_office_pdf_step', '_pdf_docx_step']),
+])
+def test_multi_step_route(source, target, steps):
+    assert _names(REGISTRY.route(source, target)) == steps
+
+@pytest.mark.parametrize('source, target', [
+    ('xlsx', 'pdf'),   # CSV output cannot be converted further
+    ('pdf', 'pptx'),
+    ('png', 'png'),    # Same format: nothing to do
+    ('doc', 'pdf'),    # Unknown source
+    ('pdf', 'csv'),
+])
+def test_no_route(source, target):
+    assert REGISTRY.route(source, target) is None
+
+def test_convert_without_route_raises(tmp_path):
+    with pytest.raises(LookupError):
+        REGISTRY.convert(str(tmp_path / 'a.xlsx'), str(tmp_path / 'a.pdf'), 'xlsx', 'pdf')
+
+# --- Conversion Map ---
+
+def test_conversion_map_keeps_the_old_table():
+    assert sorted(CONVERSION_MAP) == sorted(OLD_CONVERSION_MAP)
+    for source, old_targets in OLD_CONVERSION_MAP.items():
+        # The old targets come first, in the old order; the rest need a chain
+        assert CONVERSION_MAP[source][:len(old_targets)] == old_targets
+        for target in CONVERSION_MAP[source][len(old_targets):]:
+            assert len(REGISTRY.route(source, target)) > 1
+
+def test_conversion_map_adds_chained_pairs():
+    assert CONVERSION_MAP['png'][3:] == ['docx']
+    assert CONVERSION_MAP['docx'][1:] == ['jpeg', 'jpg', 'png']  # Cheapest first, then by name
+    assert CONVERSION_MAP['xlsx'] == ['csv']
+
+# --- Routing Rules ---
+
+def _step(name, calls):
+    def step(input_path, output_path, output_format, progress_callback, options):
+        calls.append((name, os.path.basename(input_path), os.path.basename(output_path), options))
+        with open(output_path, 'w') as f:
+            f.write(name)
+        if progress_callback:
+            progress_callback(1, 2)
+        return [output_path]
+    step.__name__ = name
+    return step
+
+def test_cheaper_chain_beats_expensive_direct_converter():
+    registry = ConverterRegistry()
+    registry.register('a', ['c'], cost=5)(_step('a_c', []))
+    registry.register('a', ['b'], cost=1)(_step('a_b', []))
+    registry.register('b', ['c'], cost=1)(_step('b_c', []))
+    assert _names(registry.route('a', 'c')) == ['a_b', 'b_c']
+    assert registry.targets('a') == ['c', 'b']  # Direct targets in registration order
+
+def test_later_registration_replaces_the_pair():
+    registry = ConverterRegistry()
+    registry.register('a', ['b'])(_step('old', []))
+    registry.register('a', ['b'])(_step('new', []))
+    assert _names(registry.direct('a')) == ['new']
+
+def test_multi_output_step_is_only_last():
+    registry = ConverterRegistry()
+    registry.register('a', ['b'], multi_output=True)(_step('a_b', []))
+    registry.register('b', ['c'])(_step('b_c', []))
+    assert _names(registry.route('a', 'b')) == ['a_b']
+    assert registry.route('a', 'c') is None
+    assert registry.conversion_map(['a', 'b']) == {'a': ['b'], 'b': ['c']}
+
+def test_chain_runs_steps_through_a_temporary_folder(tmp_path):
+    calls, progress = [], []
+    registry = ConverterRegistry()
+    registry.register('a', ['b'])(_step('a_b', calls))
+    registry.register('b', ['c'])(_step('b_c', calls))
+    output = str(tmp_path / 'doc.c')
+    assert registry.convert(str(tmp_path / 'doc.a'), output, 'a', 'c',
+                            lambda done, total: progress.append((done, total)), {'quality': 80}) == [output]
+    # Options go to the last step only; the intermediate file is gone afterwards
+    assert calls == [('a_b', 'doc.a', 'doc.b', {}), ('b_c', 'doc.b', 'doc.c', {'quality': 80})]
+    assert os.listdir(str(tmp_path)) == ['doc.c']
+    assert progress == [(1, 4), (1, 2), (3, 4)]
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Conversion result cache: keys, hits and misses, atomic storing and eviction.
+"""
+
+# --- Imports ---
+import os
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import resultcache  # noqa: E402
+from resultcache import ResultCache  # noqa: E402
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / 'cache'))
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'in.png'
+    path.write_bytes(b'image data')
+    return str(path)
+
+def _output(tmp_path, name='out.pdf', data=b'converted'):
+    path = tmp_path / 'work' / name
+    path.parent.mkdir(exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+def _entries(cache):
+    return [name for shard in os.listdir(cache.root) for name in os.listdir(os.path.join(cache.root, shard))]
+
+# --- Keys ---
+
+def test_key_is_stable(cache, source):
+    assert cache.key_for(source, 'png', 'pdf') == cache.key_for(source, 'PNG', 'PDF', {}, None)
+
+@pytest.mark.parametrize('change', [
+    dict(output_format='jpg'),
+    dict(options={'quality': 80}),
+    dict(converter='_image_pdf_step'),
+])
+def test_key_changes_with_settings(cache, source, change):
+    settings = dict(input_format='png', output_format='pdf', options=None, converter=None)
+    key = cache.key_for(source, **settings)
+    settings.update(change)
+    assert cache.key_for(source, **settings) != key
+
+def test_key_changes_with_source_content(cache, source):
+    key = cache.key_for(source, 'png', 'pdf')
+    with open(source, 'ab') as f:
+        f.write(b'!')
+    assert cache.key_for(source, 'png', 'pdf') != key
+
+def test_key_changes_with_backend_version(cache, source, monkeypatch):
+    key = cache.key_for(source, 'png', 'pdf')
+    versions = dict(resultcache.backend_versions(), Pillow='0.0.1')
+    monkeypatch.setattr(resultcache, '_BACKEND_VERSIONS', versions)
+    assert cache.key_for(source, 'png', 'pdf') != key
+
+# --- Hits and Misses ---
+
+def test_hit_restores_outputs(tmp_path, cache, source):
+    key = cache.key_for(source, 'png', 'pdf')
+    assert cache.fetch(key, str(tmp_path / 'restored.pdf')) is None
+    cache.store(key, [_output(tmp_path)], _output(tmp_path))
+    restored = str(tmp_path / 'restored.pdf')
+    assert cache.fetch(key, restored) == [restored]
+    with open(restored, 'rb') as f:
+        assert f.read() == b'converted'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['bytes_saved'], stats['entries']) == (1, 1, 9, 1)
+
+def test_several_outputs_restore_under_their_names(tmp_path, cache, source):
+    pages = [_output(tmp_path, f"page_{n}.png", bytes([n])) for n in (1, 2)]
+    key = cache.key_for(source, 'pdf', 'png')
+    cache.store(key, pages, str(tmp_path / 'work' / 'doc.png'))
+    target = tmp_path / 'elsewhere'
+    restored = cache.fetch(key, str(target / 'doc.png'))
+    assert restored == [str(target / 'page_1.png'), str(target / 'page_2.png')]
+
+def test_changed_source_misses(tmp_path, cache, source):
+    cache.store(cache.key_for(source, 'png', 'pdf'), [_output(tmp_path)], _output(tmp_path))
+    with open(source, 'wb') as f:
+        f.write(b'other image')
+    assert cache.fetch(cache.key_for(source, 'png', 'pdf'), str(tmp_path / 'restored.pdf')) is None
+
+def test_backend_upgrade_misses(tmp_path, cache, source, monkeypatch):
+    cache.store(cache.key_for(source, 'png', 'pdf'), [_output(tmp_path)], _output(tmp_path))
+    monkeypatch.setattr(resultcache, '_BACKEND_VERSIONS', dict(resultcache.backend_versions(), img2pdf='99'))
+    assert cache.fetch(cache.key_for(source, 'png', 'pdf'), str(tmp_path / 'restored.pdf')) is None
+
+def test_entry_removed_by_another_process_misses(tmp_path, cache, source):
+    key = cache.key_for(source, 'png', 'pdf')
+    cache.store(key, [_output(tmp_path)], _output(tmp_path))
+    os.remove(os.path.join(cache._entry_dir(key), 'out.pdf'))
+    assert cache.fetch(key, str(tmp_path / 'restored.pdf')) is None
+    assert cache.stats()['entries'] == 0
+
+# --- Storing ---
+
+def test_store_leaves_no_staging_folders(tmp_path, cache, source):
+    key = cache.key_for(source, 'png', 'pdf')
+    cache.store(key, [_output(tmp_path)], _output(tmp_path))
+    cache.store(key, [_output(tmp_path)], _output(tmp_path))  # Already stored: no-op
+    assert _entries(cache) == [key]
+    assert sorted(os.listdir(cache._entry_dir(key))) == ['manifest.json', 'out.pdf']
+
+def test_store_losing_a_race_cleans_up(tmp_path, cache, source, monkeypatch):
+    key = cache.key_for(source, 'png', 'pdf')
+    os.makedirs(os.path.join(cache._entry_dir(key), 'partial'))  # Another writer's entry, not finished yet
+
+    def rename(src, dst):
+        raise FileExistsError(dst)
+
+    monkeypatch.setattr(resultcache.os, 'rename', rename)
+    cache.store(key, [_output(tmp_path)], _output(tmp_path))
+    assert _entries(cache) == [key]  # The staging folder is gone
+    assert cache.stats()['entries'] == 0
+
+def test_half_written_entry_is_ignored_at_start_up(tmp_path, cache, source):
+    key = cache.key_for(source, 'png', 'pdf')
+    staging = os.path.join(cache.root, key[:2], '.tmp-crashed')
+    os.makedirs(staging)
+    with open(os.path.join(staging, 'out.pdf'), 'wb') as f:
+        f.write(b'partial')
+    assert ResultCache(cache.root).stats()['entries'] == 0
+
+def test_outputs_outside_the_folder_are_not_stored(tmp_path, cache, source):
+    outside = str(tmp_path / 'other.pdf')
+    with open(outside, 'wb') as f:
+        f.write(b'x')
+    cache.store(cache.key_for(source, 'png', 'pdf'), [outside], _output(tmp_path))
+    assert cache.stats()['entries'] == 0
+
+# --- Size Limit ---
+
+def test_least_recently_used_entries_are_evicted(tmp_path, source):
+    cache = ResultCache(str(tmp_path / 'cache'), max_bytes=25)
+    keys = [cache.key_for(source, 'png', fmt) for fmt in ('pdf', 'jpg', 'docx')]
+    for key in keys[:2]:
+        cache.store(key, [_output(tmp_path)], _output(tmp_path))
+    cache.fetch(keys[0], str(tmp_path / 'restored.pdf'))  # keys[1] is now the oldest
+    cache.store(keys[2], [_output(tmp_path)], _output(tmp_path))
+    assert sorted(_entries(cache)) == sorted([keys[0], keys[2]])
+    stats = cache.stats()
+    assert (stats['entries'], stats['bytes'], stats['evictions']) == (2, 18, 1)
+
+def test_index_is_rebuilt_at_start_up(tmp_path, cache, source):
+    cache.store(cache.key_for(source, 'png', 'pdf'), [_output(tmp_path)], _output(tmp_path))
+    stats = ResultCache(cache.root).stats()
+    assert (stats['entries'], stats['bytes']) == (1, 9)
+
+def test_clear(tmp_path, cache, source):
+    cache.store(cache.key_for(source, 'png', 'pdf'), [_output(tmp_path)], _output(tmp_path))
+    cache.clear()
+    assert _entries(cache) == []
+    assert cache.stats()['entries'] == 0
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Start-up checks: loading the tools must not import their heavy backends,
+which are only imported on first use (see lazyimport).
+"""
+
+# --- Imports ---
+import os
+import sys
+import json
+import subprocess
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from benchmark import HEAVY_BACKENDS  # noqa: E402
+
+# Every backend loaded through lazy_module, plus the GUI toolkit and the LibreOffice bridge
+LAZY_BACKENDS = sorted(set(HEAVY_BACKENDS) | {'openpyxl', 'tkinter', 'uno'})
+
+def _modules_after(code):
+    """
+    Run code in a fresh interpreter and return the names in its sys.modules.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-c', f"{code}\nimport sys, json\nprint(json.dumps(sorted(sys.modules)))"],
+        capture_output=True, text=True, cwd=REPO, check=True,
+    )
+    return set(json.loads(proc.stdout.splitlines()[-1]))
+
+def test_import_does_not_load_backends():
+    loaded = {name.split('.')[0] for name in _modules_after('import convertor, pdfslice')}
+    assert sorted(loaded.intersection(LAZY_BACKENDS)) == []
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental folder sync: which files a run converts, skips or cleans up, as
+recorded in the state index.
+"""
+
+# --- Imports ---
+import os
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from PIL import Image  # noqa: E402
+import sync  # noqa: E402
+from sync import STATE_FILE, load_state, main, sync_directory  # noqa: E402
+
+TARGETS = {'png': 'pdf', 'jpg': 'pdf'}
+
+@pytest.fixture
+def folders(tmp_path):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    return src, dst
+
+def _image(path, color='red', size=(20, 10)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new('RGB', size, color).save(str(path))
+
+def _run(src, dst):
+    return sync_directory(str(src), str(dst), TARGETS, workers=1)
+
+def _counts(summary):
+    return {key: value for key, value in summary.items() if key not in ('errors', 'seconds') and value}
+
+def _state(dst):
+    return load_state(os.path.join(str(dst), STATE_FILE))
+
+def _files(dst):
+    return sorted(os.path.relpath(os.path.join(root, name), str(dst)).replace(os.sep, '/')
+                  for root, _, names in os.walk(str(dst)) for name in names if name != STATE_FILE)
+
+def test_added_then_unchanged(folders):
+    src, dst = folders
+    _image(src / 'a.png')
+    _image(src / 'sub' / 'b.jpg', 'blue')
+    assert _counts(_run(src, dst)) == {'added': 2}
+    assert _files(dst) == ['a.pdf', 'sub/b.pdf']
+    assert _counts(_run(src, dst)) == {'unchanged': 2}
+
+def test_touched_file_is_not_reconverted(folders, monkeypatch):
+    src, dst = folders
+    _image(src / 'a.png')
+    _run(src, dst)
+    stat = os.stat(str(src / 'a.png'))
+    os.utime(str(src / 'a.png'), ns=(stat.st_atime_ns, stat.st_mtime_ns + 5 * 10 ** 9))
+    monkeypatch.setattr(sync, 'run_batch', lambda *args, **kwargs: pytest.fail("nothing to convert"))
+    assert _counts(_run(src, dst)) == {'unchanged': 1}
+    assert _state(dst)['a.png']['mtime_ns'] == stat.st_mtime_ns + 5 * 10 ** 9
+
+def test_modified(folders):
+    src, dst = folders
+    _image(src / 'a.png')
+    _run(src, dst)
+    first = _state(dst)['a.png']['hash']
+    _image(src / 'a.png', 'green', (30, 30))
+    assert _counts(_run(src, dst)) == {'modified': 1}
+    assert _state(dst)['a.png']['hash'] != first
+
+def test_missing_output_is_rebuilt(folders):
+    src, dst = folders
+    _image(src / 'a.png')
+    _run(src, dst)
+    os.remove(str(dst / 'a.pdf'))
+    assert _counts(_run(src, dst)) == {'modified': 1}
+    assert _files(dst) == ['a.pdf']
+
+def test_deleted(folders):
+    src, dst = folders
+    _image(src / 'sub' / 'a.png')
+    _run(src, dst)
+    os.remove(str(src / 'sub' / 'a.png'))
+    assert _counts(_run(src, dst)) == {'deleted': 1}
+    assert _files(dst) == []
+    assert not (dst / 'sub').exists()  # Emptied folders go too
+    assert _state(dst) == {}
+
+def test_deleted_without_delete_keeps_output(folders):
+    src, dst = folders
+    _image(src / 'a.png')
+    _run(src, dst)
+    os.remove(str(src / 'a.png'))
+    summary = sync_directory(str(src), str(dst), TARGETS, workers=1, delete=False)
+    assert _counts(summary) == {'deleted': 1}
+    assert _files(dst) == ['a.pdf']
+
+def test_renamed(folders):
+    src, dst = folders
+    _image(src / 'a.png')
+    _run(src, dst)
+    os.rename(str(src / 'a.png'), str(src / 'b.png'))
+    assert _counts(_run(src, dst)) == {'added': 1, 'deleted': 1}
+    assert _files(dst) == ['b.pdf']
+    assert sorted(_state(dst)) == ['b.png']
+
+def test_same_stem_keeps_extension(folders):
+    src, dst = folders
+    _image(src / 'a.png')
+    _run(src, dst)
+    _image(src / 'a.jpg', 'blue')
+    # a.png now shares its stem with a.jpg: both outputs are renamed, the old a.pdf removed
+    assert _counts(_run(src, dst)) == {'added': 1, 'modified': 1}
+    assert _files(dst) == ['a.jpg.pdf', 'a.png.pdf']
+    assert _counts(_run(src, dst)) == {'unchanged': 2}
+
+def test_collision_is_recorded_until_resolved(folders):
+    src, dst = folders
+    # a.png and a.jpg both become a.<ext>.pdf, and a.png.jpg becomes a.png.pdf as well
+    for name in ('a.png', 'a.jpg', 'a.png.jpg'):
+        _image(src / name)
+    summary = _run(src, dst)
+    assert _counts(summary) == {'added': 1, 'failed': 2}
+    assert _files(dst) == ['a.jpg.pdf']
+    assert all('collides' in result.error for result in summary['errors'])
+    assert _counts(_run(src, dst)) == {'unchanged': 1, 'skipped': 2}
+    os.remove(str(src / 'a.jpg'))
+    assert _counts(_run(src, dst)) == {'modified': 2, 'deleted': 1}
+    assert _files(dst) == ['a.pdf', 'a.png.pdf']
+
+def test_failed_file_is_not_retried_until_it_changes(folders, monkeypatch):
+    src, dst = folders
+    _image(src / 'good.png')
+    (src / 'broken.png').write_bytes(b'not a png')
+    summary = _run(src, dst)
+    assert _counts(summary) == {'added': 1, 'failed': 1}
+    record = _state(dst)['broken.png']
+    assert record['error'] and record['outputs'] == []
+
+    monkeypatch.setattr(sync, 'run_batch', lambda *args, **kwargs: pytest.fail("broken.png was retried"))
+    assert _counts(_run(src, dst)) == {'unchanged': 1, 'skipped': 1}
+    stat = os.stat(str(src / 'broken.png'))
+    os.utime(str(src / 'broken.png'), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert _counts(_run(src, dst)) == {'unchanged': 1, 'skipped': 1}  # Touched only: same hash
+    monkeypatch.undo()
+
+    _image(src / 'broken.png')
+    assert _counts(_run(src, dst)) == {'unchanged': 1, 'modified': 1}
+    assert 'error' not in _state(dst)['broken.png']
+    assert _files(dst) == ['broken.pdf', 'good.pdf']
+
+def test_failed_modification_keeps_old_outputs(folders):
+    src, dst = folders
+    _image(src / 'a.png')
+    _run(src, dst)
+    (src / 'a.png').write_bytes(b'truncated')
+    assert _counts(_run(src, dst)) == {'failed': 1}
+    assert _state(dst)['a.png']['outputs'] == ['a.pdf']
+    os.remove(str(src / 'a.png'))
+    assert _counts(_run(src, dst)) == {'deleted': 1}
+    assert _files(dst) == []
+
+def test_exit_status_reports_skipped_failures(folders, capsys):
+    src, dst = folders
+    (src / 'broken.png').write_bytes(b'not a png')
+    argv = [str(src), str(dst), '-t', 'pdf', '-j', '1']
+    assert main(argv) == 1
+    assert main(argv) == 1
+    assert '1 skipped' in capsys.readouterr().out